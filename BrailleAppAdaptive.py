@@ -1,53 +1,103 @@
 import pygame
 from pygame.locals import *
 import sys
-import json
-from resources import letters, images, all_words, words_for_dict
-import pyttsx3
-from dictation_module import DictationModule
-from dictionaries import sounds, play_sound, dictations, letter_code_map
+from resources import images, words_for_dict, get_sound
+from tts_service import DEFAULT_RATE, get_tts
+from progress_store import open_store
+from audio_timeline import AudioTimeline
+from audio_manager import AUDIO_DONE, get_audio, sound_category
+from braille_cell import DOT_BITS, CELL_TO_SYMBOL, COMPUTER_CELL_COUNT, SYMBOL_TO_CELL
+from braille_engine import BrailleEngine
+from input_sources import BRAILLE_INPUT, InputSourceError, KeyboardSource, SerialSource, ReplaySource
+from session_log import SessionLog, new_log_path, replay_setup, engine_options
+from tracing import tracer
+from curriculum_package import CurriculumError, activate, load_package
 import argparse
 
 FPS = 120
+SPELL_GAP = 600  # мс между буквами, когда слово читается по буквам (синтезатор речи недоступен)
 WHITE = (255, 255, 255)
 BLUE = (0, 70, 225)
 GRAY = (200, 200, 200)
 BLACK = (0, 0, 0)
-DB_FILE = "students_db.json"
 
-class BrailleApp:
+class GlyphCache:
+    """Картинки букв, заранее масштабированные под текущий размер окна."""
+
     def __init__(self):
+        self._surfaces = {}
+
+    def get(self, cell, scale):
+        key = (cell, round(scale, 3))
+        if key not in self._surfaces:
+            image = images.get(cell)
+            if image is None:
+                return None
+            if key[1] != 1:
+                width, height = image.get_size()
+                image = pygame.transform.smoothscale(image, (max(1, int(width * scale)), max(1, int(height * scale))))
+            self._surfaces[key] = image.convert_alpha()
+        return self._surfaces[key]
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+class BrailleApp:
+    """Фронтенд на pygame: превращает клавиши в события движка и выполняет его команды.
+
+    Работает и как отдельная программа (run), и как экран оболочки MainMenu:
+    enter / handle_event / update / present / close; Esc выставляет finished.
+    """
+
+    def __init__(self, mode="free", sources=(), record_path=None, trace_path=None, store=None,
+                 today=None, seed=None):
+        self.trace_path = trace_path
+        self.finished = False
         self.init_pygame()
         self.init_screen()
-        self.init_variables()
+        self.init_variables(mode, store, today, seed)
         self.init_tts()
+        self.init_sources(sources, record_path)
 
     def init_pygame(self):
         pygame.init()
         pygame.mixer.init()
 
     def init_screen(self):
-        screen_info = pygame.display.Info()
-        self.W = int(screen_info.current_w * 0.75)
-        self.H = int(screen_info.current_h * 0.8)
+        # Размер рабочего стола, а не текущего окна (окно может остаться от меню)
+        desktop_w, desktop_h = pygame.display.get_desktop_sizes()[0]
+        self.W = int(desktop_w * 0.75)
+        self.H = int(desktop_h * 0.8)
         self.sc = pygame.display.set_mode((self.W, self.H), pygame.RESIZABLE)
+        # Картинки букв масштабируются относительно исходного размера окна
+        self.base_H = self.H
+        self.glyphs = GlyphCache()
+        self.dirty_rects = []
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("arial", 32)
-
-    def init_variables(self):
-        self.pin = 0
-        self.s_word = []
-        self.mode = "free"
-        self.student_id = None
-        self.dictation_module = None
-        self.waiting_for_student_id = False
-        self.typed_id = ""
+        self.hint = None
+
+    def init_variables(self, mode, store=None, today=None, seed=None):
+        # В оболочке хранилище общее: его открывает и закрывает она
+        self.owns_store = store is None
+        self.store = store or open_store()
+        # today и seed задаются при воспроизведении, чтобы прозвучали те же слова
+        self.engine = BrailleEngine(self.store, mode=mode, today=today, seed=seed)
+        # Звуки идут через каналы по категориям: буквы не глушат подсказки и наоборот
+        self.audio = get_audio()
+        self.timeline = AudioTimeline(self.audio)
         self.update_positions()
 
     def init_tts(self):
-        self.engine = pyttsx3.init()
-        self.engine.setProperty("rate", 150)
-        self.engine.setProperty("voice", "russian")
+        # Синтез идёт в фоновом потоке, главный цикл на речи не останавливается
+        self.tts = get_tts()
+
+    def init_sources(self, sources, record_path):
+        # Клавиатура есть всегда; устройство и журнал сессии подключаются дополнительно
+        self.keyboard = KeyboardSource()
+        self.sources = [source.start() for source in sources]
+        self.recorder = SessionLog(record_path, self.engine.session_meta()) if record_path else None
 
     def update_positions(self):
         self.circle_radius = int(self.W * 0.05)
@@ -61,65 +111,173 @@ class BrailleApp:
         ]
         self.letter_start_x = int(self.W * 0.35)
         self.letter_start_y = int(self.H * 0.01)
+        self.glyph_scale = self.H / self.base_H
+        self.glyph_x, self.glyph_y = self.letter_start_x, self.letter_start_y
+        self.prompt_rect = pygame.Rect(0, self.H // 2 - 50, self.W, 90)
+        self.prompt_dirty = True
+        self.hint_rect = pygame.Rect(self.letter_start_x, self.H - 50, self.W - self.letter_start_x, 45)
+
+    def mark_dirty(self, rect):
+        self.dirty_rects.append(pygame.Rect(rect))
+
+    def dot_rect(self, idx):
+        x, y = self.circle_positions[idx]
+        r = self.circle_radius
+        return pygame.Rect(x - r, y - r, 2 * r + 1, 2 * r + 1)
 
     def clear_win(self):
         self.sc.fill(GRAY)
+        self.glyph_x, self.glyph_y = self.letter_start_x, self.letter_start_y
+        self.prompt_dirty = True
+        self.mark_dirty(self.sc.get_rect())
 
-    def switch_mode(self):
-        if self.mode == "free":
-            self.mode = "dictation"
-            self.waiting_for_student_id = True
-            play_sound(sounds[7])
-            pygame.time.delay(4000)
-            play_sound(sounds[9])
-        else:
-            self.mode = "free"
-            self.dictation_module = None
-            self.student_id = None
-            self.clear_win()
+    def draw_dot(self, idx, color):
+        pygame.draw.circle(self.sc, color, self.circle_positions[idx], self.circle_radius)
+        self.mark_dirty(self.dot_rect(idx))
 
     def clear_braille_dots(self):
-        for pos in self.circle_positions:
-            pygame.draw.circle(self.sc, GRAY, pos, self.circle_radius)
+        for idx in range(len(self.circle_positions)):
+            self.draw_dot(idx, GRAY)
 
-    def get_letter_symbol(self, pin):
-        letter_map = {
-            1: 'А', 11: 'Б', 111010: 'В', 11011: 'Г', 11001: 'Д',
-            10001: 'Е', 100001: 'Ё', 11010: 'Ж', 110101: 'З', 1010: 'И',
-            101111: 'Й', 101: 'К', 111: 'Л', 1101: 'М', 11101: 'Н',
-            10101: 'О', 1111: 'П', 10111: 'Р', 1110: 'С', 11110: 'Т',
-            100101: 'У', 1011: 'Ф', 10011: 'Х', 1001: 'Ц', 11111: 'Ч',
-            110001: 'Ш', 101101: 'Щ', 110111: 'Ъ', 101110: 'Ы', 111110: 'Ь',
-            101010: 'Э', 110011: 'Ю', 101011: 'Я', 0: ' '
-        }
-        return letter_map.get(pin, '?')
-
-    def prompt_student_id(self):
-        self.load_student_progress()
-        self.dictation_module = DictationModule(self.student_id, self)
-        self.dictation_module.next_letter()
-
-    def load_student_progress(self):
-        try:
-            with open(DB_FILE, "r", encoding="utf-8") as f:
-                self.student_data = json.load(f)
-        except FileNotFoundError:
-            self.student_data = {}
+    def draw_glyph(self, cell):
+        """Дорисовывает одну букву в конец строки, не перерисовывая предыдущие."""
+        image = self.glyphs.get(cell, self.glyph_scale)
+        if image is None:
+            return
+        letter_width, letter_height = image.get_size()
+        self.mark_dirty(self.sc.blit(image, (self.glyph_x, self.glyph_y)))
+        self.glyph_x += letter_width + 5
+        if self.glyph_x > self.W - letter_width:
+            self.glyph_x, self.glyph_y = self.letter_start_x, self.glyph_y + letter_height + 5
+
+    def draw_id_prompt(self):
+        self.sc.fill(GRAY, self.prompt_rect)
+        if self.engine.waiting_for_student_id:
+            prompt = self.font.render("Введите код ученика:", True, BLACK)
+            entry = self.font.render(self.engine.typed_id + "|", True, BLACK)
+            self.sc.blit(prompt, (self.W // 2 - prompt.get_width() // 2, self.H // 2 - 50))
+            self.sc.blit(entry, (self.W // 2 - entry.get_width() // 2, self.H // 2))
+        self.mark_dirty(self.prompt_rect)
+        self.prompt_dirty = False
+
+    def draw_hint(self):
+        self.sc.fill(GRAY, self.hint_rect)
+        if self.hint:
+            self.sc.blit(self.font.render(self.hint, True, BLACK), self.hint_rect)
+        self.mark_dirty(self.hint_rect)
+
+    def redraw(self):
+        """Полная перерисовка окна (после изменения размера)."""
+        self.clear_win()
+        self.draw_hint()
+        for idx in range(len(self.circle_positions)):
+            if self.engine.pin & DOT_BITS[idx]:
+                self.draw_dot(idx, BLUE)
+        for cell, _ in self.engine.word:
+            self.draw_glyph(cell)
 
-        if self.student_id not in self.student_data:
-            self.student_data[self.student_id] = {}
+    def get_letter_symbol(self, pin):
+        return CELL_TO_SYMBOL[pin] if 0 <= pin < COMPUTER_CELL_COUNT else '?'
+
+    def missing_word(self, key):
+        """Слово, для которого в программе нет записанного звука: его произносит синтезатор."""
+        return key[0] == "word" and words_for_dict.path(key[1]) is None
+
+    def speak(self, text, rate=DEFAULT_RATE, delay=0):
+        """Произносит текст синтезатором (через delay мс в очереди звуков);
+        если синтезатор не запустился — по буквам записанными звуками букв."""
+        if self.tts.available:
+            if delay:
+                self.timeline.call(lambda: self.tts.speak(text, rate=rate), delay=delay)
+            else:
+                self.tts.speak(text, rate=rate)
+            return
+        for char in text:
+            cell = SYMBOL_TO_CELL.get(char)
+            if cell:
+                self.timeline.play(get_sound(("letter", cell)), delay=delay, category="letters")
+                delay = SPELL_GAP
+
+    def execute(self, commands):
+        """Выполняет команды движка: звук, речь и изменения на экране."""
+        if self.recorder:
+            self.recorder.record_commands(commands)
+        for command in commands:
+            kind = command.kind
+            if kind == "play":
+                if self.missing_word(command.arg):
+                    self.speak(command.arg[1])
+                elif self.audio.play(get_sound(command.arg), sound_category(command.arg)):
+                    tracer.audio_started()
+            elif kind == "schedule":
+                if self.missing_word(command.arg):
+                    self.speak(command.arg[1], delay=command.delay)
+                else:
+                    self.timeline.play(get_sound(command.arg), delay=command.delay,
+                                       category=sound_category(command.arg))
+            elif kind == "wait":
+                self.timeline.wait(command.delay)
+            elif kind == "cancel_audio":
+                self.timeline.clear()
+                self.audio.clear_queues()
+            elif kind == "stop_audio":
+                self.timeline.stop()
+                self.tts.cancel()
+            elif kind == "speak":
+                phrase, rate = command.arg
+                self.speak(phrase, rate=rate)
+            elif kind == "prefetch":
+                words_for_dict.prefetch(command.arg)
+            elif kind == "dot":
+                self.draw_dot(command.arg, BLUE)
+            elif kind == "clear_dots":
+                self.clear_braille_dots()
+            elif kind == "glyph":
+                self.draw_glyph(command.arg)
+            elif kind == "clear":
+                self.clear_win()
+            elif kind == "id_prompt":
+                self.prompt_dirty = True
+            elif kind == "hint":
+                self.hint = command.arg
+                self.draw_hint()
+            elif kind == "print":
+                print(command.arg)
 
     def handle_events(self):
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.quit()
-            elif event.type == VIDEORESIZE:
-                self.handle_resize(event)
-            elif event.type == pygame.KEYDOWN:
-                self.handle_keydown(event)
+            self.handle_event(event)
         return True
 
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.quit()
+        elif event.type == VIDEORESIZE:
+            self.handle_resize(event)
+        elif event.type == pygame.KEYDOWN:
+            self.handle_keydown(event)
+        elif event.type == AUDIO_DONE:
+            self.audio.update()
+        elif event.type == BRAILLE_INPUT:
+            self.handle_input(event.input, event.posted)
+
+    def close(self):
+        """Останавливает ввод и звук; окно и pygame остаются для следующего экрана."""
+        for source in self.sources:
+            source.stop()
+        if self.recorder:
+            self.recorder.close()
+        self.timeline.stop()
+        self.tts.cancel()
+        if self.owns_store:
+            self.store.close()
+        if tracer.enabled:
+            tracer.print_summary()
+            if self.trace_path:
+                tracer.export_chrome(self.trace_path)
+
     def quit(self):
+        self.close()
         pygame.quit()
         sys.exit()
 
@@ -127,115 +285,109 @@ class BrailleApp:
         self.W, self.H = event.w, event.h
         self.sc = pygame.display.set_mode((self.W, self.H), pygame.RESIZABLE)
         self.update_positions()
+        # Масштабированные картинки для прежнего размера больше не понадобятся
+        self.glyphs.clear()
+        self.redraw()
 
     def handle_keydown(self, event):
-        if self.waiting_for_student_id:
-            if event.key == K_BACKSPACE:
-                self.typed_id = self.typed_id[:-1]
-            elif event.key == K_RETURN:
-                self.student_id = self.typed_id
-                self.typed_id = ""
-                self.waiting_for_student_id = False
-                self.prompt_student_id()
-            elif event.unicode.isprintable() and len(event.unicode) == 1:
-                self.typed_id += event.unicode
+        if event.key == K_ESCAPE:
+            self.finished = True
             return
+        with tracer.span("input.decode"):
+            engine_event = self.keyboard.translate(event, self.engine)
+        if engine_event:
+            self.handle_input(engine_event)
+
+    def handle_input(self, engine_event, posted=None):
+        """Единая точка входа для событий с клавиатуры, устройства и записи."""
+        tracer.input_received(posted)
+        if self.recorder:
+            self.recorder.record(engine_event)
+        with tracer.span("engine.handle"):
+            commands = self.engine.handle(engine_event)
+        with tracer.span("execute"):
+            self.execute(commands)
+
+    def present(self):
+        """Выводит на экран только изменившиеся области."""
+        if self.prompt_dirty:
+            self.draw_id_prompt()
+        if self.dirty_rects:
+            start = tracer.now() if tracer.enabled else None
+            pygame.display.update(self.dirty_rects)
+            self.dirty_rects = []
+            if start is not None:
+                tracer.frame_presented(start)
+
+    def time_until_next(self):
+        return self.timeline.time_until_next()
+
+    def wait_for_activity(self):
+        """Спит до следующего события или шага звуковой очереди, не нагружая процессор."""
+        timeout = self.time_until_next()
+        event = pygame.event.wait() if timeout is None else pygame.event.wait(max(1, timeout))
+        if event.type != pygame.NOEVENT:
+            self.handle_event(event)
+
+    def enter(self):
+        self.clear_win()
+        self.execute(self.engine.start())
 
-        key_map = {
-            K_KP7: (1, 0),   K_KP8: (1000, 3),
-            K_KP4: (10, 1),  K_KP5: (10000, 4),
-            K_KP1: (100, 2), K_KP2: (100000, 5)
-        }
-
-        if event.key in key_map:
-            value, idx = key_map[event.key]
-            self.pin += value
-            pygame.draw.circle(self.sc, BLUE, self.circle_positions[idx], self.circle_radius)
-
-        elif event.key == K_KP_ENTER:
-            self.handle_enter_key()
-
-        elif event.key == K_KP_PERIOD:
-            self.handle_phrase_output()
-
-        elif event.key == K_SPACE:
-            self.switch_mode()
-
-        elif event.key == K_KP_PLUS:
-            self.handle_plus_key()
-
-        elif event.key == K_KP0:
-            self.clear_win()
-            self.s_word.clear()
-            self.pin = 0
-
-        elif event.key == K_KP_MINUS:
-            if self.mode == "free":
-                print("".join([char for _, char in self.s_word]))
-            elif self.mode == "dictation" and self.dictation_module:
-                self.dictation_module.check_word("".join([char for _, char in self.s_word]).strip().lower())
-                self.s_word.clear()
-
-    def handle_enter_key(self):
-        if self.pin in letters:
-            letters[self.pin].play_sound()
-        else:
-            letters[-1].play_sound()
-            self.clear_braille_dots()
-            self.pin = 0
-
-    def handle_phrase_output(self):
-        phrase = "".join([char for _, char in self.s_word])
-        if phrase.lower() in all_words:
-            play_sound(words_for_dict[phrase.lower()])
-        elif self.pin in letters:
-            letters[self.pin].play_sound()
-        else:
-            self.engine.say(phrase)
-            self.engine.runAndWait()
-
-    def handle_plus_key(self):
-        if self.pin in letters:
-            letter = letters[self.pin]
-            letter.play_sound()
-            letter_symbol = self.get_letter_symbol(self.pin)
-            letter_image = images.get(self.pin)
-            if letter_image:
-                self.s_word.append((letter_image, letter_symbol))
-                self.clear_win()
-                x, y = self.letter_start_x, self.letter_start_y
-                for img, char in self.s_word:
-                    self.sc.blit(img, (x, y))
-                    letter_width, letter_height = img.get_size()
-                    x += letter_width + 5
-                    if x > self.W - letter_width:
-                        x, y = self.letter_start_x, y + letter_height + 5
-                self.pin = 0
+    def update(self):
+        self.timeline.update()
+        self.audio.update()
+        self.tts.update()
 
     def run(self):
-        self.clear_win()
-        self.sc.fill(GRAY)
-        
-        while self.handle_events():
-            if self.waiting_for_student_id:
-                prompt = self.font.render("Введите код ученика:", True, BLACK)
-                entry = self.font.render(self.typed_id + "|", True, BLACK)
-                self.sc.blit(prompt, (self.W // 2 - prompt.get_width() // 2, self.H // 2 - 50))
-                self.sc.blit(entry, (self.W // 2 - entry.get_width() // 2, self.H // 2))
-            else:
-                pass
-            
-            pygame.display.update()
+        """Отдельная программа: работает, пока не закроют окно или не нажмут Esc."""
+        self.enter()
+
+        while not self.finished:
+            self.handle_events()
+            self.update()
+            self.present()
             self.clock.tick(FPS)
+            self.wait_for_activity()
+        self.quit()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--mode", choices=["free", "dictation"], default="free")
+    parser.add_argument("--serial", nargs="?", const="auto", metavar="PORT",
+                        help="ввод с матрицы герконов (порт ищется автоматически)")
+    parser.add_argument("--replay", metavar="FILE", help="воспроизвести записанную сессию")
+    parser.add_argument("--replay-speed", type=float, default=1.0)
+    parser.add_argument("--record", metavar="FILE", help="записать журнал сессии в этот файл")
+    parser.add_argument("--no-log", action="store_true", help="не вести журнал сессии (по умолчанию — в sessions/)")
+    parser.add_argument("--curriculum", metavar="NAME", help="программа диктантов из папки curricula/")
+    parser.add_argument("--trace", nargs="?", const="", metavar="FILE",
+                        help="замерять задержки; при выходе вывести перцентили и сохранить Chrome trace в FILE")
     args = parser.parse_args()
 
-    app = BrailleApp()
-    app.mode = args.mode
-    if app.mode == "dictation":
-        app.mode = "free"
-        app.switch_mode()
-    app.run()
\ No newline at end of file
+    if args.trace is not None:
+        tracer.enable()
+    if args.curriculum:
+        try:
+            activate(load_package(args.curriculum))
+        except (OSError, CurriculumError) as e:
+            sys.exit(f"Программа {args.curriculum} не загружена: {e}")
+
+    sources = []
+    options = {"mode": args.mode}
+    store = None
+    if args.serial:
+        sources.append(SerialSource(None if args.serial == "auto" else args.serial))
+    if args.replay:
+        sources.append(ReplaySource(args.replay, args.replay_speed))
+        # Движок с датой, seed и режимом из журнала; ответы пишутся в хранилище в памяти,
+        # восстановленное из снимков учеников, а не в настоящий прогресс
+        meta, store = replay_setup(args.replay)
+        if meta:
+            options = engine_options(meta)
+    record_path = args.record or (None if args.no_log or args.replay else new_log_path())
+
+    try:
+        app = BrailleApp(sources=sources, record_path=record_path, trace_path=args.trace or None, store=store, **options)
+    except InputSourceError as e:
+        sys.exit(str(e))
+    app.run()
@@ -1,67 +1,208 @@
 import pygame
 import sys
-import subprocess
+from audio_manager import init_mixer
+from progress_store import open_store
+# Ресурсы загружаются один раз при запуске меню и общие для всех экранов
+from BrailleAppAdaptive import BrailleApp
+from admin import AdminView
+from input_sources import SerialSource
+from session_log import new_log_path
 
-pygame.init()
+# Все экраны работают в одном процессе: ресурсы, микшер и хранилище общие,
+# переключение занимает миллисекунды вместо запуска нового интерпретатора.
+# Esc на экране возвращает в меню (в прогрессе учеников — когда поиск пуст).
 
 # Экран
 WIDTH, HEIGHT = 600, 400
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Главное меню")
+ADMIN_SIZE = (800, 600)
+CLICK_DEBOUNCE_MS = 400  # повторный щелчок раньше этого срока не открывает экран ещё раз
 
 # Шрифты и цвета
-FONT = pygame.font.SysFont("arial", 24)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GRAY = (200, 200, 200)
 BLUE = (100, 149, 237)
 DARK_BLUE = (70, 120, 200)
+RED = (200, 40, 40)
 
-# Кнопки
-buttons = [
-    {"label": "1. Цифровая клавиатура", "action": lambda: subprocess.Popen([sys.executable, "BrailleAppAdaptive.py"])},
-    {"label": "2. Модуль диктантов", "action": lambda: subprocess.Popen([sys.executable, "BrailleAppAdaptive.py", "--mode", "dictation"])},
-    {"label": "3. Матрица герконов", "action": lambda: subprocess.Popen([sys.executable, "arduino.py"])},
-    {"label": "4. Прогресс учеников", "action": lambda: subprocess.Popen([sys.executable, "admin.py"])}
+BUTTON_WIDTH, BUTTON_HEIGHT = 350, 50
+START_Y = 60
+SPACING = 70
+
+
+def open_free(shell):
+    return BrailleApp(mode="free", store=shell.store, record_path=new_log_path())
+
+
+def open_dictation(shell):
+    return BrailleApp(mode="dictation", store=shell.store, record_path=new_log_path())
+
+
+def open_hardware(shell):
+    return BrailleApp(mode="free", sources=[SerialSource()], store=shell.store, record_path=new_log_path())
+
+
+def open_admin(shell):
+    return AdminView(pygame.display.set_mode(ADMIN_SIZE), shell.store)
+
+
+# Кнопки: (название экрана, конструктор); кнопку можно нажать и цифрой на клавиатуре
+BUTTONS = [
+    ("Цифровая клавиатура", open_free),
+    ("Модуль диктантов", open_dictation),
+    ("Матрица герконов", open_hardware),
+    ("Прогресс учеников", open_admin),
 ]
+BUTTON_KEYS = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]
 
-BUTTON_WIDTH, BUTTON_HEIGHT = 350, 50
-button_rects = []
-
-start_y = 60
-spacing = 70
-
-for i, button in enumerate(buttons):
-    x = (WIDTH - BUTTON_WIDTH) // 2
-    y = start_y + i * spacing
-    rect = pygame.Rect(x, y, BUTTON_WIDTH, BUTTON_HEIGHT)
-    button_rects.append(rect)
-
-# Главный цикл
-running = True
-while running:
-    screen.fill(WHITE)
-
-    for i, rect in enumerate(button_rects):
-        mouse_pos = pygame.mouse.get_pos()
-        is_hovered = rect.collidepoint(mouse_pos)
-        color = DARK_BLUE if is_hovered else BLUE
-        pygame.draw.rect(screen, color, rect, border_radius=12)
-
-        text_surface = FONT.render(buttons[i]["label"], True, WHITE)
-        text_rect = text_surface.get_rect(center=rect.center)
-        screen.blit(text_surface, text_rect)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # ЛКМ
-                for i, rect in enumerate(button_rects):
-                    if rect.collidepoint(event.pos):
-                        buttons[i]["action"]()
-
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
\ No newline at end of file
+
+class MenuScene:
+    """Главное меню; перерисовывается только при смене подсветки или сообщения."""
+
+    def __init__(self, shell):
+        self.shell = shell
+        self.finished = False
+        self.font = pygame.font.SysFont("arial", 24)
+        self.small_font = pygame.font.SysFont("arial", 18)
+        x = (WIDTH - BUTTON_WIDTH) // 2
+        self.rects = [pygame.Rect(x, START_Y + i * SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
+                      for i in range(len(BUTTONS))]
+        self.hovered = None
+        self.message = ""
+        self.last_click = -CLICK_DEBOUNCE_MS
+
+    def enter(self):
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Главное меню")
+        self.hovered = self.button_at(pygame.mouse.get_pos())
+        self.dirty = True
+
+    def button_at(self, pos):
+        for i, rect in enumerate(self.rects):
+            if rect.collidepoint(pos):
+                return i
+        return None
+
+    def activate(self, index):
+        now = pygame.time.get_ticks()
+        if now - self.last_click < CLICK_DEBOUNCE_MS:
+            return
+        self.last_click = now
+        self.message = ""
+        self.shell.open(index)
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEMOTION:
+            hovered = self.button_at(event.pos)
+            if hovered != self.hovered:
+                self.hovered = hovered
+                self.dirty = True
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # ЛКМ
+            index = self.button_at(event.pos)
+            if index is not None:
+                self.activate(index)
+        elif event.type == pygame.KEYDOWN and event.key in BUTTON_KEYS:
+            self.activate(BUTTON_KEYS.index(event.key))
+
+    def show_error(self, message):
+        self.message = message
+        self.dirty = True
+
+    def update(self):
+        pass
+
+    def present(self):
+        if not self.dirty:
+            return
+        self.screen.fill(WHITE)
+        for i, rect in enumerate(self.rects):
+            color = DARK_BLUE if i == self.hovered else BLUE
+            pygame.draw.rect(self.screen, color, rect, border_radius=12)
+            text_surface = self.font.render(f"{i + 1}. {BUTTONS[i][0]}", True, WHITE)
+            self.screen.blit(text_surface, text_surface.get_rect(center=rect.center))
+        if self.message:
+            text_surface = self.small_font.render(self.message, True, RED)
+            self.screen.blit(text_surface, text_surface.get_rect(center=(WIDTH // 2, HEIGHT - 30)))
+        pygame.display.flip()
+        self.dirty = False
+
+    def time_until_next(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class Shell:
+    """Оболочка: держит текущий экран и передаёт ему события.
+
+    Экран — объект с методами enter, handle_event, update, present, time_until_next, close
+    и флагом finished (BrailleApp, AdminView, MenuScene).
+    """
+
+    def __init__(self):
+        init_mixer()
+        pygame.init()
+        self.store = open_store()
+        self.menu = MenuScene(self)
+        self.scene = None
+        self.switch(self.menu)
+
+    def open(self, index):
+        title, factory = BUTTONS[index]
+        try:
+            scene = factory(self)
+        except (OSError, ImportError) as e:
+            # Например, матрица герконов не подключена: остаёмся в меню
+            self.menu.enter()
+            self.menu.show_error(f"{title}: {e}")
+            return
+        self.switch(scene)
+        pygame.display.set_caption(title)
+
+    def switch(self, scene):
+        if self.scene is not None and self.scene is not self.menu:
+            self.scene.close()
+        self.scene = scene
+        scene.finished = False
+        scene.enter()
+        # Щелчки и нажатия, накопившиеся во время переключения, не должны попасть в новый экран
+        pygame.event.clear((pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.KEYDOWN))
+
+    def wait(self):
+        """Ждёт события, не крутя цикл впустую; экраны со звуковой очередью просыпаются вовремя.
+
+        Другого ограничения частоты кадров нет: нажатие обрабатывается сразу, как пришло.
+        """
+        timeout = self.scene.time_until_next()
+        event = pygame.event.wait() if timeout is None else pygame.event.wait(max(1, timeout))
+        return [event] + pygame.event.get()
+
+    def run(self):
+        self.scene.present()
+        while True:
+            scene = self.scene
+            for event in self.wait():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type != pygame.NOEVENT:
+                    scene.handle_event(event)
+                if scene.finished:
+                    self.switch(self.menu)
+                if self.scene is not scene:
+                    break  # остальные события относились к прежнему экрану
+            self.scene.update()
+            self.scene.present()
+
+    def close(self):
+        if self.scene is not self.menu:
+            self.scene.close()
+        self.store.close()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    shell = Shell()
+    shell.run()
+    shell.close()
+    sys.exit()
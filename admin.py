@@ -1,11 +1,18 @@
 import pygame
-import json
 import sys
+from collections import OrderedDict
+from progress_store import open_store
 
 # Константы
 WIDTH, HEIGHT = 800, 600
 LEFT_PANEL_WIDTH = 250
 FONT_SIZE = 24
+SEARCH_HEIGHT = 40
+ID_ROW_HEIGHT = FONT_SIZE + 15
+HISTORY_ROW_HEIGHT = FONT_SIZE + 5
+PAGE_SIZE = 100          # столько ID читается из хранилища за раз
+TEXT_CACHE_SIZE = 1000   # сколько отрисованных строк держать в памяти
+SCROLL_ROWS = 3          # строк за один щелчок колеса мыши
 
 # Цвета
 WHITE = (255, 255, 255)
@@ -13,78 +20,232 @@ GRAY = (200, 200, 200)
 BLACK = (0, 0, 0)
 BLUE = (173, 216, 230)
 
-# Загрузка базы
-with open("students_db.json", encoding="utf-8") as f:
-    students_db = json.load(f)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Прогресс учеников")
-font = pygame.font.SysFont(None, FONT_SIZE)
+class TextCache:
+    """Отрисованные строки текста: font.render вызывается один раз на строку."""
+
+    def __init__(self, font, size=TEXT_CACHE_SIZE):
+        self.font = font
+        self.size = size
+        self.surfaces = OrderedDict()
+
+    def get(self, text):
+        surface = self.surfaces.get(text)
+        if surface is None:
+            surface = self.surfaces[text] = self.font.render(text, True, BLACK)
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(text)
+        return surface
+
+
+class StudentList:
+    """Список ID с поиском: в памяти только прочитанные страницы, рисуются только видимые строки."""
+
+    def __init__(self, store):
+        self.store = store
+        self.search = ""
+        self.offset = 0  # номер первой видимой строки
+        self.refresh()
+
+    def refresh(self):
+        self.count = self.store.count_students(self.search)
+        self.pages = {}
+        self.offset = 0
+
+    def set_search(self, search):
+        self.search = search
+        self.refresh()
+
+    def get(self, index):
+        page = self.pages.get(index // PAGE_SIZE)
+        if page is None:
+            page = self.pages[index // PAGE_SIZE] = self.store.find_students(
+                self.search, index // PAGE_SIZE * PAGE_SIZE, PAGE_SIZE)
+        position = index % PAGE_SIZE
+        return page[position] if position < len(page) else None
+
+    def visible_rows(self):
+        return (HEIGHT - SEARCH_HEIGHT) // ID_ROW_HEIGHT
+
+    def scroll(self, rows):
+        self.offset = max(0, min(self.offset + rows, self.count - self.visible_rows()))
+
+
+class AdminView:
+    """Просмотр прогресса учеников; перерисовывается только после событий.
+
+    Может работать экраном оболочки MainMenu: Esc при пустом поиске выставляет finished.
+    """
+
+    def __init__(self, screen, store):
+        self.screen = screen
+        self.store = store
+        self.finished = False
+        self.dirty = True
+        self.font = pygame.font.SysFont(None, FONT_SIZE)
+        self.texts = TextCache(self.font)
+        self.students = StudentList(store)
+        self.selected_student = None
+        self.history = []  # строки правой панели: (отступ, текст)
+        self.history_offset = 0
+        self.show_stats = False  # Tab переключает правую панель на статистику
+        self.analytics = getattr(store, "analytics", None)
+
+    def select(self, student_id):
+        self.selected_student = student_id
+        self.history_offset = 0
+        if self.show_stats:
+            self.history = self.stats_lines(student_id)
+        else:
+            self.history = self.history_lines(student_id)
+
+    def history_lines(self, student_id):
+        lines = []
+        last_date = None
+        for date, dictation_name, errors, grade, mistakes in self.store.history_rows(student_id):
+            if date != last_date:
+                lines.append((0, date))
+                last_date = date
+            lines.append((10, f"  {dictation_name}: Ошибок {errors}, Оценка {grade}"))
+            if mistakes:
+                # Пустой ответ (NULL после импорта) показываем прочерком, как в отчётах
+                lines.append((20, f"    Ошибки: {', '.join(mistake or '—' for mistake in mistakes)}"))
+        return lines
+
+    def stats_lines(self, student_id):
+        """Сводка из готовых агрегатов analytics.py: ученик и весь класс."""
+        if self.analytics is None:
+            return [(0, "Статистика доступна только для хранилища SQLite")]
+        lines = []
+        if student_id:
+            lines.append((0, f"Ученик {student_id}: доля ошибок по буквам"))
+            for stage, answers, errors, rate in self.analytics.letter_error_rates(student_id):
+                lines.append((10, f"{stage}: {errors} из {answers} ({rate:.0%})"))
+            lines.append((0, "Средняя оценка по дням"))
+            for day, grade, count in self.analytics.grade_trend(student_id):
+                lines.append((10, f"{day}: {grade} (диктантов: {count})"))
+        lines.append((0, "Класс: чаще всего путают"))
+        for expected, typed, count in self.analytics.top_confusions(10):
+            lines.append((10, f"{expected} -> {typed}: {count}"))
+        lines.append((0, "Класс: рейтинг по точности"))
+        for place, (ranked_id, answers, errors, accuracy) in enumerate(self.analytics.ranking(10), 1):
+            lines.append((10, f"{place}. {ranked_id}: {accuracy:.0%} ({answers} ответов)"))
+        return lines
+
+    def history_rows_visible(self):
+        return (HEIGHT - 20) // HISTORY_ROW_HEIGHT
+
+    def handle_event(self, event):
+        if self.apply_event(event):
+            self.dirty = True
+
+    def apply_event(self, event):
+        """Обрабатывает событие; возвращает True, если экран нужно перерисовать."""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_x, mouse_y = event.pos
+            if mouse_x < LEFT_PANEL_WIDTH and mouse_y >= SEARCH_HEIGHT:
+                index = self.students.offset + (mouse_y - SEARCH_HEIGHT) // ID_ROW_HEIGHT
+                if index < self.students.count:
+                    self.select(self.students.get(index))
+                    return True
+        elif event.type == pygame.MOUSEWHEEL:
+            rows = -event.y * SCROLL_ROWS
+            if pygame.mouse.get_pos()[0] < LEFT_PANEL_WIDTH:
+                self.students.scroll(rows)
+            else:
+                last = max(0, len(self.history) - self.history_rows_visible())
+                self.history_offset = max(0, min(self.history_offset + rows, last))
+            return True
+        elif event.type == pygame.KEYDOWN:
+            # Набор с клавиатуры — поиск по ID
+            if event.key == pygame.K_TAB:
+                self.show_stats = not self.show_stats
+                self.select(self.selected_student)
+            elif event.key == pygame.K_BACKSPACE:
+                self.students.set_search(self.students.search[:-1])
+            elif event.key == pygame.K_ESCAPE:
+                if not self.students.search:
+                    self.finished = True
+                    return False
+                self.students.set_search("")
+            elif event.unicode.isprintable() and event.unicode:
+                self.students.set_search(self.students.search + event.unicode)
+            else:
+                return False
+            return True
+        return event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+
+    def draw(self):
+        self.screen.fill(WHITE)
+
+        # Левая панель — поиск и видимая часть списка ID
+        pygame.draw.rect(self.screen, GRAY, (0, 0, LEFT_PANEL_WIDTH, HEIGHT))
+        search = self.texts.get(f"Поиск: {self.students.search}" if self.students.search else "Поиск: наберите ID")
+        self.screen.blit(search, (15, 12))
+
+        y = SEARCH_HEIGHT
+        end = min(self.students.count, self.students.offset + self.students.visible_rows())
+        for index in range(self.students.offset, end):
+            student_id = self.students.get(index)
+            rect = pygame.Rect(10, y, LEFT_PANEL_WIDTH - 20, FONT_SIZE + 10)
+            color = BLUE if student_id == self.selected_student else WHITE
+            pygame.draw.rect(self.screen, color, rect)
+            self.screen.blit(self.texts.get(student_id), (rect.x + 5, rect.y + 5))
+            y += ID_ROW_HEIGHT
+
+        # Правая панель — видимые строки прогресса ученика
+        x = LEFT_PANEL_WIDTH + 20
+        y = 20
+        for indent, text in self.history[self.history_offset:self.history_offset + self.history_rows_visible()]:
+            self.screen.blit(self.texts.get(text), (x + indent, y))
+            y += HISTORY_ROW_HEIGHT
 
-clock = pygame.time.Clock()
+        pygame.display.flip()
 
-selected_student = None
-scroll_offset = 0
+    # Интерфейс экрана оболочки
 
-# Получаем список ID учеников
-student_ids = list(students_db.keys())
+    def enter(self):
+        pygame.display.set_caption("Прогресс учеников")
+        self.dirty = True
 
-running = True
-while running:
-    screen.fill(WHITE)
+    def update(self):
+        pass
 
-    # Левая панель — список ID
-    pygame.draw.rect(screen, GRAY, (0, 0, LEFT_PANEL_WIDTH, HEIGHT))
+    def present(self):
+        if self.dirty:
+            self.draw()
+            self.dirty = False
 
-    y = 10
-    for i, student_id in enumerate(student_ids):
-        rect = pygame.Rect(10, y, LEFT_PANEL_WIDTH - 20, FONT_SIZE + 10)
-        color = BLUE if student_id == selected_student else WHITE
-        pygame.draw.rect(screen, color, rect)
+    def time_until_next(self):
+        return None
 
-        text = font.render(student_id, True, BLACK)
-        screen.blit(text, (rect.x + 5, rect.y + 5))
-        y += FONT_SIZE + 15
+    def close(self):
+        pass
 
-    # Правая панель — прогресс ученика
-    if selected_student:
-        x = LEFT_PANEL_WIDTH + 20
-        y = 20
-        student_data = students_db[selected_student]
-        for date, dictations in sorted(student_data.items()):
-            date_text = font.render(f"{date}", True, BLACK)
-            screen.blit(date_text, (x, y))
-            y += FONT_SIZE + 5
-
-            for dictation_name, info in dictations.items():
-                summary = f"  {dictation_name}: Ошибок {info['errors']}, Оценка {info['grade']}"
-                d_text = font.render(summary, True, BLACK)
-                screen.blit(d_text, (x + 10, y))
-                y += FONT_SIZE + 5
-
-                if info['mistakes']:
-                    mistakes = ", ".join(info['mistakes'])
-                    m_text = font.render(f"    Ошибки: {mistakes}", True, BLACK)
-                    screen.blit(m_text, (x + 20, y))
-                    y += FONT_SIZE + 5
-
-            y += 10
-
-    # Обработка событий
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            if mouse_x < LEFT_PANEL_WIDTH:
-                clicked_index = mouse_y // (FONT_SIZE + 15)
-                if clicked_index < len(student_ids):
-                    selected_student = student_ids[clicked_index]
-
-    pygame.display.flip()
-    clock.tick(30)
-
-pygame.quit()
-sys.exit()
+    def run(self):
+        self.enter()
+        self.present()
+        while not self.finished:
+            # Ждём события, а не перерисовываем экран 30 раз в секунду
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                return
+            self.handle_event(event)
+            self.present()
+
+
+if __name__ == "__main__":
+    # Прогресс читается через то же хранилище, что и у программы диктантов
+    store = open_store()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Прогресс учеников")
+
+    AdminView(screen, store).run()
+
+    store.close()
+    pygame.quit()
+    sys.exit()
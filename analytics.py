@@ -0,0 +1,156 @@
+import argparse
+import csv
+import sys
+from braille_cell import CELL_TO_SYMBOL, confusions
+
+# Сводные таблицы обновляются в той же транзакции, что и ответ ученика,
+# поэтому отчёты не пересчитывают всю историю.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stage_stats (
+    student_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    day TEXT NOT NULL,
+    answers INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, stage, day)
+);
+CREATE TABLE IF NOT EXISTS word_stats (
+    word TEXT PRIMARY KEY,
+    answers INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS confusion_stats (
+    expected INTEGER NOT NULL,
+    typed INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (expected, typed)
+);
+"""
+# В students_db.json у диктанта нет ответов, только число ошибок; в старой программе
+# в каждом диктанте было 10 слов
+LEGACY_DICTATION_WORDS = 10
+
+
+class Analytics:
+    """Сводная статистика поверх базы SQLite хранилища прогресса."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.executescript(SCHEMA)
+        if self._needs_rebuild():
+            self.rebuild()
+
+    def _needs_rebuild(self):
+        # База, заведённая до появления сводок: ответы есть, сводок нет
+        has_stats = self.conn.execute("SELECT 1 FROM stage_stats LIMIT 1").fetchone()
+        has_sessions = self.conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone()
+        return has_sessions is not None and has_stats is None
+
+    def record_answer(self, student_id, day, stage, word, correct, typed=None):
+        """Учитывает один ответ; вызывается внутри транзакции хранилища."""
+        error = 0 if correct else 1
+        self.record_stage(student_id, day, stage, 1, error)
+        self.conn.execute(
+            "INSERT INTO word_stats (word, answers, errors) VALUES (?, 1, ?)"
+            " ON CONFLICT (word) DO UPDATE SET answers = answers + 1, errors = errors + excluded.errors",
+            (word, error))
+        if not correct:
+            self.conn.executemany(
+                "INSERT INTO confusion_stats (expected, typed, count) VALUES (?, ?, 1)"
+                " ON CONFLICT (expected, typed) DO UPDATE SET count = count + 1",
+                confusions(word, typed))
+
+    def record_stage(self, student_id, day, stage, answers, errors):
+        self.conn.execute(
+            "INSERT INTO stage_stats (student_id, stage, day, answers, errors) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (student_id, stage, day) DO UPDATE"
+            " SET answers = answers + excluded.answers, errors = errors + excluded.errors",
+            (student_id, stage, day, answers, errors))
+
+    def rebuild(self):
+        """Пересчитывает сводки по таблице ответов (для старой базы и после импорта)."""
+        with self.conn:
+            for table in ("stage_stats", "word_stats", "confusion_stats"):
+                self.conn.execute(f"DELETE FROM {table}")
+            rows = self.conn.execute(
+                "SELECT s.student_id, s.day, s.dictation, r.word, r.correct, r.typed"
+                " FROM results r JOIN sessions s ON s.id = r.session_id ORDER BY r.id").fetchall()
+            for student_id, day, stage, word, correct, typed in rows:
+                self.record_answer(student_id, day, stage, word, correct, typed)
+            # Диктанты из students_db.json: ответов нет, есть только число ошибок. Какие слова
+            # диктовались, не сохранялось, поэтому по ним пополняется только stage_stats
+            rows = self.conn.execute(
+                "SELECT student_id, day, dictation, errors FROM sessions s"
+                " WHERE NOT EXISTS (SELECT 1 FROM results r WHERE r.session_id = s.id)").fetchall()
+            for student_id, day, stage, errors in rows:
+                self.record_stage(student_id, day, stage, max(errors, LEGACY_DICTATION_WORDS), errors)
+
+    # Отчёты: списки кортежей, первая строка которых описана в REPORTS
+
+    def letter_error_rates(self, student_id=None):
+        """Доля ошибок по этапам (буквам) для ученика или всего класса."""
+        where, params = ("WHERE student_id = ?", (student_id,)) if student_id else ("", ())
+        return self.conn.execute(
+            f"SELECT stage, SUM(answers), SUM(errors), ROUND(1.0 * SUM(errors) / SUM(answers), 3)"
+            f" FROM stage_stats {where} GROUP BY stage ORDER BY 4 DESC", params).fetchall()
+
+    def top_confusions(self, limit=10):
+        """Чаще всего путаемые ячейки: (ожидалась, набрана, сколько раз)."""
+        rows = self.conn.execute(
+            "SELECT expected, typed, count FROM confusion_stats ORDER BY count DESC LIMIT ?", (limit,))
+        return [(CELL_TO_SYMBOL[expected] if expected else "—", CELL_TO_SYMBOL[typed] if typed else "—", count)
+                for expected, typed, count in rows]
+
+    def hardest_words(self, limit=20):
+        return self.conn.execute(
+            "SELECT word, answers, errors, ROUND(1.0 * errors / answers, 3) FROM word_stats"
+            " ORDER BY 4 DESC, answers DESC LIMIT ?", (limit,)).fetchall()
+
+    def grade_trend(self, student_id):
+        """Средняя оценка ученика по дням."""
+        return self.conn.execute(
+            "SELECT day, ROUND(AVG(grade), 2), COUNT(*) FROM sessions WHERE student_id = ?"
+            " GROUP BY day ORDER BY day", (student_id,)).fetchall()
+
+    def ranking(self, limit=None):
+        """Ученики по точности ответов за всё время."""
+        return self.conn.execute(
+            "SELECT student_id, SUM(answers), SUM(errors), ROUND(1.0 - 1.0 * SUM(errors) / SUM(answers), 3)"
+            " FROM stage_stats GROUP BY student_id ORDER BY 4 DESC, 2 DESC LIMIT ?",
+            (limit if limit is not None else -1,)).fetchall()
+
+
+REPORTS = {
+    "letters": (["этап", "ответов", "ошибок", "доля ошибок"], lambda a, args: a.letter_error_rates(args.student)),
+    "confusions": (["ожидалась", "набрана", "раз"], lambda a, args: a.top_confusions(args.limit)),
+    "words": (["слово", "ответов", "ошибок", "доля ошибок"], lambda a, args: a.hardest_words(args.limit)),
+    "trend": (["день", "средняя оценка", "диктантов"], lambda a, args: a.grade_trend(args.student)),
+    "ranking": (["ученик", "ответов", "ошибок", "точность"], lambda a, args: a.ranking(args.limit)),
+}
+
+
+if __name__ == "__main__":
+    from progress_store import SqliteProgressStore, SQLITE_FILE
+
+    parser = argparse.ArgumentParser(description="Отчёты по прогрессу учеников")
+    parser.add_argument("report", choices=REPORTS)
+    parser.add_argument("--student", help="ID ученика (для letters и trend)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--csv", help="записать отчёт в CSV-файл вместо вывода на экран")
+    args = parser.parse_args()
+    if args.report == "trend" and not args.student:
+        parser.error("для отчёта trend нужен --student")
+
+    store = SqliteProgressStore(SQLITE_FILE)
+    header, report = REPORTS[args.report]
+    rows = report(store.analytics, args)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+    else:
+        writer = csv.writer(sys.stdout, delimiter="\t")
+        writer.writerow(header)
+        writer.writerows(rows)
+    store.close()
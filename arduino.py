@@ -1,19 +1,19 @@
-import serial
-from resources import letters
+import argparse
+import sys
+from BrailleAppAdaptive import BrailleApp
+from input_sources import InputSourceError, SerialSource
+from session_log import new_log_path
 
-ser = serial.Serial('COM3', 9600)
+# Матрица герконов управляет тем же приложением, что и цифровой блок:
+# ячейки с устройства попадают в общую очередь событий BrailleApp
+parser = argparse.ArgumentParser()
+parser.add_argument("--port", help="последовательный порт (по умолчанию ищется автоматически)")
+parser.add_argument("--mode", choices=["free", "dictation"], default="free")
+parser.add_argument("--debounce", type=int, metavar="MS", help="сколько мс точки должны не меняться (по умолчанию как в прошивке)")
+args = parser.parse_args()
 
-while True:
-    try:
-        line = ser.readline().decode('utf-8').strip()
-        number = int(line)
-        if number != 0:
-            letters[number].play_sound()
-        else:
-            print(number)
-    except ValueError:
-        print("Ошибка преобразования")
-    except KeyboardInterrupt:
-        print("Прерывание программы")
-        break
-ser.close()
+try:
+    app = BrailleApp(mode=args.mode, sources=[SerialSource(args.port, args.debounce)], record_path=new_log_path())
+except InputSourceError as e:
+    sys.exit(str(e))
+app.run()
@@ -0,0 +1,208 @@
+import json
+import mmap
+import os
+import struct
+import pygame
+from asset_cache import resource_path
+
+# Собранный файл с ресурсами: заголовок-индекс и уже декодированные данные
+BUNDLE_FILE = 'assets.bundle'
+BUNDLE_MAGIC = b'BRLBNDL1'
+BUNDLE_VERSION = 4
+# Из чего собирается бандл: (папка, расширение файлов)
+SOURCES = [('images', '.png'), ('sounds', '.ogg'), (os.path.join('sounds', 'words'), '.ogg')]
+ALIGN = 16
+
+
+def bundle_key(relative_path):
+    """Ключ ресурса в индексе: относительный путь с прямыми слэшами."""
+    return relative_path.replace(os.sep, '/')
+
+
+def source_files():
+    """Исходные файлы бандла: {ключ: [время изменения в нс, размер]}."""
+    files = {}
+    for folder, extension in SOURCES:
+        folder_path = resource_path(folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in sorted(os.listdir(folder_path)):
+            if name.endswith(extension):
+                stat = os.stat(os.path.join(folder_path, name))
+                files[bundle_key(os.path.join(folder, name))] = [stat.st_mtime_ns, stat.st_size]
+    return files
+
+
+class AssetBundle:
+    """Бандл ресурсов, отображённый в память: звуки и картинки создаются без декодирования.
+
+    Картинка ссылается прямо на страницы файла, а PCM звука копируется в Sound (pygame
+    не умеет играть из чужого буфера); копия делается один раз и живёт в кэше asset_cache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError(f"{path}: неизвестный формат бандла")
+        (header_len,) = struct.unpack_from('<I', self._mm, len(BUNDLE_MAGIC))
+        header_start = len(BUNDLE_MAGIC) + 4
+        header = json.loads(self._mm[header_start:header_start + header_len].decode('utf-8'))
+        if header['version'] != BUNDLE_VERSION:
+            raise ValueError(f"{path}: версия бандла {header['version']} не поддерживается")
+        # Смещения в индексе отсчитываются от начала выровненной области данных
+        data_start = header_start + header_len
+        self._data_start = data_start + (-data_start % ALIGN)
+        self._view = memoryview(self._mm)
+        self.mixer = tuple(header['mixer'])
+        self.entries = header['entries']
+        self.letters = {int(code): tuple(paths) for code, paths in header['letters'].items()}
+        self.words = header['words']
+        self.sources = header['sources']
+
+    def is_stale(self):
+        """Бандл устарел, если исходный файл изменён, удалён или добавлен после сборки."""
+        return source_files() != self.sources
+
+    def close(self):
+        self._view.release()
+        self._mm.close()
+
+    def __contains__(self, relative_path):
+        return bundle_key(relative_path) in self.entries
+
+    def _data(self, entry):
+        start = self._data_start + entry['offset']
+        return self._view[start:start + entry['length']]
+
+    def sound(self, relative_path):
+        # PCM в бандле подготовлен под конкретные настройки микшера
+        if pygame.mixer.get_init() != self.mixer:
+            return None
+        entry = self.entries.get(bundle_key(relative_path))
+        if not entry or entry['kind'] != 'sound':
+            return None
+        return pygame.mixer.Sound(buffer=self._data(entry))
+
+    def image(self, relative_path):
+        entry = self.entries.get(bundle_key(relative_path))
+        if not entry or entry['kind'] != 'image':
+            return None
+        # Поверхность ссылается прямо на страницы отображённого файла
+        return pygame.image.frombuffer(self._data(entry), tuple(entry['size']), 'RGBA')
+
+
+def is_stale(bundle_path=None):
+    """Бандл устарел, если его нет или изменился хотя бы один файл из его индекса."""
+    bundle_path = bundle_path or resource_path(BUNDLE_FILE)
+    try:
+        bundle = AssetBundle(bundle_path)
+    except (ValueError, KeyError, OSError):
+        return True
+    try:
+        return bundle.is_stale()
+    finally:
+        bundle.close()
+
+
+def open_bundle(bundle_path=None):
+    """Открывает бандл, если он есть и актуален; иначе возвращает None."""
+    bundle_path = bundle_path or resource_path(BUNDLE_FILE)
+    if not os.path.exists(bundle_path):
+        return None
+    try:
+        bundle = AssetBundle(bundle_path)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Ошибка чтения бандла {bundle_path}: {e}")
+        return None
+    # Сравниваются время изменения и размер каждого файла: правка файла на месте
+    # не меняет время изменения папки
+    if bundle.is_stale():
+        bundle.close()
+        return None
+    return bundle
+
+
+def build_bundle(output_path=None, package=None):
+    """Собирает images/, sounds/ и sounds/words/ в один индексированный файл.
+
+    Индекс букв и слов строится по программе package (по умолчанию — текущей).
+    """
+    import curriculum_package
+    package = package or curriculum_package.get_active()
+
+    output_path = output_path or resource_path(BUNDLE_FILE)
+    # Состояние файлов снимается до чтения: файл, изменённый во время сборки, сделает бандл устаревшим
+    sources = source_files()
+    entries = {}
+    chunks = []
+    offset = 0
+
+    def add(relative_path, kind, data, **extra):
+        nonlocal offset
+        padding = -offset % ALIGN
+        chunks.append(b'\0' * padding)
+        offset += padding
+        entries[bundle_key(relative_path)] = dict(kind=kind, offset=offset, length=len(data), **extra)
+        chunks.append(data)
+        offset += len(data)
+
+    for relative_path in sources:
+        if relative_path.endswith('.png'):
+            surface = pygame.image.load(resource_path(relative_path))
+            add(relative_path, 'image', pygame.image.tobytes(surface, 'RGBA'), size=list(surface.get_size()))
+        else:
+            add(relative_path, 'sound', pygame.mixer.Sound(resource_path(relative_path)).get_raw())
+
+    # Индекс по ячейке Брайля и по слову, чтобы при запуске не сканировать папки
+    def indexed(path):
+        return bundle_key(path) if path and bundle_key(path) in entries else None
+
+    letters = {}
+    for info in package.letters.values():
+        cell = sum(1 << (int(dot) - 1) for dot in info['dots'])
+        if indexed(info['sound']):
+            letters[cell] = [indexed(info['image']), indexed(info['sound'])]
+    letters[-1] = [None, indexed(package.retry_sound)]
+
+    # Ключи слов те же, что в программе (curriculum_package.sound_key)
+    words = {word: indexed(path) for word, path in package.word_sounds.items()}
+
+    header = json.dumps({
+        'version': BUNDLE_VERSION,
+        'curriculum': package.name,
+        'mixer': list(pygame.mixer.get_init()),
+        'entries': entries,
+        'letters': letters,
+        'words': words,
+        'sources': sources,
+    }, ensure_ascii=False).encode('utf-8')
+
+    # Данные начинаются с выровненного смещения сразу после заголовка
+    prefix = BUNDLE_MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b'\0' * (-len(prefix) % ALIGN)
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, output_path)
+    return output_path, len(entries)
+
+
+if __name__ == "__main__":
+    # python asset_bundle.py [--curriculum имя]
+    import argparse
+    import curriculum_package
+    from audio_manager import init_mixer
+    parser = argparse.ArgumentParser(description="Сборка бандла ресурсов")
+    parser.add_argument("--curriculum", metavar="NAME", help="программа, для которой индексируются буквы и слова")
+    args = parser.parse_args()
+    # Те же настройки микшера, что и у программы, иначе PCM из бандла не подойдёт
+    init_mixer()
+    pygame.init()
+    package = curriculum_package.load_package(args.curriculum) if args.curriculum else None
+    path, count = build_bundle(package=package)
+    print(f"Бандл собран: {path} ({count} ресурсов, {os.path.getsize(path) // 1024} КБ)")
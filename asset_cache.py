@@ -0,0 +1,185 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+import pygame
+from tracing import tracer
+
+# Бюджет памяти для декодированных звуков и картинок (в мегабайтах)
+CACHE_BUDGET_MB = int(os.environ.get("BRAILLE_CACHE_MB", "32"))
+
+# Функция для получения корректного пути к ресурсам
+def resource_path(relative_path):
+    """Возвращает корректный путь для ресурсов, учитывая режим разработки и сборки."""
+    if getattr(sys, 'frozen', False):  # Если приложение собрано в exe
+        base_dir = sys._MEIPASS  # Используем временную папку, созданную PyInstaller
+    else:  # Если приложение запущено как скрипт
+        base_dir = os.path.dirname(os.path.abspath(__file__))  # Используем текущую директорию
+    return os.path.join(base_dir, relative_path)
+
+
+def asset_size(asset):
+    """Оценивает, сколько памяти занимает загруженный ресурс (в байтах)."""
+    if isinstance(asset, pygame.Surface):
+        return asset.get_width() * asset.get_height() * asset.get_bytesize()
+    if isinstance(asset, pygame.mixer.Sound):
+        mixer = pygame.mixer.get_init()
+        if mixer:
+            freq, fmt, channels = mixer
+            return int(asset.get_length() * freq * channels * (abs(fmt) // 8))
+    return 0
+
+
+class LRUCache:
+    """Кэш ресурсов с ограничением по памяти: при переполнении вытесняются давно не использованные."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, loader):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key][0]
+
+        # Загружаем вне блокировки, чтобы фоновая подгрузка не тормозила основной поток
+        with tracer.span("asset.load"):
+            asset = loader()
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key][0]
+            size = asset_size(asset)
+            self._items[key] = (asset, size)
+            self.size += size
+            self._evict()
+        return asset
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def set_budget(self, budget_bytes):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def _evict(self):
+        # Последний добавленный элемент не вытесняем, даже если он один больше бюджета
+        while self.size > self.budget_bytes and len(self._items) > 1:
+            _, (_, size) = self._items.popitem(last=False)
+            self.size -= size
+
+
+cache = LRUCache(CACHE_BUDGET_MB * 1024 * 1024)
+
+
+# Собранный бандл ресурсов (см. asset_bundle.py); если его нет, читаем исходные файлы
+bundle = None
+
+
+def use_bundle(asset_bundle):
+    global bundle
+    bundle = asset_bundle
+    cache.clear()
+
+
+def _decode_sound(relative_path):
+    sound = bundle.sound(relative_path) if bundle else None
+    if sound is None:
+        sound = pygame.mixer.Sound(resource_path(relative_path))
+    return sound
+
+
+def _decode_image(relative_path):
+    image = bundle.image(relative_path) if bundle else None
+    if image is None:
+        image = pygame.image.load(resource_path(relative_path))
+    return image
+
+
+def load_sound(relative_path):
+    return cache.get(("sound", relative_path), lambda: _decode_sound(relative_path))
+
+
+def load_image(relative_path):
+    return cache.get(("image", relative_path), lambda: _decode_image(relative_path))
+
+
+def prefetch(loader, paths):
+    """Подгружает ресурсы в кэш в фоновом потоке, не блокируя главный цикл."""
+    paths = [path for path in paths if path]
+    if not paths:
+        return None
+
+    def worker():
+        for path in paths:
+            try:
+                loader(path)
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Ошибка предзагрузки {path}: {e}")
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+
+class LazyAssetMap(Mapping):
+    """Словарь ресурсов, который загружает значение при первом обращении к ключу."""
+
+    def __init__(self, paths, loader, key=None):
+        self._paths = paths  # ключ -> относительный путь (или None, если ресурса нет)
+        self._loader = loader
+        self._key = key or (lambda key: key)  # приведение ключа при поиске (как в paths)
+
+    def __getitem__(self, key):
+        path = self._paths[self._key(key)]
+        return self._loader(path) if path else None
+
+    def __contains__(self, key):
+        return self._key(key) in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def path(self, key):
+        return self._paths.get(self._key(key))
+
+    def set_paths(self, paths):
+        self._paths = paths
+
+    def prefetch(self, keys):
+        return prefetch(self._loader, [self._paths.get(self._key(key)) for key in keys])
+
+
+class LazySoundList(Sequence):
+    """Список звуков, которые декодируются только при первом обращении."""
+
+    def __init__(self, paths):
+        self._paths = list(paths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [load_sound(path) for path in self._paths[index]]
+        return load_sound(self._paths[index])
+
+    def __len__(self):
+        return len(self._paths)
+
+    def set_paths(self, paths):
+        self._paths = list(paths)
+
+    def prefetch(self):
+        return prefetch(load_sound, self._paths)
@@ -0,0 +1,156 @@
+import os
+from collections import deque
+import pygame
+
+# Размер буфера микшера в сэмплах: меньше буфер — меньше задержка до звука
+MIXER_BUFFER = int(os.environ.get("BRAILLE_AUDIO_BUFFER", "512"))
+NUM_CHANNELS = 16
+
+# Категории звуков: (сколько каналов зарезервировано, приоритет, что делать, если каналы заняты)
+#   preempt — новый звук прерывает самый старый в категории (отклик на нажатие не ждёт)
+#   queue   — звук ждёт своей очереди и не звучит поверх более важных
+CATEGORIES = {
+    "letters": (2, 1, "preempt"),
+    "speech": (1, 2, "preempt"),
+    "words": (1, 2, "queue"),
+    "prompts": (1, 3, "queue"),
+    "feedback": (1, 4, "preempt"),
+}
+
+# Подсказки "неправильно" и "правильно" (dictionaries.prompt_files) — это отклик на ответ
+FEEDBACK_PROMPTS = {4, 5}
+
+# Событие pygame: на зарезервированном канале закончился звук, можно запускать очередь
+AUDIO_DONE = pygame.event.custom_type()
+
+
+def init_mixer(buffer=MIXER_BUFFER):
+    """Инициализирует микшер с маленьким буфером; вызывать до pygame.init()."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.pre_init(buffer=buffer)
+        pygame.mixer.init()
+
+
+def sound_category(key):
+    """Категория звука по ключу resources.get_sound."""
+    kind = key[0]
+    if kind == "prompt":
+        return "feedback" if key[1] in FEEDBACK_PROMPTS else "prompts"
+    if kind == "letter":
+        return "letters"
+    return "words"
+
+
+_reserved = 0  # сколько каналов зарезервировано всеми менеджерами процесса
+
+
+def reserved_channels(categories=CATEGORIES):
+    """Сколько каналов микшера занимает один AudioManager."""
+    return sum(count for count, _, _ in categories.values())
+
+
+class AudioManager:
+    """Пул каналов микшера с приоритетами.
+
+    У каждой категории свои каналы, поэтому быстрый набор не занимает каналы
+    подсказок. Звук категории с более высоким приоритетом останавливает звуки
+    менее важных категорий, а звуки с политикой queue ждут, пока более важные доиграют.
+    first_channel — с какого канала начинаются каналы этого менеджера: у нескольких
+    менеджеров (станции на сервере класса) каналы не пересекаются.
+    """
+
+    def __init__(self, categories=CATEGORIES, num_channels=NUM_CHANNELS, first_channel=0):
+        global _reserved
+        _reserved = max(_reserved, first_channel + reserved_channels(categories))
+        pygame.mixer.set_num_channels(max(num_channels, _reserved + 1, pygame.mixer.get_num_channels()))
+        # Обычный Sound.play() берёт только незарезервированные каналы
+        pygame.mixer.set_reserved(_reserved)
+        self.priority = {}
+        self.policy = {}
+        self.channels = {}
+        self.started = {}  # канал -> порядковый номер запуска, чтобы прерывать самый старый
+        self.queues = {}
+        self._starts = 0
+        index = first_channel
+        for name, (count, priority, policy) in categories.items():
+            self.priority[name] = priority
+            self.policy[name] = policy
+            self.channels[name] = [pygame.mixer.Channel(i) for i in range(index, index + count)]
+            self.queues[name] = deque()
+            for channel in self.channels[name]:
+                channel.set_endevent(AUDIO_DONE)
+            index += count
+
+    def play(self, sound, category="words"):
+        """Проигрывает звук в своей категории; возвращает канал или None, если звук ждёт в очереди."""
+        if sound is None:
+            return None
+        if self.policy[category] == "queue" and (self.queues[category] or self._blocked(category)):
+            self.queues[category].append(sound)
+            return None
+        channel = self._free_channel(category)
+        if channel is None:
+            if self.policy[category] == "queue":
+                self.queues[category].append(sound)
+                return None
+            channel = min(self.channels[category], key=lambda c: self.started.get(c, 0))
+        return self._start(channel, sound, category)
+
+    def _blocked(self, category):
+        priority = self.priority[category]
+        return any(self.is_busy(name) for name, other in self.priority.items() if other > priority)
+
+    def _free_channel(self, category):
+        for channel in self.channels[category]:
+            if not channel.get_busy():
+                return channel
+        return None
+
+    def _start(self, channel, sound, category):
+        # Более важный звук заглушает менее важные
+        priority = self.priority[category]
+        for name, other in self.priority.items():
+            if other < priority:
+                for lower in self.channels[name]:
+                    lower.stop()
+        self._starts += 1
+        self.started[channel] = self._starts
+        channel.play(sound)
+        return channel
+
+    def is_busy(self, category=None):
+        names = [category] if category else self.channels
+        return any(channel.get_busy() for name in names for channel in self.channels[name])
+
+    def update(self):
+        """Запускает ожидающие звуки, когда освободились каналы (на каждом кадре или по AUDIO_DONE)."""
+        for name in sorted(self.queues, key=self.priority.get, reverse=True):
+            queue = self.queues[name]
+            while queue and not self._blocked(name):
+                channel = self._free_channel(name)
+                if channel is None:
+                    break
+                self._start(channel, queue.popleft(), name)
+
+    def clear_queues(self):
+        for queue in self.queues.values():
+            queue.clear()
+
+    def stop(self, category=None):
+        """Останавливает звуки (всех категорий или одной) и очищает их очереди."""
+        for name in [category] if category else self.channels:
+            self.queues[name].clear()
+            for channel in self.channels[name]:
+                channel.stop()
+
+
+_audio = None
+
+
+def get_audio():
+    """Общий менеджер звука процесса (создаётся при первом обращении)."""
+    global _audio
+    if _audio is None:
+        init_mixer()
+        _audio = AudioManager()
+    return _audio
@@ -0,0 +1,72 @@
+from collections import deque
+import pygame
+
+
+class AudioTimeline:
+    """Очередь звуков с паузами, которая проигрывается из главного цикла без блокировок.
+
+    Каждый шаг выполняется через delay миллисекунд после предыдущего, а
+    update() вызывается на каждом кадре, поэтому ввод обрабатывается и во
+    время подсказок.
+    """
+
+    def __init__(self, audio=None):
+        self._steps = deque()
+        self._last_time = 0
+        self.audio = audio  # AudioManager; без него звуки играют на любом свободном канале
+
+    def _push(self, delay, action):
+        if not self._steps:
+            # Пустая очередь: отсчёт паузы начинается с момента добавления
+            self._last_time = pygame.time.get_ticks()
+        self._steps.append((delay, action))
+
+    def play(self, sound, delay=0, category="prompts"):
+        """Проигрывает звук через delay мс после предыдущего шага."""
+        def action():
+            if sound is None:
+                print("Предупреждение: звук не найден, шаг пропущен")
+            elif self.audio:
+                self.audio.play(sound, category)
+            else:
+                sound.play()
+        self._push(delay, action)
+
+    def call(self, callback, delay=0):
+        """Вызывает функцию через delay мс после предыдущего шага."""
+        self._push(delay, callback)
+
+    def wait(self, delay):
+        """Добавляет паузу перед следующим шагом."""
+        self._push(delay, lambda: None)
+
+    def clear(self):
+        """Отменяет все запланированные шаги (уже звучащие звуки не прерываются)."""
+        self._steps.clear()
+
+    def stop(self):
+        """Отменяет запланированные шаги и останавливает все звуки."""
+        self.clear()
+        if self.audio:
+            self.audio.stop()
+        pygame.mixer.stop()
+
+    def is_busy(self):
+        return bool(self._steps)
+
+    def time_until_next(self, now=None):
+        """Сколько миллисекунд осталось до следующего шага (None, если очередь пуста)."""
+        if not self._steps:
+            return None
+        now = pygame.time.get_ticks() if now is None else now
+        return max(0, self._last_time + self._steps[0][0] - now)
+
+    def update(self, now=None):
+        now = pygame.time.get_ticks() if now is None else now
+        while self._steps:
+            delay, action = self._steps[0]
+            if now - self._last_time < delay:
+                break
+            self._steps.popleft()
+            self._last_time = now
+            action()
@@ -0,0 +1,9 @@
+"""Замеры производительности тренажёра: python -m benchmarks [--only ...] [--output файл.json].
+
+Все замеры идут без окна и звука (драйверы SDL dummy) и не трогают настоящую
+базу учеников: хранилища создаются во временной папке.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
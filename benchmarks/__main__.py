@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+from benchmarks import keystrokes, startup, storage, translate, words
+from benchmarks.common import environment, load_results
+
+BENCHMARKS = {
+    "startup": startup.run,
+    "keystrokes": keystrokes.run,
+    "words": words.run,
+    "storage": storage.run,
+    "translate": translate.run,
+}
+
+
+def medians(results, prefix=""):
+    """Плоский словарь {путь: медиана} для сравнения двух прогонов."""
+    found = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            if "median" in value:
+                found[prefix + key] = value["median"]
+            else:
+                found.update(medians(value, f"{prefix}{key}."))
+    return found
+
+
+def compare(old, new):
+    old_medians, new_medians = medians(old["results"]), medians(new["results"])
+    print(f"Сравнение с {old['environment'].get('commit') or 'предыдущим прогоном'}:", file=sys.stderr)
+    for name, value in new_medians.items():
+        if name in old_medians and old_medians[name]:
+            ratio = value / old_medians[name]
+            print(f"  {name:<45} {old_medians[name]:.6f} -> {value:.6f}  x{ratio:.2f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Замеры производительности тренажёра")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="какие замеры запускать")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="без базы на 100 000 учеников")
+    parser.add_argument("--output", help="записать результаты в JSON-файл (иначе — в stdout)")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с результатами прошлого прогона")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"{name}...", file=sys.stderr)
+        results[name] = BENCHMARKS[name](args)
+    report = {"environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.compare:
+        compare(load_results(args.compare), report)
+
+
+if __name__ == "__main__":
+    main()
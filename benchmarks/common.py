@@ -0,0 +1,62 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timings(func, repeat=5, number=1):
+    """Время одного вызова func (с): медиана, минимум и максимум по repeat замерам."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return summarize(samples)
+
+
+def summarize(samples):
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples), "runs": len(samples)}
+
+
+def run_python(code, repeat=5):
+    """Запускает код в новом интерпретаторе и возвращает число, которое он напечатал последним.
+
+    Новый процесс нужен, чтобы измерять холодный импорт и запуск, а не уже загруженные модули.
+    Рабочая папка — временная, поэтому база учеников создаётся там, а не в репозитории.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            samples.append(float(output.split()[-1]))
+    return summarize(samples)
+
+
+def environment():
+    import platform
+    import pygame
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,45 @@
+"""Стоимость обработки одного нажатия: только движок и движок вместе с фронтендом."""
+import os
+import tempfile
+from benchmarks.common import timings
+from benchmarks.synthetic import typing_events
+from braille_engine import BrailleEngine
+from progress_store import SqliteProgressStore
+
+
+def run(args):
+    events = typing_events()
+    engine = BrailleEngine(SqliteProgressStore(":memory:"))
+
+    def engine_only():
+        for event in events:
+            engine.handle(event)
+
+    results = {"events": len(events)}
+    stats = timings(engine_only, args.repeat)
+    results["engine_per_key_s"] = {key: value / len(events) if key != "runs" else value
+                                   for key, value in stats.items()}
+
+    # Фронтенд создаёт базу в текущей папке, поэтому переходим во временную
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            from BrailleAppAdaptive import BrailleApp
+            app = BrailleApp()
+            app.clear_win()
+            app.present()
+
+            def app_keys():
+                for event in events:
+                    app.handle_input(event)
+                    app.timeline.update()
+                    app.present()
+
+            stats = timings(app_keys, args.repeat)
+            results["app_per_key_s"] = {key: value / len(events) if key != "runs" else value
+                                        for key, value in stats.items()}
+            app.store.close()
+        finally:
+            os.chdir(cwd)
+    return results
@@ -0,0 +1,28 @@
+"""Холодный импорт модулей и время до первого кадра BrailleApp (в отдельных процессах)."""
+from benchmarks.common import run_python
+
+IMPORT_CODE = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+FIRST_FRAME_CODE = """
+import time
+started = time.perf_counter()
+from BrailleAppAdaptive import BrailleApp
+app = BrailleApp()
+app.clear_win()
+app.execute(app.engine.start())
+app.present()
+print(time.perf_counter() - started)
+"""
+
+
+def run(args):
+    return {
+        "import_dictionaries_s": run_python(IMPORT_CODE.format(module="dictionaries"), args.repeat),
+        "import_resources_s": run_python(IMPORT_CODE.format(module="resources"), args.repeat),
+        "first_frame_s": run_python(FIRST_FRAME_CODE, args.repeat),
+    }
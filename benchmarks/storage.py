@@ -0,0 +1,41 @@
+"""Стоимость сохранения одного ответа в зависимости от размера базы, для всех хранилищ."""
+import os
+import tempfile
+from benchmarks.common import timings
+from benchmarks.synthetic import synthetic_students
+from progress_store import JsonProgressStore, JournalProgressStore, SqliteProgressStore
+
+SIZES = [10, 100, 1000, 10000, 100000]
+QUICK_SIZES = [10, 100, 1000, 10000]
+TODAY = "01-06-2025"
+
+
+def open_backend(backend, workdir):
+    if backend == "json":
+        return JsonProgressStore(os.path.join(workdir, "db.json"), os.path.join(workdir, "memory.json"))
+    if backend == "journal":
+        return JournalProgressStore(os.path.join(workdir, "db.json"), os.path.join(workdir, "db.journal"),
+                                    os.path.join(workdir, "memory.json"))
+    return SqliteProgressStore(os.path.join(workdir, "db.sqlite3"))
+
+
+def answer_cost(backend, size, repeat):
+    with tempfile.TemporaryDirectory() as workdir:
+        store = open_backend(backend, workdir)
+        store.import_data(synthetic_students(size))
+        counter = iter(range(10 ** 9))
+
+        def save_answer():
+            # Ответ с ошибкой: самый дорогой путь; flush — как в конце диктанта
+            store.record_answer("student000000", TODAY, "У", "ус", False, f"у{next(counter)}")
+            store.flush()
+
+        stats = timings(save_answer, repeat)
+        store.close()
+    return stats
+
+
+def run(args):
+    sizes = QUICK_SIZES if args.quick else SIZES
+    return {backend: {str(size): answer_cost(backend, size, args.repeat) for size in sizes}
+            for backend in ("json", "journal", "sqlite")}
@@ -0,0 +1,36 @@
+"""Генераторы синтетических данных для замеров."""
+import datetime
+import random
+from dictionaries import dictations
+from headless import word_events
+from progress_store import DATE_FORMAT, START_GRADE
+
+
+def synthetic_students(count, days=5, seed=0):
+    """База в формате students_db.json: count учеников, у каждого days дней диктантов."""
+    rng = random.Random(seed)
+    stages = list(dictations)
+    start = datetime.date(2024, 9, 1)
+    data = {}
+    for i in range(count):
+        history = {}
+        for day in range(days):
+            date = (start + datetime.timedelta(days=day * 3 + rng.randrange(3))).strftime(DATE_FORMAT)
+            stage = stages[min(day, len(stages) - 1)]
+            mistakes = rng.sample(dictations[stage], rng.randrange(3))
+            history[date] = {stage: {"errors": len(mistakes), "mistakes": mistakes,
+                                     "grade": START_GRADE - len(mistakes)}}
+        data[f"student{i:06d}"] = history
+    return data
+
+
+def typing_events(words=20, seed=0):
+    """Нажатия, которыми набирают слова в свободном режиме: точки, "+", проговорить слово, очистить."""
+    rng = random.Random(seed)
+    vocabulary = [word.lower() for words in dictations.values() for word in words]
+    events = []
+    for word in rng.sample(vocabulary, words):
+        events.extend(word_events(word))
+        events.append(("phrase",))
+        events.append(("clear",))
+    return events
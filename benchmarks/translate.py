@@ -0,0 +1,22 @@
+"""Скорость перевода текста в Брайль и обратно (МБ текста в секунду)."""
+from benchmarks.common import timings
+from braille_translate import Translator, load_table, read_table
+
+SAMPLE = "Съешь же ещё этих мягких французских булок, да выпей чаю. В 2024 году — 366 дней! "
+SIZE = 1_000_000
+
+
+def run(args):
+    text = SAMPLE * (SIZE // len(SAMPLE.encode("utf-8")))
+    megabytes = len(text.encode("utf-8")) / 1e6
+    translator = load_table()
+    cells = translator.forward(text)
+    forward = timings(lambda: translator.forward(text), args.repeat)
+    backward = timings(lambda: translator.backward(cells), args.repeat)
+    return {
+        "compile_s": timings(lambda: Translator(read_table("ru_grade1")), args.repeat, number=10),
+        "forward_s": forward,
+        "backward_s": backward,
+        "forward_mb_per_s": megabytes / forward["median"],
+        "backward_mb_per_s": megabytes / backward["median"],
+    }
@@ -0,0 +1,33 @@
+"""Скорость подбора слов для диктанта: новый ученик и ученик с историей повторений."""
+import random
+from benchmarks.common import timings
+from braille_engine import BrailleEngine
+from dictation_module import DictationModule
+from dictionaries import letters_for_dictations
+from headless import simulate_session
+from progress_store import SqliteProgressStore
+
+
+def selection_rate(module, repeat):
+    def select_all():
+        for stage in letters_for_dictations:
+            module.get_words_for_dictation(stage)
+            module.words_history.clear()
+
+    stats = timings(select_all, repeat, number=10)
+    return {key: value / len(letters_for_dictations) if key != "runs" else value
+            for key, value in stats.items()}
+
+
+def run(args):
+    store = SqliteProgressStore(":memory:")
+    results = {"new_student_per_call_s": selection_rate(DictationModule("new", BrailleEngine(store)), args.repeat)}
+
+    # Ученик, прошедший несколько диктантов: у планировщика повторений есть состояние
+    rng = random.Random(0)
+    for _ in range(3):
+        simulate_session(BrailleEngine(store), "experienced", 0.2, rng)
+    module = DictationModule("experienced", BrailleEngine(store))
+    results["experienced_per_call_s"] = selection_rate(module, args.repeat)
+    results["scheduled_words"] = len(module.scheduler.states)
+    return results
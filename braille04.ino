@@ -1,7 +1,22 @@
 const byte pinCount = 6;
 const byte pins[pinCount] = {2, 3, 4, 5, 6, 7};
-boolean states[pinCount];
-unsigned long result;
+// Сколько миллисекунд состояние должно не меняться, чтобы считаться устойчивым
+const unsigned long debounceMs = 5;
+
+byte lastRaw = 0;
+byte sent = 0;
+unsigned long changedAt = 0;
+
+byte readCell() {
+  // Ячейка — один байт: бит i — точка i + 1
+  byte cell = 0;
+  for (byte i = 0; i < pinCount; i++) {
+    if (digitalRead(pins[i]) == HIGH) {
+      cell |= 1 << i;
+    }
+  }
+  return cell;
+}
 
 void setup() {
   Serial.begin(9600);
@@ -11,15 +26,17 @@ void setup() {
 }
 
 void loop() {
-  result = 0;
-  unsigned long multiplier = 1;
+  byte raw = readCell();
+  unsigned long now = millis();
 
-  for (byte i = 0; i < pinCount; i++) {
-    states[i] = digitalRead(pins[i]) == HIGH;
-    result += states[i] * multiplier;
-    multiplier *= 10;
+  if (raw != lastRaw) {
+    lastRaw = raw;
+    changedAt = now;
   }
 
-  Serial.println(result);
-  delay(2000);
+  // Отправляем состояние сразу, как только оно устоялось и отличается от отправленного
+  if (raw != sent && now - changedAt >= debounceMs) {
+    Serial.write(raw);
+    sent = raw;
+  }
 }
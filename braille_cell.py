@@ -0,0 +1,94 @@
+from dictionaries import letter_code_map
+
+# Ячейка Брайля — число, в котором бит i означает поднятую точку i + 1.
+# Тот же порядок битов у символов Unicode U+2800..U+28FF.
+DOT_BITS = [1 << i for i in range(8)]
+CELL_COUNT = 64            # шеститочечный Брайль
+COMPUTER_CELL_COUNT = 256  # восьмиточечный (компьютерный) Брайль
+UNICODE_BASE = 0x2800
+
+
+def cell_from_dots(*dots):
+    """Ячейка из номеров точек: cell_from_dots(1, 2) — буква "б"."""
+    cell = 0
+    for dot in dots:
+        cell |= DOT_BITS[dot - 1]
+    return cell
+
+
+def cell_dots(cell):
+    """Номера поднятых точек ячейки."""
+    return [i + 1 for i in range(8) if cell & DOT_BITS[i]]
+
+
+def from_legacy(code):
+    """Старый десятичный код (111010 для "в") в ячейку; None, если код некорректен."""
+    if code < 0:
+        return None
+    cell = 0
+    for i in range(8):
+        code, digit = divmod(code, 10)
+        if digit > 1:
+            return None  # одна точка нажата дважды — такого кода не бывает
+        cell |= digit << i
+    return cell if code == 0 else None
+
+
+def to_legacy(cell):
+    """Ячейка в старый десятичный код."""
+    return sum(10 ** i for i in range(8) if cell & DOT_BITS[i])
+
+
+def to_unicode(cell):
+    return chr(UNICODE_BASE + cell)
+
+
+def from_unicode(char):
+    code = ord(char) - UNICODE_BASE
+    return code if 0 <= code < COMPUTER_CELL_COUNT else None
+
+
+# Таблицы на все 256 ячеек: поиск по индексу вместо словаря на каждое нажатие
+LETTER_TO_CELL = {name: from_legacy(code) for name, code in letter_code_map.items()}
+CELL_TO_LETTER = [None] * COMPUTER_CELL_COUNT
+CELL_TO_SYMBOL = ['?'] * COMPUTER_CELL_COUNT
+for _name, _cell in LETTER_TO_CELL.items():
+    CELL_TO_LETTER[_cell] = _name
+    CELL_TO_SYMBOL[_cell] = ' ' if _name == 'пробел' else _name.upper()
+SYMBOL_TO_CELL = {symbol: cell for cell, symbol in enumerate(CELL_TO_SYMBOL) if symbol != '?'}
+SYMBOL_TO_CELL.update({symbol.lower(): cell for symbol, cell in list(SYMBOL_TO_CELL.items())})
+
+
+def confusions(expected, typed):
+    """Пары (ожидаемая ячейка, набранная ячейка) по выравниванию слов.
+
+    Пропущенная буква даёт набранную ячейку 0, лишняя — ожидаемую 0.
+    """
+    expected, typed = expected.lower(), (typed or "").lower()
+    n, m = len(expected), len(typed)
+    # Расстояние Левенштейна с обратным ходом
+    dist = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        dist[i][0] = i
+    for j in range(m + 1):
+        dist[0][j] = j
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            dist[i][j] = min(dist[i - 1][j] + 1, dist[i][j - 1] + 1,
+                             dist[i - 1][j - 1] + (expected[i - 1] != typed[j - 1]))
+
+    pairs = []
+    i, j = n, m
+    while i or j:
+        if i and j and dist[i][j] == dist[i - 1][j - 1] + (expected[i - 1] != typed[j - 1]):
+            if expected[i - 1] != typed[j - 1]:
+                pairs.append((SYMBOL_TO_CELL.get(expected[i - 1], 0), SYMBOL_TO_CELL.get(typed[j - 1], 0)))
+            i, j = i - 1, j - 1
+        elif i and dist[i][j] == dist[i - 1][j] + 1:
+            pairs.append((SYMBOL_TO_CELL.get(expected[i - 1], 0), 0))
+            i -= 1
+        else:
+            pairs.append((0, SYMBOL_TO_CELL.get(typed[j - 1], 0)))
+            j -= 1
+    pairs.reverse()
+    return pairs
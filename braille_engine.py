@@ -0,0 +1,220 @@
+import datetime
+import random
+from collections import namedtuple
+from word_index import word_index
+from braille_cell import DOT_BITS, CELL_TO_LETTER, CELL_TO_SYMBOL, COMPUTER_CELL_COUNT, to_unicode
+from braille_translate import load_table
+from progress_store import DATE_FORMAT
+
+# Команда для фронтенда: kind — что сделать, arg — с чем, delay — пауза в очереди звуков (мс).
+#   play          — сразу проиграть звук arg (ключ вида ("letter", ячейка))
+#   schedule      — поставить звук arg в очередь через delay мс после предыдущего
+#   wait          — пауза delay мс в очереди звуков
+#   cancel_audio  — убрать из очереди ещё не прозвучавшие звуки
+#   stop_audio    — очистить очередь и заглушить всё, что звучит (включая речь)
+#   speak         — произнести синтезатором речи: arg = (текст, скорость)
+#   prefetch      — заранее подгрузить звуки слов arg
+#   answer        — ответ ученика в диктанте: arg = (слово, набранное); для журнала сессии
+#   student       — состояние ученика перед диктантом (student_snapshot); для журнала сессии
+#   hint          — подсказка под словом: продолжения, "может быть, ..." или вид ошибки (None — убрать)
+#   dot / clear_dots / glyph / clear / id_prompt / print — изменения на экране
+Command = namedtuple("Command", ["kind", "arg", "delay"], defaults=[None, 0])
+
+# Входные события: (вид, значение)
+#   ("dot", 0..5)  — нажата точка        ("cell", ячейка) — ячейка целиком (с устройства)
+#   ("letter",)    — озвучить набранную букву
+#   ("commit",)    — добавить букву в слово
+#   ("phrase",)    — озвучить слово      ("submit",) — отправить слово на проверку
+#   ("clear",)     — очистить всё        ("mode",) — переключить режим
+#   ("id_char", символ) / ("id_backspace",) / ("id_enter",) — ввод кода ученика
+# Только при этих событиях движок обращается к хранилищу прогресса
+STORE_EVENTS = {"id_enter", "submit"}
+
+
+class BrailleEngine:
+    """Логика тренажёра без pygame: события на входе, команды для фронтенда на выходе."""
+
+    def __init__(self, store, mode="free", today=None, tts_rate=150, seed=None):
+        self.store = store
+        self.today = today or datetime.date.today().strftime(DATE_FORMAT)
+        # Свой генератор случайных чисел: с тем же seed сессия повторяется при воспроизведении
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.start_mode = mode
+        self.tts_rate = tts_rate
+        self.translator = load_table()
+        self.pin = 0
+        self.word = []  # [(ячейка, символ)]
+        self.node = word_index.root  # узел дерева слов для набранного начала слова
+        self.mode = mode
+        self.student_id = None
+        self.student_data = {}
+        self.dictation_module = None
+        self.waiting_for_student_id = False
+        self.typed_id = ""
+        self._out = []
+
+    def emit(self, kind, arg=None, delay=0):
+        self._out.append(Command(kind, arg, delay))
+
+    def handle(self, event):
+        """Обрабатывает одно входное событие и возвращает список команд."""
+        try:
+            kind = event[0]
+            if self.waiting_for_student_id:
+                self.handle_id_input(event)
+            elif kind == "dot":
+                self.press_dot(event[1])
+            elif kind == "cell":
+                # Ячейка с устройства сразу добавляется в слово; неизвестная — просим набрать заново
+                self.pin = int(event[1])
+                if self.accepts_pin():
+                    self.commit_letter()
+                else:
+                    self.say_letter()
+            elif kind == "letter":
+                self.say_letter()
+            elif kind == "phrase":
+                self.say_phrase()
+            elif kind == "mode":
+                self.switch_mode()
+            elif kind == "commit":
+                self.commit_letter()
+            elif kind == "clear":
+                self.clear_word()
+            elif kind == "submit":
+                self.submit_word()
+        finally:
+            # Недоделанные команды неверного события не должны попасть в ответ на следующее
+            out, self._out = self._out, []
+        return out
+
+    def start(self):
+        """Команды, с которых начинается работа в выбранном режиме."""
+        if self.mode == "dictation":
+            self.mode = "free"
+            self.switch_mode()
+        out, self._out = self._out, []
+        return out
+
+    def session_meta(self):
+        """Всё, что нужно, чтобы воспроизвести сессию тем же движком (заголовок журнала)."""
+        import curriculum_package
+        return {"today": self.today, "seed": self.seed, "mode": self.start_mode,
+                "curriculum": curriculum_package.get_active().name}
+
+    def word_text(self):
+        return "".join(char for _, char in self.word)
+
+    def typed_text(self):
+        """Набранное с учётом знаков цифры, заглавной буквы и препинания."""
+        return self.translator.backward("".join(to_unicode(cell) for cell, _ in self.word))
+
+    def handle_id_input(self, event):
+        kind = event[0]
+        if kind == "id_backspace":
+            self.typed_id = self.typed_id[:-1]
+        elif kind == "id_enter":
+            self.student_id = self.typed_id
+            self.typed_id = ""
+            self.waiting_for_student_id = False
+            self.prompt_student_id()
+        elif kind == "id_char" and event[1].isprintable() and len(event[1]) == 1:
+            self.typed_id += event[1]
+        self.emit("id_prompt")
+
+    def prompt_student_id(self):
+        from dictation_module import DictationModule
+        self.load_student_progress()
+        self.emit("student", self.student_snapshot())
+        self.dictation_module = DictationModule(self.student_id, self)
+        self.dictation_module.next_letter()
+
+    def load_student_progress(self):
+        self.student_data = self.store.student_history(self.student_id)
+
+    def student_snapshot(self):
+        """От чего зависит выбор слов: сегодняшние диктанты ученика и его память о словах."""
+        return {"id": self.student_id,
+                "history": {self.today: self.student_data.get(self.today, {})},
+                "word_states": {word: list(state) for word, state in self.store.word_states(self.student_id).items()}}
+
+    def switch_mode(self):
+        if self.mode == "free":
+            self.mode = "dictation"
+            self.waiting_for_student_id = True
+            self.emit("id_prompt")
+            self.emit("schedule", ("prompt", 7))
+            self.emit("schedule", ("prompt", 9), delay=4000)
+        else:
+            self.mode = "free"
+            self.emit("stop_audio")
+            self.dictation_module = None
+            self.student_id = None
+            self.emit("clear")
+
+    def press_dot(self, idx):
+        # Ячейка — битовая маска, повторное нажатие той же точки ничего не портит
+        self.pin |= DOT_BITS[idx]
+        self.emit("dot", idx)
+
+    def letter_for_pin(self):
+        return CELL_TO_LETTER[self.pin] if 0 <= self.pin < COMPUTER_CELL_COUNT else None
+
+    def accepts_pin(self):
+        # В свободном наборе можно писать текст целиком: цифры, заглавные, знаки препинания
+        return bool(self.letter_for_pin()) or (self.mode == "free" and self.translator.is_sign(self.pin))
+
+    def say_letter(self):
+        if self.letter_for_pin():
+            self.emit("play", ("letter", self.pin))
+        else:
+            self.emit("play", ("letter", -1))
+            self.emit("clear_dots")
+            self.pin = 0
+
+    def say_phrase(self):
+        phrase = self.word_text()
+        if self.node is not None and self.node.word == phrase.lower():
+            self.emit("play", ("word", self.node.word))
+        elif self.letter_for_pin():
+            self.emit("play", ("letter", self.pin))
+        else:
+            self.emit("speak", (phrase, self.tts_rate))
+
+    def update_hint(self):
+        """Продолжения набранного начала слова; в диктанте не показываются, чтобы не подсказывать ответ."""
+        if self.mode != "free":
+            return
+        if self.node is not None:
+            self.emit("hint", ", ".join(word_index.completions(self.node)) or None)
+        else:
+            # Таких слов нет: ищем похожие начала с учётом ошибок в точках
+            suggestions = [word for word, _ in word_index.fuzzy(self.word_text(), prefix=True)]
+            self.emit("hint", "Может быть: " + ", ".join(suggestions) if suggestions else None)
+
+    def commit_letter(self):
+        if self.accepts_pin():
+            self.emit("play", ("letter", self.pin))
+            self.word.append((self.pin, CELL_TO_SYMBOL[self.pin]))
+            self.node = word_index.step(self.node, CELL_TO_SYMBOL[self.pin])
+            # Гасим точки и дорисовываем только новую букву
+            self.emit("clear_dots")
+            self.emit("glyph", self.pin)
+            self.pin = 0
+            self.update_hint()
+
+    def clear_word(self):
+        self.emit("clear")
+        self.emit("hint", None)
+        self.word.clear()
+        self.node = word_index.root
+        self.pin = 0
+
+    def submit_word(self):
+        if self.mode == "free":
+            self.emit("print", self.typed_text())
+        elif self.mode == "dictation" and self.dictation_module:
+            self.dictation_module.check_word(self.word_text().strip().lower())
+            self.word.clear()
+            self.node = word_index.root
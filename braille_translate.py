@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from braille_cell import LETTER_TO_CELL, to_unicode
+from curriculum_package import resource_path
+
+# Таблица перевода — файл braille_tables/<имя>.json:
+#   indicators — знаки цифры, заглавной буквы и буквы после числа (точки)
+#   digits     — цифры (точки; перед числом ставится знак цифры)
+#   letters    — буквы; если их нет, берётся алфавит программы (braille_cell)
+#   rules      — [текст, точки, где]: где = "any" (в любом месте) или "word" (только целым
+#                словом, как сокращения второй ступени); многоклеточные знаки — "36-36"
+#   include    — имена таблиц, правила которых добавляются в конец (например, сокращения
+#                поверх таблицы без сокращений)
+# Если один набор точек описан несколько раз, обратный перевод берёт первое описание.
+TABLES_DIR = "braille_tables"
+TABLE_FORMAT = 1
+DEFAULT_TABLE = "ru_grade1"
+BLANK = to_unicode(0)
+STREAM_CHUNK = 64 * 1024
+
+
+class TableError(ValueError):
+    pass
+
+
+def parse_dots(dots):
+    """"36-36" -> строка символов Брайля Unicode."""
+    cells = ""
+    for cell in dots.split("-"):
+        if not set(cell) <= set("12345678"):
+            raise TableError(f"неверные точки: {dots}")
+        cells += to_unicode(sum(1 << (int(dot) - 1) for dot in cell))
+    return cells
+
+
+def read_table(name):
+    """Читает таблицу и таблицы из include в один словарь."""
+    path = name if os.path.isfile(name) else resource_path(os.path.join(TABLES_DIR, name + ".json"))
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    if table.get("format") != TABLE_FORMAT:
+        raise TableError(f"{path}: неизвестный формат таблицы {table.get('format')}")
+    for included in table.get("include", []):
+        base = read_table(included)
+        for key in ("indicators", "digits", "letters"):
+            if key in base:
+                table[key] = {**base[key], **table.get(key, {})}
+        table["rules"] = table.get("rules", []) + base.get("rules", [])
+    return table
+
+
+def alternation(strings):
+    """Регулярное выражение "одна из строк"; длинные строки проверяются первыми."""
+    return "|".join(re.escape(s) for s in sorted(strings, key=len, reverse=True))
+
+
+class Translator:
+    """Перевод текст <-> Брайль (символы Unicode U+2800..U+28FF) по скомпилированной таблице.
+
+    Однобуквенные правила собираются в таблицу для str.translate, а числа, заглавные
+    буквы, многоклеточные знаки и сокращения — в одно регулярное выражение. Обычный
+    текст обрабатывается кодом на C, Python вызывается только на совпадениях.
+    """
+
+    def __init__(self, table):
+        self.name = table.get("name", "")
+        indicators = {key: parse_dots(dots) for key, dots in table["indicators"].items()}
+        self.number_sign = indicators["number"]
+        self.capital_sign = indicators["capital"]
+        self.letter_sign = indicators["letter"]
+        letters = ({letter: parse_dots(dots) for letter, dots in table["letters"].items()} if "letters" in table
+                   else {(" " if name == "пробел" else name): to_unicode(cell) for name, cell in LETTER_TO_CELL.items()})
+        digits = {digit: parse_dots(dots) for digit, dots in table["digits"].items()}
+
+        rules = []
+        for text, dots, where in table.get("rules", []):
+            if where not in ("any", "word"):
+                raise TableError(f"правило {text}: неизвестное место {where}")
+            rules.append((text, parse_dots(dots), where))
+
+        # Прямой перевод
+        self.forward_table = str.maketrans(letters)
+        text_rules = {"any": {}, "word": {}}
+        for text, cells, where in rules:
+            if len(text) == 1 and where == "any":
+                self.forward_table.setdefault(ord(text), cells)
+            else:
+                text_rules[where].setdefault(text, cells)
+        self.sign_rules, self.word_rules = text_rules["any"], text_rules["word"]
+        self.digit_table = str.maketrans({**digits, **{text: self.forward_table[ord(text)]
+                                                       for text in ".," if ord(text) in self.forward_table}})
+        # После числа буква, похожая на цифру, отделяется знаком буквы
+        self.digit_lookalikes = {letter for letter, cells in letters.items() if cells in digits.values()}
+        upper = "".join(sorted({letter.upper() for letter in letters if letter.upper() != letter}))
+        lower = "".join(sorted({letter for letter in letters if letter.upper() != letter}))
+        parts = [r"(?P<number>[0-9]+(?:[.,][0-9]+)*)",
+                 rf"(?P<caps>[{upper}]{{2,}}(?![{lower}]))",
+                 rf"(?P<capital>[{upper}][{lower}]*)"]
+        if text_rules["word"]:
+            parts.append(rf"(?P<word>(?<!\w)(?:{alternation(text_rules['word'])})(?!\w))")
+        if text_rules["any"]:
+            parts.append(f"(?P<sign>{alternation(text_rules['any'])})")
+        self.forward_pattern = re.compile("|".join(parts))
+
+        # Обратный перевод: первое описание набора точек побеждает, буквы — раньше знаков
+        back = {}
+        self.back_rules = {}  # многоклеточные знаки
+        self.back_word_rules = {}  # сокращения целым словом
+        for text, cells, where in [(letter, cells, "any") for letter, cells in letters.items()] + rules:
+            if where == "word":
+                self.back_word_rules.setdefault(cells, text)
+            elif len(cells) == 1:
+                back.setdefault(cells, text)
+            else:
+                self.back_rules.setdefault(cells, text)
+        self.back_table = str.maketrans(back)
+        self.back_digits = str.maketrans({cells: digit for digit, cells in digits.items()})
+        self.back_digits.update({ord(cells): text for cells, text in back.items() if text in ".,"})
+        punctuation = "".join(cells for cells, text in back.items() if not text.isalnum() and text != " ")
+        digit_cells = "".join(digits.values())
+        separators = "".join(self.forward_table.get(ord(text), "") for text in ".,")
+        boundary = re.escape(BLANK + punctuation) + r"\s"
+        units = []  # то, к чему относится знак заглавной: сокращение, многоклеточный знак или ячейка
+        word_cells = list(self.back_word_rules)
+        if word_cells:
+            # Перед сокращением может стоять и знак заглавной
+            before = boundary + re.escape(self.capital_sign)
+            units.append(rf"(?<![^{before}])(?:{alternation(word_cells)})(?![^{boundary}])")
+        sign_cells = list(self.back_rules)
+        if sign_cells:
+            units.append(alternation(sign_cells))
+        parts = [rf"(?P<number>{re.escape(self.number_sign)}(?:[{digit_cells}]|[{separators}](?=[{digit_cells}]))+"
+                 rf"(?:{re.escape(self.letter_sign)})?)",
+                 rf"{re.escape(self.capital_sign * 2)}(?P<caps>[^{re.escape(BLANK)}\s]+)",
+                 rf"{re.escape(self.capital_sign)}(?P<capital>{'|'.join(units + ['.'])})"]
+        parts += [f"(?P<word>{units[0]})"] if word_cells else []
+        parts += [f"(?P<sign>{alternation(sign_cells)})"] if sign_cells else []
+        self.backward_pattern = re.compile("|".join(parts))
+        self.sign_cells = {ord(cells[0]) - ord(BLANK) for cells in list(back) + list(self.back_rules)
+                           + list(self.back_word_rules)}
+        self.sign_cells.update(ord(sign) - ord(BLANK) for sign in (self.number_sign, self.capital_sign, self.letter_sign))
+
+    # Текст -> Брайль
+
+    def _forward_match(self, match):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "number":
+            cells = self.number_sign + text.translate(self.digit_table)
+            if match.string[match.end():match.end() + 1] in self.digit_lookalikes:
+                cells += self.letter_sign
+            return cells
+        if kind == "caps":
+            return self.capital_sign * 2 + self.forward(text.lower())
+        if kind == "capital":
+            return self.capital_sign + self.forward(text.lower())
+        return self.word_rules[text] if kind == "word" else self.sign_rules[text]
+
+    def forward(self, text):
+        """Текст в строку символов Брайля; неизвестные символы остаются как есть."""
+        return self.forward_pattern.sub(self._forward_match, text).translate(self.forward_table)
+
+    # Брайль -> текст
+
+    def _backward_match(self, match):
+        kind = match.lastgroup
+        cells = match.group()
+        if kind == "number":
+            return cells[1:].removesuffix(self.letter_sign).translate(self.back_digits)
+        if kind == "caps":
+            return self.backward(match.group("caps")).upper()
+        if kind == "capital":
+            text = self.backward(match.group("capital"))
+            return text[:1].upper() + text[1:]
+        if kind == "word":
+            return self.back_word_rules[cells]
+        return self.back_rules[cells]
+
+    def backward(self, cells):
+        """Строка символов Брайля в текст."""
+        return self.backward_pattern.sub(self._backward_match, cells).translate(self.back_table)
+
+    def is_sign(self, cell):
+        """Есть ли у ячейки значение в таблице (буква, знак или признак)."""
+        return cell in self.sign_cells
+
+    # Потоковый перевод: куски разрезаются по пробелам, чтобы не разорвать число или слово
+
+    @staticmethod
+    def _stream(chunks, translate, separators):
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            cut = max(pending.rfind(separator) for separator in separators)
+            if cut >= 0:
+                yield translate(pending[:cut + 1])
+                pending = pending[cut + 1:]
+        if pending:
+            yield translate(pending)
+
+    def forward_stream(self, chunks):
+        return self._stream(chunks, self.forward, (" ", "\n"))
+
+    def backward_stream(self, chunks):
+        return self._stream(chunks, self.backward, (BLANK, " ", "\n"))
+
+
+@lru_cache(maxsize=None)
+def load_table(name=DEFAULT_TABLE):
+    """Скомпилированная таблица; компилируется один раз на процесс."""
+    return Translator(read_table(name))
+
+
+def read_chunks(f, size=STREAM_CHUNK):
+    while chunk := f.read(size):
+        yield chunk
+
+
+if __name__ == "__main__":
+    # python braille_translate.py forward|backward [--table имя] [файл ...]  (без файлов — stdin)
+    import argparse
+    parser = argparse.ArgumentParser(description="Перевод текста в шрифт Брайля и обратно")
+    parser.add_argument("direction", choices=["forward", "backward"])
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    args = parser.parse_args()
+
+    translator = load_table(args.table)
+    stream = translator.forward_stream if args.direction == "forward" else translator.backward_stream
+    for path in args.files or [None]:
+        f = sys.stdin if path is None else open(path, "r", encoding="utf-8")
+        for piece in stream(read_chunks(f)):
+            sys.stdout.write(piece)
+        if path is not None:
+            f.close()
@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from braille_engine import BrailleEngine, STORE_EVENTS
+from progress_store import open_store, SqliteProgressStore
+import curriculum_package
+
+HOST = "127.0.0.1"
+STATION_PORT = 8765  # станции: JSON lines по TCP
+HTTP_PORT = 8080     # API учителя
+AUDIO_TICK = 0.01    # как часто продвигаются очереди звуков станций с устройствами (с)
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+LISTENER_QUEUE = 256  # изменений в очереди подписчика /events; при переполнении старые выбрасываются
+# Ошибки в событии станции: ей отвечают {"error": ...}, соединение не рвётся
+BAD_INPUT = (ValueError, KeyError, IndexError, TypeError, AttributeError)
+
+# Протокол станции (по строке JSON в каждую сторону):
+#   -> {"station": "имя"}                    первое сообщение
+#   -> {"event": ["dot", 0]}                 входное событие движка
+#   <- {"commands": [[вид, arg, delay], ...], "state": {...}}
+#   <- {"error": "..."}                      сообщение или событие не разобрано
+# События, при которых движок обращается к хранилищу (STORE_EVENTS), обрабатываются в одном
+# отдельном потоке (worker): запись в базу не останавливает остальные станции, а соединение
+# с базой не нужно защищать блокировками. Точки и буквы обрабатываются сразу в цикле событий.
+
+
+class Station:
+    """Сеанс одного рабочего места: свой движок, общее хранилище."""
+
+    def __init__(self, name, store, output=None, mode="free"):
+        self.name = name
+        self.engine = BrailleEngine(store, mode=mode)
+        self.output = output  # исполнитель команд для устройств, подключённых к серверу
+        self.events = 0
+
+    def start(self):
+        return self.engine.start()
+
+    def handle(self, event):
+        self.events += 1
+        return self.engine.handle(tuple(event))
+
+    def state(self):
+        dictation = self.engine.dictation_module
+        return {
+            "station": self.name,
+            "mode": self.engine.mode,
+            "student": self.engine.student_id,
+            "stage": dictation.current_letter if dictation else None,
+            "current_word": dictation.current_word if dictation else None,
+            "typed": self.engine.word_text(),
+            "events": self.events,
+        }
+
+
+class MixerOutput:
+    """Звук станции с устройством, подключённым прямо к серверу (общий кэш ресурсов).
+
+    У каждой станции свои каналы микшера (number — номер станции): звуки станций
+    смешиваются, а не прерывают друг друга.
+    """
+
+    def __init__(self, number=0):
+        from resources import get_sound, words_for_dict
+        from audio_timeline import AudioTimeline
+        from audio_manager import AudioManager, init_mixer, reserved_channels, sound_category
+        self.get_sound = get_sound
+        self.sound_category = sound_category
+        self.words_for_dict = words_for_dict
+        init_mixer()
+        self.audio = AudioManager(first_channel=number * reserved_channels())
+        self.timeline = AudioTimeline(self.audio)
+
+    def execute(self, commands):
+        for command in commands:
+            if command.kind == "play":
+                self.audio.play(self.get_sound(command.arg), self.sound_category(command.arg))
+            elif command.kind == "schedule":
+                self.timeline.play(self.get_sound(command.arg), delay=command.delay,
+                                   category=self.sound_category(command.arg))
+            elif command.kind == "wait":
+                self.timeline.wait(command.delay)
+            elif command.kind == "cancel_audio":
+                self.timeline.clear()
+                self.audio.clear_queues()
+            elif command.kind == "stop_audio":
+                self.timeline.stop()
+            elif command.kind == "prefetch":
+                self.words_for_dict.prefetch(command.arg)
+
+
+class ClassroomServer:
+    """Один процесс на весь класс: станции по сети и устройства на последовательных портах."""
+
+    def __init__(self, store):
+        self.store = store
+        self.stations = {}
+        self.listeners = set()  # очереди подписчиков /events
+        self.outputs = []
+        self.worker = ThreadPoolExecutor(max_workers=1)
+
+    def add_station(self, name, output=None, mode="free"):
+        station = Station(name, self.store, output, mode)
+        self.stations[name] = station
+        commands = station.start()
+        if output:
+            output.execute(commands)
+        return station
+
+    def publish(self, station):
+        message = json.dumps(station.state(), ensure_ascii=False)
+        for listener in self.listeners:
+            if listener.full():
+                listener.get_nowait()  # учитель не успевает читать: пропускает самое старое изменение
+            listener.put_nowait(message)
+
+    async def run_event(self, station, event):
+        """Передаёт событие движку станции и возвращает команды."""
+        if event and event[0] in STORE_EVENTS:
+            commands = await self.in_worker(station.handle, event)
+        else:
+            commands = station.handle(event)
+        if station.output:
+            station.output.execute(commands)
+        self.publish(station)
+        return commands
+
+    async def in_worker(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.worker, function, *args)
+
+    @staticmethod
+    async def send(writer, message):
+        writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def handle_station(self, reader, writer):
+        station = None
+        try:
+            try:
+                hello = json.loads(await reader.readline())
+                station = self.add_station(str(hello["station"]))
+            except BAD_INPUT as e:
+                await self.send(writer, {"error": f"bad hello: {e!r}"})
+                return
+            while line := await reader.readline():
+                try:
+                    commands = await self.run_event(station, json.loads(line)["event"])
+                except BAD_INPUT as e:
+                    await self.send(writer, {"error": f"bad event: {e!r}"})
+                    continue
+                # Снимок состояния ученика нужен только журналу сессии, станции его не получают
+                await self.send(writer, {"commands": [list(command) for command in commands
+                                                      if command.kind != "student"],
+                                         "state": station.state()})
+        except ConnectionError:
+            pass
+        finally:
+            if station and self.stations.get(station.name) is station:
+                del self.stations[station.name]
+            writer.close()
+
+    def attach_serial(self, port, loop):
+        """Подключает матрицу герконов: ячейки из потока чтения передаются в цикл событий.
+
+        Станция сразу начинает с диктанта (ждёт код ученика); код, отправка слова, смена режима
+        и стирание набираются служебными аккордами (serial_input.chord_event).
+        """
+        from serial_input import SerialReader
+        output = MixerOutput(len(self.outputs))
+        self.outputs.append(output)
+        station = self.add_station(f"serial:{port}", output, mode="dictation")
+
+        def on_cell(cell):
+            asyncio.run_coroutine_threadsafe(self.serial_event(station, cell), loop)
+
+        SerialReader(port, on_cell=on_cell).start()
+
+    async def serial_event(self, station, cell):
+        from serial_input import chord_event
+        # Аккорд разбирается в цикле событий: режим движка читается не из потока чтения порта
+        event = chord_event(cell, station.engine.waiting_for_student_id)
+        if event:
+            await self.run_event(station, event)
+
+    async def tick_audio(self):
+        while True:
+            for output in self.outputs:
+                output.timeline.update()
+                output.audio.update()
+            await asyncio.sleep(AUDIO_TICK)
+
+    async def handle_http(self, reader, writer):
+        request = (await reader.readline()).decode("latin-1").split()
+        while (await reader.readline()).strip():
+            pass  # заголовки не нужны
+        path = request[1] if len(request) > 1 else "/"
+
+        if path == "/events":
+            await self.stream_events(writer)
+            return
+
+        if path == "/curriculum":
+            status, body = 200, {"active": curriculum_package.get_active().name,
+                                 "available": curriculum_package.list_packages()}
+        elif path.startswith("/curriculum/") and request[0] == "POST":
+            # Замена программы на ходу: новые диктанты берут слова уже из неё
+            from urllib.parse import unquote
+            try:
+                package = curriculum_package.activate(
+                    curriculum_package.load_package(unquote(path[len("/curriculum/"):])))
+            except OSError:
+                status, body = 404, {"error": "curriculum not found"}
+            except (ValueError, KeyError) as e:
+                # В том числе CurriculumError: ошибки в пакете или другой алфавит
+                status, body = 400, {"error": f"invalid curriculum: {e}"}
+            else:
+                status, body = 200, {"active": package.name}
+        elif path == "/stations":
+            status, body = 200, [station.state() for station in self.stations.values()]
+        elif path == "/students":
+            status, body = 200, await self.in_worker(self.store.student_ids)
+        elif path.startswith("/students/"):
+            from urllib.parse import unquote
+            status, body = 200, await self.in_worker(self.store.student_history, unquote(path[len("/students/"):]))
+        else:
+            status, body = 404, {"error": "not found"}
+
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+        writer.close()
+
+    async def stream_events(self, writer):
+        """Поток изменений станций в формате Server-Sent Events."""
+        listener = asyncio.Queue(maxsize=LISTENER_QUEUE)
+        self.listeners.add(listener)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n")
+        try:
+            while True:
+                writer.write(f"data: {await listener.get()}\n\n".encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.listeners.discard(listener)
+            writer.close()
+
+    async def serve(self, host=HOST, station_port=STATION_PORT, http_port=HTTP_PORT, serial_ports=()):
+        loop = asyncio.get_running_loop()
+        for port in serial_ports:
+            self.attach_serial(port, loop)
+        stations = await asyncio.start_server(self.handle_station, host, station_port)
+        http = await asyncio.start_server(self.handle_http, host, http_port)
+        print(f"Станции: {host}:{station_port}, API учителя: http://{host}:{http_port}/stations")
+        async with stations, http:
+            await asyncio.gather(stations.serve_forever(), http.serve_forever(), self.tick_audio())
+
+
+async def simulated_station(name, host, port, error_rate, latencies, rng):
+    """Виртуальный ученик: проходит диктант по сети и замеряет время ответа сервера."""
+    from headless import word_events
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({"station": name}) + "\n").encode("utf-8"))
+
+    async def send(event):
+        started = time.perf_counter()
+        writer.write((json.dumps({"event": list(event)}, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - started)
+        return reply["state"]
+
+    for event in [("mode",)] + [("id_char", char) for char in name] + [("id_enter",)]:
+        state = await send(event)
+    while state["current_word"]:
+        word = state["current_word"].lower()
+        if rng.random() < error_rate:
+            word = word[:-1]
+        for event in word_events(word) + [("submit",)]:
+            state = await send(event)
+            await asyncio.sleep(rng.uniform(0, 0.002))
+    writer.close()
+
+
+async def simulate(count, error_rate, host=HOST, port=STATION_PORT):
+    server = ClassroomServer(SqliteProgressStore(":memory:"))
+    stations = await asyncio.start_server(server.handle_station, host, port)
+    latencies = []
+    rng = random.Random(0)
+    started = time.perf_counter()
+    async with stations:
+        await asyncio.gather(*(simulated_station(f"sim{i}", host, port, error_rate, latencies, rng)
+                               for i in range(count)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{count} станций, {len(latencies)} событий за {elapsed:.1f} с; задержка ответа: "
+          f"медиана {statistics.median(latencies) * 1000:.2f} мс, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} мс")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сервер класса: много станций в одном процессе")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=STATION_PORT)
+    parser.add_argument("--http-port", type=int, default=HTTP_PORT)
+    parser.add_argument("--serial", nargs="*", default=[], metavar="PORT", help="матрицы герконов на этом компьютере")
+    parser.add_argument("--simulate", type=int, metavar="N", help="прогнать N виртуальных станций и выйти")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.simulate:
+        asyncio.run(simulate(args.simulate, args.error_rate, args.host, args.port))
+    else:
+        server = ClassroomServer(open_store())
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.http_port, args.serial))
+        except KeyboardInterrupt:
+            server.store.close()
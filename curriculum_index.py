@@ -0,0 +1,93 @@
+import random
+import curriculum_package
+
+
+class CurriculumIndex:
+    """Индекс программы диктантов, который строится один раз при загрузке.
+
+    Все слова хранятся в одном списке в порядке их первого появления, поэтому
+    слова всех предыдущих этапов — это префикс этого списка, и выборка из них
+    не требует пересборки и дедупликации.
+    """
+
+    def __init__(self, dictations, stages):
+        self.load(dictations, stages)
+
+    def load(self, dictations, stages):
+        """Перестраивает индекс (при замене программы на ходу)."""
+        self.stages = list(stages)
+        self.stage_pos = {stage: i for i, stage in enumerate(self.stages)}
+        self.stage_words = [tuple(dictations[stage]) for stage in self.stages]
+
+        self.words = []  # слова без повторов в порядке первого появления
+        self.word_pos = {}
+        self.pool_end = []  # сколько слов введено до начала каждого этапа
+        for words in self.stage_words:
+            self.pool_end.append(len(self.words))
+            for word in words:
+                if word not in self.word_pos:
+                    self.word_pos[word] = len(self.words)
+                    self.words.append(word)
+
+    def in_pool(self, word, stage):
+        """Введено ли слово до этапа stage."""
+        return self.word_pos.get(word, len(self.words)) < self.pool_end[self.stage_pos[stage]]
+
+    def select(self, stage, count=10, exclude=(), weights=None, rng=random, include_stage=True):
+        """Слова этапа, дополненные до count словами предыдущих этапов.
+
+        exclude — слова, которые брать не нужно (например, недавние);
+        weights — {слово: число ошибок}, слова с ошибками выбираются в первую очередь;
+        include_stage=False — только слова предыдущих этапов.
+        """
+        i = self.stage_pos[stage]
+        selected = list(self.stage_words[i][:count]) if include_stage else []
+        needed = count - len(selected)
+        if needed <= 0:
+            return selected
+
+        taken = set(selected)
+        taken.update(exclude)
+        pool_size = self.pool_end[i]
+
+        # Сначала слова с ошибками: пропорционально весу, без повторов
+        if weights:
+            candidates = [(w, word) for word, w in weights.items()
+                          if w > 0 and word not in taken and self.word_pos.get(word, pool_size) < pool_size]
+            # Взвешенная выборка без возвращения (ключ rnd ** (1 / w))
+            candidates.sort(key=lambda item: rng.random() ** (1 / item[0]), reverse=True)
+            for _, word in candidates[:needed]:
+                selected.append(word)
+                taken.add(word)
+            needed = count - len(selected)
+
+        # Затем случайные слова из префикса; пока исключений мало, хватает пары попыток на слово
+        attempts = needed * 4
+        while needed > 0 and attempts > 0 and pool_size:
+            word = self.words[rng.randrange(pool_size)]
+            attempts -= 1
+            if word not in taken:
+                selected.append(word)
+                taken.add(word)
+                needed -= 1
+
+        if needed > 0 and pool_size:
+            # Исключений слишком много: обходим префикс по кругу со случайного места.
+            # Пропускаются только слова из taken, поэтому шагов не больше len(taken) + needed
+            start = rng.randrange(pool_size)
+            for k in range(pool_size):
+                word = self.words[(start + k) % pool_size]
+                if word not in taken:
+                    selected.append(word)
+                    taken.add(word)
+                    needed -= 1
+                    if needed == 0:
+                        break
+
+        return selected
+
+
+package = curriculum_package.get_active()
+curriculum = CurriculumIndex(package.dictations, package.letters_for_dictations)
+# Индекс — один объект на процесс, поэтому при смене программы он обновляется на месте
+curriculum_package.add_listener(lambda package: curriculum.load(package.dictations, package.letters_for_dictations))
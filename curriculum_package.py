@@ -0,0 +1,275 @@
+import json
+import os
+import sys
+from collections import OrderedDict
+
+# Пакет программы — папка curricula/<имя>:
+#   manifest.json  — название, язык, алфавит (буква -> точки), шаблоны путей к ресурсам,
+#                    подсказки и список этапов со ссылками на файлы слов
+#   words/*.txt    — слова этапов, по одному в строке
+#   index.json     — собранный индекс (python curriculum_package.py compile): при запуске
+#                    читается только он, файлы слов и папки с ресурсами не сканируются
+# Пути к ресурсам указываются относительно папки программы (как "sounds/а.ogg").
+PACKAGES_DIR = "curricula"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.json"
+INDEX_FORMAT = 1
+INDEX_VERSION = 2  # меняется вместе с устройством index.json: старый индекс пересобирается
+DEFAULT_PACKAGE = os.environ.get("BRAILLE_CURRICULUM", "ru_basic")
+# Столько подсказок ожидает движок (номера см. в dictionaries.prompt_files)
+PROMPT_COUNT = 10
+
+
+class CurriculumError(ValueError):
+    pass
+
+
+def resource_path(relative_path):
+    # То же, что asset_cache.resource_path, но без импорта pygame: программа нужна и без окна
+    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, relative_path)
+
+
+def package_path(name):
+    """Папка пакета по имени или по пути."""
+    if os.path.isdir(name):
+        return name
+    return resource_path(os.path.join(PACKAGES_DIR, name))
+
+
+def list_packages():
+    root = resource_path(PACKAGES_DIR)
+    return sorted(name for name in os.listdir(root) if os.path.isfile(os.path.join(root, name, MANIFEST_FILE)))
+
+
+def _source_files(path, manifest):
+    return [os.path.join(path, MANIFEST_FILE)] + [os.path.join(path, stage["words"]) for stage in manifest["stages"]]
+
+
+def sound_key(word):
+    """Ключ звука слова: "Тома" в программе и "тома", набранное учеником, — один звук."""
+    return word.lower()
+
+
+def _asset(relative_path):
+    """Путь к ресурсу, если файл есть, иначе None."""
+    return relative_path if relative_path and os.path.exists(resource_path(relative_path)) else None
+
+
+def compile_package(path):
+    """Читает manifest.json и файлы слов, проверяет наличие ресурсов и возвращает индекс."""
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != INDEX_FORMAT:
+        raise CurriculumError(f"{path}: неизвестный формат пакета {manifest.get('format')}")
+
+    stages = []
+    for stage in manifest["stages"]:
+        with open(os.path.join(path, stage["words"]), "r", encoding="utf-8") as f:
+            words = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        stages.append([stage["name"], words])
+
+    letters = {}
+    for letter, dots in manifest["alphabet"].items():
+        image = manifest["space_image"] if not dots else manifest["letter_image"].format(letter=letter)
+        letters[letter] = {"dots": dots, "image": _asset(image),
+                           "sound": _asset(manifest["letter_sound"].format(letter=letter)) if dots else None}
+
+    word_sounds = {}
+    for _, words in stages:
+        for word in words:
+            key = sound_key(word)
+            if key not in word_sounds:
+                word_sounds[key] = _asset(manifest["word_sound"].format(word=key))
+
+    return {
+        "format": INDEX_FORMAT,
+        "index_version": INDEX_VERSION,
+        "name": manifest["name"],
+        "title": manifest.get("title", manifest["name"]),
+        "language": manifest.get("language", ""),
+        "version": manifest.get("version", 1),
+        "letters": letters,
+        "retry_sound": _asset(manifest.get("retry_sound")),
+        "prompts": [_asset(prompt) for prompt in manifest["prompts"]],
+        "stages": stages,
+        "word_sounds": word_sounds,
+    }
+
+
+def validate(index):
+    """Проверяет пакет; возвращает (ошибки, предупреждения). Без ошибок пакет готов к работе."""
+    problems = []
+    warnings = []
+    letters = index["letters"]
+    for letter, info in letters.items():
+        if info["dots"] and not set(info["dots"]) <= set("12345678"):
+            problems.append(f"буква {letter}: неверные точки {info['dots']}")
+        if info["image"] is None:
+            problems.append(f"буква {letter}: нет картинки")
+        if info["dots"] and info["sound"] is None:
+            problems.append(f"буква {letter}: нет звука")
+    if len(index["prompts"]) < PROMPT_COUNT:
+        problems.append(f"подсказок {len(index['prompts'])}, нужно {PROMPT_COUNT}")
+    for number, prompt in enumerate(index["prompts"]):
+        if prompt is None:
+            problems.append(f"подсказка {number}: нет файла")
+    if index["retry_sound"] is None:
+        problems.append("нет звука для повторного набора буквы")
+
+    names = set()
+    for name, words in index["stages"]:
+        if name in names:
+            problems.append(f"этап {name} повторяется")
+        names.add(name)
+        if len(name) == 1 and name.lower() not in letters:
+            problems.append(f"этап {name}: буквы нет в алфавите")
+        if not words:
+            problems.append(f"этап {name}: нет слов")
+        for word in words:
+            unknown = {char for char in word.lower() if char != " " and char not in letters}
+            if unknown:
+                problems.append(f"этап {name}, слово {word}: символы не из алфавита {''.join(sorted(unknown))}")
+    for word, sound in index["word_sounds"].items():
+        if sound is None:
+            warnings.append(f"слово {word}: нет звука, будет произнесено синтезатором")
+    return problems, warnings
+
+
+def _index_assets(index):
+    """Все пути к ресурсам, на которые ссылается индекс."""
+    paths = [info[kind] for info in index["letters"].values() for kind in ("image", "sound")]
+    paths += [index["retry_sound"]] + index["prompts"] + list(index["word_sounds"].values())
+    return [path for path in paths if path]
+
+
+def _read_index(path, index_path):
+    """Собранный индекс или None, если он устарел: манифест или файлы слов новее него,
+    индекс собран прежней версией программы или набор файлов ресурсов изменился."""
+    try:
+        built = os.path.getmtime(index_path)
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if any(os.path.getmtime(source) > built for source in _source_files(path, manifest)):
+            return None
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("index_version") != INDEX_VERSION:
+            return None
+        if not all(os.path.exists(resource_path(asset)) for asset in _index_assets(index)):
+            return None
+        # Звук слова, которого при сборке не было, уже записан
+        if any(os.path.exists(resource_path(manifest["word_sound"].format(word=word)))
+               for word, sound in index["word_sounds"].items() if sound is None):
+            return None
+        return index
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class CurriculumPackage:
+    """Загруженная программа диктантов."""
+
+    def __init__(self, index, path=None):
+        self.path = path
+        self.name = index["name"]
+        self.title = index["title"]
+        self.language = index["language"]
+        self.version = index["version"]
+        self.letters = index["letters"]
+        self.retry_sound = index["retry_sound"]
+        self.prompts = index["prompts"]
+        self.dictations = OrderedDict((name, words) for name, words in index["stages"])
+        self.letters_for_dictations = list(self.dictations)
+        self.word_sounds = index["word_sounds"]
+        # Старые десятичные коды букв: цифра i (с конца) — точка i + 1
+        self.letter_code_map = {letter: sum(10 ** (int(dot) - 1) for dot in info["dots"])
+                                for letter, info in self.letters.items()}
+
+
+def load_package(name=DEFAULT_PACKAGE):
+    """Загружает пакет по собранному индексу; устаревший индекс пересобирается.
+
+    Пакет с ошибками (см. validate) не загружается: CurriculumError с их списком.
+    """
+    path = package_path(name)
+    index_path = os.path.join(path, INDEX_FILE)
+    index = _read_index(path, index_path)
+    if index is None:
+        index = compile_package(path)
+        try:
+            write_index(index, index_path)
+        except OSError:
+            pass  # папка только для чтения: работаем с индексом в памяти
+    problems, _ = validate(index)
+    if problems:
+        raise CurriculumError(f"{path}: " + "; ".join(problems))
+    return CurriculumPackage(index, path)
+
+
+def write_index(index, index_path):
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+# Замена программы на ходу: модули, которые держат производные данные, подписываются на смену
+active = None
+_listeners = []
+
+
+def add_listener(callback):
+    _listeners.append(callback)
+
+
+def get_active():
+    """Текущая программа; если ни одну ещё не выбрали, загружается программа по умолчанию."""
+    if active is None:
+        activate(load_package())
+    return active
+
+
+def alphabet(package):
+    """{буква: точки}."""
+    return {letter: info["dots"] for letter, info in package.letters.items()}
+
+
+def activate(package):
+    """Делает пакет текущим; уже идущие диктанты доигрывают выбранные слова.
+
+    Таблицы ячеек (braille_cell), картинки и звуки букв строятся один раз при запуске,
+    поэтому на ходу можно сменить только программу с тем же алфавитом. Программу с другим
+    алфавитом выбирают при запуске переменной BRAILLE_CURRICULUM.
+    """
+    global active
+    if active is not None and alphabet(package) != alphabet(active):
+        raise CurriculumError(f"{package.name}: алфавит отличается от текущей программы {active.name}; "
+                              f"такую программу можно выбрать только при запуске (BRAILLE_CURRICULUM)")
+    active = package
+    for callback in _listeners:
+        callback(package)
+    return package
+
+
+if __name__ == "__main__":
+    # python curriculum_package.py validate|compile [имя или папка ...]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("validate", "compile"):
+        print("Использование: python curriculum_package.py validate|compile [пакет ...]")
+        sys.exit(1)
+    failed = False
+    for name in sys.argv[2:] or list_packages():
+        path = package_path(name)
+        index = compile_package(path)
+        problems, warnings = validate(index)
+        words = sum(len(words) for _, words in index["stages"])
+        print(f"{index['name']}: {len(index['stages'])} этапов, {words} слов, "
+              f"ошибок: {len(problems)}, предупреждений: {len(warnings)}")
+        for problem in problems:
+            print(f"  ошибка: {problem}")
+        for warning in warnings:
+            print(f"  предупреждение: {warning}")
+        if sys.argv[1] == "compile" and not problems:
+            write_index(index, os.path.join(path, INDEX_FILE))
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
@@ -1,118 +1,112 @@
-import pyttsx3
-import json
-import datetime
-import pygame
-from dictionaries import letters_for_dictations, dictations, letter_code_map, sounds, play_sound
-from resources import words_for_dict, letters
-import random
-from collections import OrderedDict
+from braille_cell import LETTER_TO_CELL
+from curriculum_index import curriculum
+from spaced_repetition import Scheduler
+from word_index import describe
 
-DB_FILE = "students_db.json"
+WORDS_PER_DICTATION = 10
 
 class DictationModule:
-    def __init__(self, student_id, braille_app):
+    """Диктант поверх BrailleEngine: звуки и экран меняются только через команды движка."""
+
+    def __init__(self, student_id, engine):
         self.student_id = student_id
-        self.braille_app = braille_app
-        self.today = datetime.date.today().strftime("%d-%m-%Y")
+        self.engine = engine
+        self.store = engine.store
+        self.today = engine.today
         self.load_student_progress()
-        self.engine = pyttsx3.init()
-        self.engine.setProperty("rate", 120)
-        self.engine.setProperty("voice", "russian")
+        self.scheduler = Scheduler(student_id, self.store, self.today)
         self.current_letter = None
         self.current_word = None
         self.dictation_queue = self.get_today_dictations()
-        self.is_first_dictation = True  # Флаг для первого диктанта
         self.word_queue = None
-        self.words_history = []
+        self.words_history = {}
 
     def get_words_for_dictation(self, current_letter):
-        main_words = dictations[current_letter].copy()
-
-        # Для начального диктанта берем ровно 10 слов
-        if current_letter == "Начальный диктант":
-            self.words_history.extend(main_words)
-            self.words_history = list(OrderedDict.fromkeys(self.words_history))
-            return main_words[:10]
-
-        # Для остальных диктантов дополняем из предыдущих
-        needed_words = 10 - len(main_words)
-        if needed_words > 0:
-            # Собираем все предыдущие диктанты
-            current_index = letters_for_dictations.index(current_letter)
-            previous_letters = letters_for_dictations[:current_index]
-            previous_words = []
-            for letter in previous_letters:
-                previous_words.extend(dictations[letter])
-            # Убираем повторы и слова, уже присутствующие в текущем диктанте
-            previous_words = list(OrderedDict.fromkeys(previous_words))
-            available_words = [w for w in previous_words if w not in main_words]
-            additional_words = random.sample(available_words, min(needed_words, len(available_words)))
-            main_words.extend(additional_words)
-
-        # Обновляем историю
-        self.words_history.extend(main_words)
-        self.words_history = list(OrderedDict.fromkeys(self.words_history))
-
-        return main_words[:10]
+        # Сначала невыученные слова этапа, затем слова, которые пора повторить
+        # (самые просроченные и с ошибками), и только потом случайные пройденные
+        # Одно множество на все три источника: слово не попадёт в диктант дважды
+        stage_words = self.stage_words(current_letter)
+        words = []
+        exclude = set()
+
+        def take(selected):
+            for word in selected:
+                if word not in exclude:
+                    words.append(word)
+                    exclude.add(word)
+
+        take([word for word in stage_words if not self.scheduler.is_mastered(word)][:WORDS_PER_DICTATION])
+        take(self.scheduler.due_words(
+            WORDS_PER_DICTATION - len(words),
+            allowed=lambda word: curriculum.in_pool(word, current_letter),
+            exclude=exclude))
+        if len(words) < WORDS_PER_DICTATION:
+            # Остальное — из пройденного; слова, в которых ученик ошибался, вероятнее
+            exclude.update(stage_words, self.words_history)
+            take(curriculum.select(current_letter, WORDS_PER_DICTATION - len(words),
+                                   exclude=exclude, weights=self.scheduler.mistakes(),
+                                   rng=self.engine.rng, include_stage=False))
+
+        # Обновляем историю (словарь сохраняет порядок и не допускает повторов)
+        self.words_history.update(dict.fromkeys(words))
+
+        return words
+
+    @staticmethod
+    def stage_words(stage):
+        return curriculum.stage_words[curriculum.stage_pos[stage]]
 
     def load_student_progress(self):
-        try:
-            with open(DB_FILE, "r", encoding="utf-8") as f:
-                self.student_data = json.load(f)
-        except FileNotFoundError:
-            self.student_data = {}
-
-        if self.student_id not in self.student_data:
-            self.student_data[self.student_id] = {}
-
-        if self.today not in self.student_data[self.student_id]:
-            self.student_data[self.student_id][self.today] = {}
-
-    def save_progress(self):
-        with open(DB_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.student_data, f, ensure_ascii=False, indent=4)
-
-    def say_phrase(self, phrase):
-        self.engine.say(phrase)
-        self.engine.runAndWait()
+        # Из хранилища читаем только диктанты этого ученика за сегодня
+        self.completed_today = self.store.completed_dictations(self.student_id, self.today)
 
     def get_today_dictations(self):
-        completed = self.student_data[self.student_id][self.today].keys()
+        completed = self.completed_today
         available = []
 
-        if "Начальный диктант" not in completed:
+        if "Начальный диктант" in curriculum.stage_pos and "Начальный диктант" not in completed:
             available.append("Начальный диктант")
 
-        available.extend([letter for letter in letters_for_dictations 
+        available.extend([letter for letter in curriculum.stages
                         if letter != "Начальный диктант" and letter not in completed])
 
+        # Этапы, все слова которых уже выучены, пропускаем: их слова вернутся в повторении
+        available = [stage for stage in available
+                     if not all(self.scheduler.is_mastered(word) for word in self.stage_words(stage))]
+
         return iter(available)
 
     def clear_win(self):
-        self.braille_app.clear_win()
-        self.braille_app.s_word.clear()
-        self.braille_app.pin = 0
+        self.engine.clear_word()
 
     def next_letter(self):
         try:
             self.current_letter = next(self.dictation_queue)
+            if self.current_letter not in curriculum.stage_pos:
+                # Программу заменили во время диктанта: этапа больше нет
+                self.next_letter()
+                return
 
             words = self.get_words_for_dictation(self.current_letter)
-
-            if self.current_letter == "Начальный диктант":
-                play_sound(sounds[8])
-                pygame.time.delay(5500)
+            # Пока звучит вступление, звуки слов декодируются в фоне
+            self.engine.emit("prefetch", words)
+
+            # Подсказки ставятся в очередь и звучат из главного цикла, не блокируя ввод
+            if len(self.current_letter) != 1:
+                # Этап не привязан к букве (как начальный диктант)
+                self.engine.emit("schedule", ("prompt", 8))
+                self.engine.emit("wait", delay=5500)
             else:
-                play_sound(sounds[6])
-                pygame.time.delay(4500)
-                letters[letter_code_map[self.current_letter.lower()]].play_sound()
+                self.engine.emit("schedule", ("prompt", 6))
+                self.engine.emit("schedule", ("letter", LETTER_TO_CELL[self.current_letter.lower()]), delay=4500)
 
             self.word_queue = iter(words)
             self.next_word()
 
         except StopIteration:
             self.clear_win()
-            play_sound(sounds[0])
+            self.store.flush()
+            self.engine.emit("schedule", ("prompt", 0))
             self.current_letter = None
             self.current_word = None
 
@@ -122,19 +116,18 @@ class DictationModule:
             return
         try:
             self.current_word = next(self.word_queue)
-            pygame.time.delay(2500)
-            play_sound(sounds[2])
-            pygame.time.delay(2500)
-            play_sound(words_for_dict[self.current_word])
+            self.engine.emit("schedule", ("prompt", 2), delay=2500)
+            self.engine.emit("schedule", ("word", self.current_word), delay=2500)
         except StopIteration:
             self.next_letter()
 
     def check_word(self, user_word):
         if user_word.lower() == "стоп":
-            play_sound(sounds[0])
-            self.braille_app.clear_win()
-            self.braille_app.s_word.clear()
-            self.braille_app.pin = 0
+            # Прерываем всё, что ещё звучит или ждёт очереди
+            self.engine.emit("stop_audio")
+            self.store.flush()
+            self.engine.emit("schedule", ("prompt", 0))
+            self.engine.clear_word()
             self.current_letter = None
             self.current_word = None
             return
@@ -142,33 +135,26 @@ class DictationModule:
         if not self.current_word:
             return
 
-        if user_word == self.current_word:
-            play_sound(sounds[5])
+        # Ответ уже получен: оставшиеся подсказки к этому слову больше не нужны
+        self.engine.emit("cancel_audio")
+        self.engine.emit("answer", (self.current_word, user_word))
+        # Пояснение показывается после clear_word (ниже), поэтому запоминаем его заранее
+        hint = describe(self.current_word, user_word)
+        if user_word == self.current_word.lower():
+            self.engine.emit("schedule", ("prompt", 5))
             self.update_student_progress(self.current_word, correct=True)
             self.next_word()
         else:
-            play_sound(sounds[4])
+            self.engine.emit("schedule", ("prompt", 4))
+            self.update_student_progress(self.current_word, correct=False, mistake=user_word)
             self.next_word()
 
-        self.braille_app.clear_win()
-        self.braille_app.s_word.clear()
-        self.braille_app.pin = 0
+        self.engine.clear_word()
+        if hint:
+            self.engine.emit("hint", hint)
 
     def update_student_progress(self, word, correct, mistake=None):
         dictation_key = "Начальный диктант" if self.current_letter == "Начальный диктант" else self.current_letter
-
-        if dictation_key not in self.student_data[self.student_id][self.today]:
-            self.student_data[self.student_id][self.today][dictation_key] = {
-                "errors": 0,
-                "mistakes": [],
-                "grade": 10
-            }
-
-        if not correct:
-            self.student_data[self.student_id][self.today][dictation_key]["errors"] += 1
-            self.student_data[self.student_id][self.today][dictation_key]["mistakes"].append(mistake)
-            self.student_data[self.student_id][self.today][dictation_key]["grade"] = max(
-                1, self.student_data[self.student_id][self.today][dictation_key]["grade"] - 1
-            )
-
-        self.save_progress()
+        # Дописываем один ответ (с тем, что набрал ученик) вместо перезаписи всей базы
+        self.store.record_answer(self.student_id, self.today, dictation_key, word, correct, mistake)
+        self.scheduler.record(word, correct)
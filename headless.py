@@ -0,0 +1,102 @@
+import argparse
+import random
+import time
+from braille_engine import BrailleEngine
+from braille_cell import SYMBOL_TO_CELL, cell_dots
+from progress_store import SqliteProgressStore, open_store
+import session_log
+from session_log import read_session
+
+
+def load_session(path):
+    """Входные события записанной сессии (журнал .blog или старый формат JSON lines)."""
+    return [event for _, event in read_session(path)]
+
+
+def replay(engine, events):
+    """Прогоняет события через движок без пауз; возвращает число полученных команд."""
+    commands = 0
+    commands += len(engine.start())
+    for event in events:
+        commands += len(engine.handle(event))
+    return commands
+
+
+def word_events(word):
+    """События, которыми ученик набирает слово: точки каждой буквы, затем "+"."""
+    events = []
+    for char in word:
+        cell = SYMBOL_TO_CELL.get(char, 0)
+        events.extend(("dot", dot - 1) for dot in cell_dots(cell))
+        events.append(("commit",))
+    return events
+
+
+def simulate_session(engine, student_id, error_rate=0.1, rng=random):
+    """Полный диктант виртуального ученика; возвращает число событий."""
+    events = [("mode",)] + [("id_char", char) for char in student_id] + [("id_enter",)]
+    for event in events:
+        engine.handle(event)
+    count = len(events)
+
+    dictation = engine.dictation_module
+    while dictation and dictation.current_word:
+        word = dictation.current_word.lower()
+        if rng.random() < error_rate:
+            word = word[:-1]  # ученик пропустил последнюю букву
+        for event in word_events(word) + [("submit",)]:
+            engine.handle(event)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Тренажёр без окна и звука: повтор сессий и нагрузочные прогоны")
+    parser.add_argument("sessions", nargs="*", help="файлы записанных сессий")
+    parser.add_argument("--simulate", type=int, default=0, help="сколько диктантов смоделировать")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0, help="seed моделирования: и ошибки, и выбор слов")
+    parser.add_argument("--persist", action="store_true",
+                        help="писать прогресс моделируемых диктантов в настоящее хранилище "
+                             "(повтор сессий его никогда не меняет)")
+    args = parser.parse_args()
+
+    store = open_store() if args.persist else SqliteProgressStore(":memory:")
+    rng = random.Random(args.seed)
+    events = 0
+    started = time.perf_counter()
+
+    for path in args.sessions:
+        if session_log.is_session_log(path):
+            # Журнал хранит дату, seed и состояние учеников: движок повторяет сессию и сверяет прозвучавшее
+            result = session_log.replay(path)
+            events += result["events"]
+            print(f"{path}: {result['events']} событий, {result['commands']} команд, "
+                  f"расхождений с журналом: {result['mismatches']}")
+            if result["first_mismatch"]:
+                print(f"  первое: запись {result['first_mismatch'][0]}, в журнале {result['first_mismatch'][1]}, "
+                      f"сейчас {result['first_mismatch'][2]}")
+            continue
+        session = load_session(path)
+        _, replay_store = session_log.replay_setup(path)
+        commands = replay(BrailleEngine(replay_store), session)
+        replay_store.close()
+        events += len(session)
+        print(f"{path}: {len(session)} событий, {commands} команд")
+
+    # Свой генератор для seed движков: выбор слов повторяется при том же --seed
+    engine_seeds = random.Random(args.seed)
+    for i in range(args.simulate):
+        engine = BrailleEngine(store, seed=engine_seeds.randrange(2 ** 32))
+        events += simulate_session(engine, f"sim{i}", args.error_rate, rng)
+
+    elapsed = time.perf_counter() - started
+    sessions = len(args.sessions) + args.simulate
+    if elapsed > 0 and sessions:
+        print(f"{sessions} сессий, {events} событий за {elapsed:.2f} с "
+              f"({sessions / elapsed:.1f} сессий/с, {events / elapsed:.0f} событий/с)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
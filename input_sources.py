@@ -0,0 +1,112 @@
+import threading
+import time
+import pygame
+from pygame.locals import *
+from tracing import tracer
+
+# Событие pygame с полем input — входным событием движка, например ("cell", 5)
+BRAILLE_INPUT = pygame.event.custom_type()
+
+# Клавиши цифрового блока -> номер точки (0..5), раскладка как у ячейки Брайля
+DOT_KEYS = {
+    K_KP7: 0, K_KP8: 3,
+    K_KP4: 1, K_KP5: 4,
+    K_KP1: 2, K_KP2: 5
+}
+
+# Остальные клавиши -> входные события движка
+KEY_EVENTS = {
+    K_KP_ENTER: ("letter",),
+    K_KP_PERIOD: ("phrase",),
+    K_SPACE: ("mode",),
+    K_KP_PLUS: ("commit",),
+    K_KP0: ("clear",),
+    K_KP_MINUS: ("submit",),
+}
+
+
+def post_input(engine_event):
+    """Кладёт событие движка в очередь pygame (можно вызывать из любого потока)."""
+    # При трассировке событие несёт момент постановки в очередь, чтобы учесть ожидание в ней
+    posted = tracer.now() if tracer.enabled else None
+    pygame.event.post(pygame.event.Event(BRAILLE_INPUT, input=tuple(engine_event), posted=posted))
+
+
+class InputSourceError(OSError):
+    """Источник ввода не запустился (например, матрица герконов не подключена)."""
+
+
+class InputSource:
+    """Источник ввода: сам кладёт события в общую очередь, главный цикл их не опрашивает."""
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+
+class KeyboardSource(InputSource):
+    """Цифровой блок клавиатуры; события KEYDOWN уже приходят в очередь pygame."""
+
+    def translate(self, event, engine):
+        if engine.waiting_for_student_id:
+            if event.key == K_BACKSPACE:
+                return ("id_backspace",)
+            if event.key == K_RETURN:
+                return ("id_enter",)
+            return ("id_char", event.unicode)
+        if event.key in DOT_KEYS:
+            return ("dot", DOT_KEYS[event.key])
+        return KEY_EVENTS.get(event.key)
+
+
+class SerialSource(InputSource):
+    """Матрица герконов: фоновый поток чтения сразу передаёт готовые ячейки в очередь."""
+
+    def __init__(self, port=None, debounce_ms=None):
+        self.port = port
+        self.debounce_ms = debounce_ms
+
+    def start(self):
+        from serial import SerialException
+        from serial_input import SerialReader, DEBOUNCE_MS
+        try:
+            self.reader = SerialReader(self.port, debounce_ms=self.debounce_ms or DEBOUNCE_MS, on_cell=self.on_cell)
+        except SerialException as e:
+            raise InputSourceError(f"Матрица герконов не найдена или недоступна: {e}") from e
+        self.reader.start()
+        print(f"Матрица герконов: {self.reader.port}")
+        return self
+
+    def on_cell(self, cell):
+        tracer.mark("serial.cell")
+        post_input(("cell", cell))
+
+    def stop(self):
+        self.reader.stop()
+
+
+class ReplaySource(InputSource):
+    """Воспроизводит записанную сессию с исходными паузами (speed > 1 — быстрее)."""
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        from session_log import read_session
+        started = time.monotonic()
+        for t, event in read_session(self.path):
+            delay = t / 1000 / self.speed - (time.monotonic() - started)
+            if delay > 0 and self._stop.wait(delay):
+                return
+            post_input(event)
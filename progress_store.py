@@ -0,0 +1,501 @@
+import abc
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from analytics import Analytics
+
+DB_FILE = "students_db.json"
+SQLITE_FILE = "students.sqlite3"
+JOURNAL_FILE = "students_db.journal"
+# Состояние повторения слов (spaced_repetition.py) для хранилищ в формате JSON
+MEMORY_FILE = "students_memory.json"
+# Журнал сбрасывается на диск пачкой раз в FLUSH_INTERVAL секунд,
+# а после COMPACT_EVERY записей фоновый поток сворачивает его в students_db.json
+FLUSH_INTERVAL = 1.0
+COMPACT_EVERY = 1000
+# Какое хранилище использовать: "sqlite" (по умолчанию) или "json" (старый формат)
+STORE_BACKEND = os.environ.get("BRAILLE_STORE", "sqlite")
+
+DATE_FORMAT = "%d-%m-%Y"
+START_GRADE = 10
+
+
+def date_key(date):
+    """Переводит дату "08-04-2025" в "2025-04-08", чтобы даты правильно сортировались."""
+    return datetime.datetime.strptime(date, DATE_FORMAT).strftime("%Y-%m-%d")
+
+
+def new_dictation_entry():
+    return {"errors": 0, "mistakes": [], "grade": START_GRADE}
+
+
+def apply_answer(entry, correct, mistake=None):
+    """Учитывает ответ в записи диктанта в формате students_db.json."""
+    if not correct:
+        entry["errors"] += 1
+        entry["mistakes"].append(mistake)
+        entry["grade"] = max(1, entry["grade"] - 1)
+
+
+class ProgressStore(abc.ABC):
+    """Общий интерфейс хранилищ прогресса учеников.
+
+    Все методы чтения возвращают данные в формате students_db.json:
+    {дата: {диктант: {"errors": ..., "mistakes": [...], "grade": ...}}}.
+    Хранилище без какого-либо из абстрактных методов не создаётся.
+    """
+
+    @abc.abstractmethod
+    def student_ids(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def student_history(self, student_id):
+        raise NotImplementedError
+
+    def completed_dictations(self, student_id, date):
+        return set(self.student_history(student_id).get(date, {}))
+
+    def count_students(self, search=""):
+        return len(self._matching_ids(search))
+
+    def find_students(self, search="", offset=0, limit=50):
+        """Страница ID учеников по алфавиту; search — подстрока ID."""
+        return self._matching_ids(search)[offset:offset + limit]
+
+    def _matching_ids(self, search):
+        return sorted(student_id for student_id in self.student_ids() if search in student_id)
+
+    def history_rows(self, student_id):
+        """Диктанты ученика по дате: [(дата, диктант, ошибок, оценка, [ошибки])]."""
+        history = self.student_history(student_id)
+        return [(date, dictation, info["errors"], info["grade"], info["mistakes"])
+                for date in sorted(history, key=date_key)
+                for dictation, info in history[date].items()]
+
+    @abc.abstractmethod
+    def record_answer(self, student_id, date, dictation, word, correct, typed=None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def word_states(self, student_id):
+        """Память ученика о словах: {слово: (ease, interval, reps, due, lapses)}."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_word_state(self, student_id, word, state):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def import_data(self, data):
+        raise NotImplementedError
+
+    def export_data(self):
+        return {student_id: self.student_history(student_id) for student_id in self.student_ids()}
+
+    def import_json(self, path=DB_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            self.import_data(json.load(f))
+
+    def export_json(self, path=DB_FILE):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.export_data(), f, ensure_ascii=False, indent=4)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class JsonProgressStore(ProgressStore):
+    """Старое хранилище: весь students_db.json и память слов перезаписываются после каждого ответа.
+
+    Оставлено как точка отсчёта для benchmarks/storage.py и как основа JournalProgressStore;
+    open_store его не открывает (BRAILLE_STORE=json — это JournalProgressStore).
+    """
+
+    def __init__(self, path=DB_FILE, memory_path=MEMORY_FILE):
+        self.path = path
+        self.memory_path = memory_path
+        self.data = self._load(path)
+        self.memory = self._load(memory_path)
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def student_ids(self):
+        return list(self.data)
+
+    def student_history(self, student_id):
+        return self.data.get(student_id, {})
+
+    def record_answer(self, student_id, date, dictation, word, correct, typed=None):
+        day = self.data.setdefault(student_id, {}).setdefault(date, {})
+        apply_answer(day.setdefault(dictation, new_dictation_entry()), correct, typed)
+        self.flush()
+
+    def word_states(self, student_id):
+        return {word: tuple(state) for word, state in self.memory.get(student_id, {}).items()}
+
+    def save_word_state(self, student_id, word, state):
+        self.memory.setdefault(student_id, {})[word] = list(state)
+        self.flush()
+
+    def import_data(self, data):
+        for student_id, dates in data.items():
+            self.data.setdefault(student_id, {}).update(dates)
+        self.flush()
+
+    def flush(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=4)
+        with open(self.memory_path, "w", encoding="utf-8") as f:
+            json.dump(self.memory, f, ensure_ascii=False)
+
+
+class JournalProgressStore(JsonProgressStore):
+    """Хранилище в формате students_db.json с журналом ответов (JSON lines).
+
+    Ответ дописывается в журнал одной строкой, fsync выполняется пачкой по
+    таймеру или в конце диктанта. Каждая запись хранит итоговое состояние
+    диктанта, поэтому повторное применение журнала после сбоя безопасно.
+    Сворачивание в снимок идёт в фоновом потоке и ответы не задерживает.
+    """
+
+    def __init__(self, path=DB_FILE, journal_path=JOURNAL_FILE, memory_path=MEMORY_FILE):
+        super().__init__(path, memory_path)
+        self.journal_path = journal_path
+        # Журнал, который сейчас сворачивается в снимок
+        self.old_journal_path = journal_path + ".old"
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._dirty = False
+        self._pending = 0
+        # Восстановление после сбоя: применяем записи, не попавшие в снимок
+        if self._replay():
+            self.compact()
+        self._journal = open(journal_path, "a", encoding="utf-8")
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _replay(self):
+        count = 0
+        for path in (self.old_journal_path, self.journal_path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # недописанная строка при аварийном завершении
+                        if "word_state" in record:
+                            self.memory.setdefault(record["student"], {})[record["word"]] = record["word_state"]
+                            count += 1
+                            continue
+                        day = self.data.setdefault(record["student"], {}).setdefault(record["date"], {})
+                        day[record["dictation"]] = record["entry"]
+                        count += 1
+            except FileNotFoundError:
+                pass
+        return count
+
+    def record_answer(self, student_id, date, dictation, word, correct, typed=None):
+        with self._lock:
+            # Словари ученика не меняются на месте, а заменяются копиями вдоль пути к записи:
+            # снимок для сворачивания в это время может обходить прежние
+            dates = self.data.get(student_id, {})
+            day = dates.get(date, {})
+            entry = day.get(dictation) or new_dictation_entry()
+            entry = dict(entry, mistakes=list(entry["mistakes"]))
+            apply_answer(entry, correct, typed)
+            self.data[student_id] = {**dates, date: {**day, dictation: entry}}
+            record = {"student": student_id, "date": date, "dictation": dictation, "entry": entry,
+                      "word": word, "correct": correct, "typed": typed, "ts": time.time()}
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._dirty = True
+            self._pending += 1
+
+    def save_word_state(self, student_id, word, state):
+        with self._lock:
+            self.memory[student_id] = {**self.memory.get(student_id, {}), word: list(state)}
+            record = {"student": student_id, "word": word, "word_state": list(state)}
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._dirty = True
+            self._pending += 1
+
+    def import_data(self, data):
+        with self._lock:
+            for student_id, dates in data.items():
+                self.data[student_id] = {**self.data.get(student_id, {}), **dates}
+        self.compact()
+
+    def flush(self):
+        """Сбрасывает накопленные записи журнала на диск одним fsync."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._dirty = False
+
+    def compact(self):
+        """Записывает снимки students_db.json и памяти слов, затем удаляет свёрнутый журнал.
+
+        Под блокировкой ответов копируются только словари верхнего уровня (словари
+        учеников не меняются на месте) и подменяется файл журнала; запись снимка
+        и fsync идут уже без неё.
+        """
+        with self._compact_lock:
+            with self._lock:
+                data, memory = dict(self.data), dict(self.memory)
+                old_journal = self._rotate_journal()
+                self._pending = 0
+            if old_journal:
+                old_journal.flush()
+                os.fsync(old_journal.fileno())
+                old_journal.close()
+            for path, snapshot, indent in ((self.path, data, 4), (self.memory_path, memory, None)):
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=indent)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            # Свёрнутый журнал удаляем только после того, как снимок надёжно записан
+            try:
+                os.remove(self.old_journal_path)
+            except FileNotFoundError:
+                pass
+
+    def _rotate_journal(self):
+        """Переносит журнал в old_journal_path и начинает новый; возвращает прежний файл (или None)."""
+        journal = getattr(self, "_journal", None)
+        if journal:
+            journal.flush()
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self.old_journal_path):
+                # Прошлое сворачивание не закончилось: его записи ещё не в снимке
+                with open(self.old_journal_path, "a", encoding="utf-8") as old, \
+                        open(self.journal_path, "r", encoding="utf-8") as current:
+                    shutil.copyfileobj(current, old)
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.old_journal_path)
+        if journal:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._dirty = False
+        return journal
+
+    def _flush_loop(self):
+        while not self._stop.wait(FLUSH_INTERVAL):
+            self.flush()
+            if self._pending >= COMPACT_EVERY:
+                self.compact()
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        self.compact()
+        self._journal.close()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL REFERENCES students(id),
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    dictation TEXT NOT NULL,
+    errors INTEGER NOT NULL DEFAULT 0,
+    grade INTEGER NOT NULL DEFAULT 10,
+    UNIQUE (student_id, date, dictation)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_student_day ON sessions (student_id, day);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    word TEXT,
+    correct INTEGER NOT NULL,
+    typed TEXT,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_session ON results (session_id);
+CREATE TABLE IF NOT EXISTS mistakes (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS mistakes_by_session ON mistakes (session_id);
+CREATE TABLE IF NOT EXISTS word_memory (
+    student_id TEXT NOT NULL,
+    word TEXT NOT NULL,
+    ease REAL NOT NULL,
+    interval INTEGER NOT NULL,
+    reps INTEGER NOT NULL,
+    due INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    PRIMARY KEY (student_id, word)
+);
+"""
+
+
+class SqliteProgressStore(ProgressStore):
+    """Хранилище на SQLite в режиме WAL: каждый ответ — одна короткая транзакция."""
+
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        # Ждём до 5 секунд, если базу в этот момент пишет другой экземпляр программы.
+        # Соединение можно передать в другой поток (сервер класса работает с базой из потока worker),
+        # но одновременно из нескольких потоков им пользоваться нельзя
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.analytics = Analytics(self.conn)
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM students LIMIT 1").fetchone() is None
+
+    def student_ids(self):
+        return [row[0] for row in self.conn.execute("SELECT id FROM students ORDER BY rowid")]
+
+    def count_students(self, search=""):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM students WHERE id LIKE ? ESCAPE '\\'", (self._pattern(search),)).fetchone()[0]
+
+    def find_students(self, search="", offset=0, limit=50):
+        # Страница берётся прямо по первичному ключу, весь список в память не читается
+        rows = self.conn.execute(
+            "SELECT id FROM students WHERE id LIKE ? ESCAPE '\\' ORDER BY id LIMIT ? OFFSET ?",
+            (self._pattern(search), limit, offset))
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _pattern(search):
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
+    def student_history(self, student_id):
+        history = {}
+        sessions = {}
+        rows = self.conn.execute(
+            "SELECT id, date, dictation, errors, grade FROM sessions"
+            " WHERE student_id = ? ORDER BY day, id", (student_id,))
+        for session_id, date, dictation, errors, grade in rows:
+            entry = {"errors": errors, "mistakes": [], "grade": grade}
+            history.setdefault(date, {})[dictation] = entry
+            sessions[session_id] = entry
+        if sessions:
+            rows = self.conn.execute(
+                "SELECT m.session_id, m.text FROM mistakes m JOIN sessions s ON s.id = m.session_id"
+                " WHERE s.student_id = ? ORDER BY m.id", (student_id,))
+            for session_id, text in rows:
+                sessions[session_id]["mistakes"].append(text)
+        return history
+
+    def completed_dictations(self, student_id, date):
+        rows = self.conn.execute(
+            "SELECT dictation FROM sessions WHERE student_id = ? AND date = ?", (student_id, date))
+        return {row[0] for row in rows}
+
+    def _session_id(self, student_id, date, dictation, errors=0, grade=START_GRADE):
+        self.conn.execute("INSERT OR IGNORE INTO students (id) VALUES (?)", (student_id,))
+        self.conn.execute(
+            "INSERT OR IGNORE INTO sessions (student_id, date, day, dictation, errors, grade)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (student_id, date, date_key(date), dictation, errors, grade))
+        return self.conn.execute(
+            "SELECT id FROM sessions WHERE student_id = ? AND date = ? AND dictation = ?",
+            (student_id, date, dictation)).fetchone()[0]
+
+    def record_answer(self, student_id, date, dictation, word, correct, typed=None):
+        with self.conn:
+            session_id = self._session_id(student_id, date, dictation)
+            self.conn.execute(
+                "INSERT INTO results (session_id, word, correct, typed, ts) VALUES (?, ?, ?, ?, ?)",
+                (session_id, word, int(correct), typed, time.time()))
+            self.analytics.record_answer(student_id, date_key(date), dictation, word, correct, typed)
+            if not correct:
+                self.conn.execute(
+                    "UPDATE sessions SET errors = errors + 1, grade = MAX(1, grade - 1) WHERE id = ?",
+                    (session_id,))
+                self.conn.execute(
+                    "INSERT INTO mistakes (session_id, text) VALUES (?, ?)", (session_id, typed))
+
+    def word_states(self, student_id):
+        rows = self.conn.execute(
+            "SELECT word, ease, interval, reps, due, lapses FROM word_memory WHERE student_id = ?", (student_id,))
+        return {row[0]: row[1:] for row in rows}
+
+    def save_word_state(self, student_id, word, state):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO word_memory (student_id, word, ease, interval, reps, due, lapses)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", (student_id, word, *state))
+
+    def import_data(self, data):
+        """Загружает данные в формате students_db.json (существующие диктанты заменяются)."""
+        with self.conn:
+            for student_id, dates in data.items():
+                self.conn.execute("INSERT OR IGNORE INTO students (id) VALUES (?)", (student_id,))
+                for date, dictations in dates.items():
+                    for dictation, info in dictations.items():
+                        session_id = self._session_id(student_id, date, dictation)
+                        self.conn.execute(
+                            "UPDATE sessions SET errors = ?, grade = ? WHERE id = ?",
+                            (info.get("errors", 0), info.get("grade", START_GRADE), session_id))
+                        self.conn.execute("DELETE FROM mistakes WHERE session_id = ?", (session_id,))
+                        self.conn.executemany(
+                            "INSERT INTO mistakes (session_id, text) VALUES (?, ?)",
+                            [(session_id, text) for text in info.get("mistakes", [])])
+        # Сводки отчётов пересчитываются вместе с перенесёнными диктантами
+        self.analytics.rebuild()
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store(backend=None):
+    """Открывает хранилище прогресса; при первом запуске SQLite переносит в него students_db.json."""
+    backend = backend or STORE_BACKEND
+    if backend == "json":
+        return JournalProgressStore(DB_FILE, JOURNAL_FILE)
+    if backend != "sqlite":
+        raise ValueError(f"Неизвестное хранилище прогресса: {backend}")
+
+    store = SqliteProgressStore(SQLITE_FILE)
+    if store.is_empty() and os.path.exists(DB_FILE):
+        store.import_json(DB_FILE)
+    return store
+
+
+if __name__ == "__main__":
+    # python progress_store.py import [файл.json] | export [файл.json]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export"):
+        print("Использование: python progress_store.py import|export [файл.json]")
+        sys.exit(1)
+    path = sys.argv[2] if len(sys.argv) > 2 else DB_FILE
+    store = SqliteProgressStore(SQLITE_FILE)
+    if sys.argv[1] == "import":
+        store.import_json(path)
+        print(f"Импортировано из {path}")
+    else:
+        store.export_json(path)
+        print(f"Экспортировано в {path}")
+    store.close()
@@ -1,87 +1,101 @@
 import pygame
-import os
-import sys
-from dictionaries import letter_code_map, dictations
+import curriculum_package
+from braille_cell import LETTER_TO_CELL
+from asset_cache import load_image, load_sound, LazyAssetMap, LazySoundList, use_bundle
+from asset_bundle import open_bundle
+from audio_manager import init_mixer, get_audio
 
-# Инициализация микшера перед загрузкой звуков
+# Инициализация микшера (с маленьким буфером) перед загрузкой звуков
+init_mixer()
 pygame.init()
-pygame.mixer.init()
-
-# Функция для получения корректного пути к ресурсам
-def resource_path(relative_path):
-    """Возвращает корректный путь для ресурсов, учитывая режим разработки и сборки."""
-    if getattr(sys, 'frozen', False):  # Если приложение собрано в exe
-        base_dir = sys._MEIPASS  # Используем временную папку, созданную PyInstaller
-    else:  # Если приложение запущено как скрипт
-        base_dir = os.path.dirname(os.path.abspath(__file__))  # Используем текущую директорию
-    return os.path.join(base_dir, relative_path)
 
 # Класс для представления буквы Брайля
 class BrailleLetter:
     def __init__(self, image_path, sound_path):
-        # Используем resource_path для загрузки ресурсов
-        self.image = pygame.image.load(resource_path(image_path)) if image_path else None
-        self.sound = pygame.mixer.Sound(resource_path(sound_path))
+        # Сами ресурсы загружаются при первом обращении и хранятся в общем LRU-кэше
+        self.image_path = image_path
+        self.sound_path = sound_path
+
+    @property
+    def image(self):
+        return load_image(self.image_path) if self.image_path else None
+
+    @property
+    def sound(self):
+        return load_sound(self.sound_path)
 
     def play_sound(self):
-        self.sound.play()
+        get_audio().play(self.sound, "letters")
+
+# Собранный бандл (python asset_bundle.py) избавляет от сканирования папок и декодирования Ogg
+bundle = open_bundle()
+use_bundle(bundle)
 
-# Пути к папкам с изображениями и звуками
-images_dir = 'images'
-sounds_dir = 'sounds'
+# Текущая программа (её могли заменить до импорта этого модуля)
+package = curriculum_package.get_active()
 
 # Словарь для хранения данных
 letters_data = {}
 
-# Обход файлов в папке с изображениями
-for image_file in os.listdir(images_dir):
-    if image_file.endswith('.png'):  # Проверяем, что это PNG-файл
-        # Извлекаем имя буквы из названия файла (например, "буква_а.png" -> "а")
-        letter_name = image_file.split('_')[-1].split('.')[0]
-        
-        # Формируем путь к изображению и звуку
-        image_path = os.path.join(images_dir, image_file)
-        sound_path = os.path.join(sounds_dir, f'{letter_name}.ogg')
-        
-        # Если звук существует, добавляем в словарь
-        if os.path.exists(resource_path(sound_path)):
-            # Получаем код буквы
-            letter_code = letter_code_map.get(letter_name, -1)
-            
-            # Добавляем в словарь
-            letters_data[letter_code] = (image_path, sound_path)
-        else:
-            print(f"Ошибка: звук для буквы {letter_name} не найден: {sound_path}")
+if bundle:
+    letters_data.update(bundle.letters)
+else:
+    # Пути к картинкам и звукам букв уже проверены при сборке индекса пакета программы
+    for letter_name, info in package.letters.items():
+        if info['sound']:
+            letters_data[LETTER_TO_CELL[letter_name]] = (info['image'], info['sound'])
 
 # Добавляем специальный случай для перенабора
-letters_data[-1] = (None, os.path.join(sounds_dir, 'набрать букву заново.ogg'))
+letters_data[-1] = (None, package.retry_sound)
 
-# Создаем словарь с объектами BrailleLetter
+# Создаем словарь с объектами BrailleLetter (без загрузки файлов)
 letters = {pin: BrailleLetter(image_path, sound_path) for pin, (image_path, sound_path) in letters_data.items()}
 
 # Словарь с изображениями букв Брайля
-images = {pin: letter.image for pin, letter in letters.items() if letter.image}
+image_paths = {pin: image_path for pin, (image_path, _) in letters_data.items() if image_path}
 
 # Добавляем пробел, если его нет
-if 0 not in images:
-    images[0] = pygame.image.load(resource_path('images/пробел.png'))
+if 0 not in image_paths:
+    image_paths[0] = 'images/пробел.png'
+
+images = LazyAssetMap(image_paths, load_image)
     
-# Путь к папке со звуками слов
-words_sounds_dir = os.path.join(sounds_dir, 'words')
+def word_sound_paths_for(package):
+    """Пути к звукам слов программы; None — звука нет, слово произносит синтезатор речи."""
+    if bundle and all(word in bundle.words for word in package.word_sounds):
+        return {word: bundle.words[word] for word in package.word_sounds}
+    return dict(package.word_sounds)
 
-# Словарь для хранения звуков слов
-words_for_dict = {}
 
 # Создаем плоский список всех слов из dictations
-all_words = []
-for letter_words in dictations.values():
-    all_words.extend(letter_words)
-
-# Загружаем звуки для каждого слова
-for word in all_words:
-    sound_path = os.path.join(words_sounds_dir, f'{word}.ogg')
-    if os.path.exists(resource_path(sound_path)):
-        words_for_dict[word] = pygame.mixer.Sound(resource_path(sound_path))
-    else:
-        print(f"Предупреждение: звук для слова '{word}' не найден: {sound_path}")
-        words_for_dict[word] = None
\ No newline at end of file
+all_words = list(package.word_sounds)
+
+# Словарь для хранения звуков слов; сами звуки декодируются при первом воспроизведении
+words_for_dict = LazyAssetMap(word_sound_paths_for(package), load_sound, key=curriculum_package.sound_key)
+
+# Звуковые подсказки; файлы декодируются только при первом воспроизведении
+sounds = LazySoundList(package.prompts)
+
+
+def use_curriculum(new_package):
+    """Переключает звуки слов и подсказок на другую программу (буквы остаются прежними)."""
+    all_words[:] = new_package.word_sounds
+    # Объекты те же, поэтому модули, импортировавшие их по имени, видят новую программу
+    words_for_dict.set_paths(word_sound_paths_for(new_package))
+    sounds.set_paths(new_package.prompts)
+
+
+curriculum_package.add_listener(use_curriculum)
+
+
+def get_sound(key):
+    """Звук по ключу команды движка: ("prompt", i), ("letter", ячейка) или ("word", слово)."""
+    kind, value = key
+    if kind == "prompt":
+        return sounds[value]
+    if kind == "letter":
+        letter = letters.get(value)
+        return letter.sound if letter else None
+    if kind == "word":
+        return words_for_dict.get(value)
+    raise ValueError(f"Неизвестный звук: {key}")
@@ -0,0 +1,226 @@
+import os
+import queue
+import threading
+import time
+import serial
+from serial.tools import list_ports
+from braille_cell import cell_from_dots
+
+BAUDRATE = 9600
+# Сколько миллисекунд набор точек должен не меняться, чтобы считаться устойчивым.
+# Дребезг контактов уже отфильтрован прошивкой (debounceMs в braille04.ino), поэтому здесь
+# то же значение: больше — и короткие аккорды теряются. Для другой прошивки — BRAILLE_DEBOUNCE_MS
+DEBOUNCE_MS = int(os.environ.get("BRAILLE_DEBOUNCE_MS", 5))
+# Без нажатий поток чтения спит в read() до байта с устройства; таймаут (с) нужен только,
+# чтобы заметить stop() там, где чтение нельзя прервать (cancel_read)
+IDLE_TIMEOUT = 0.5
+# Порт можно задать явно; иначе ищем плату среди подключённых устройств
+PORT = os.environ.get("BRAILLE_PORT")
+# USB-идентификаторы производителей плат Arduino и типовых USB-UART мостов
+KNOWN_VIDS = {0x2341, 0x2A03, 0x1A86, 0x0403, 0x10C4}
+
+# У матрицы нет клавиш, поэтому режим, ввод кода и отправка слова — служебные аккорды:
+# ячейки, которых нет ни в алфавите, ни среди знаков таблицы перевода
+SUBMIT_CHORD = cell_from_dots(1, 2, 3, 4, 5, 6)  # отправить слово / закончить ввод кода
+MODE_CHORD = cell_from_dots(4, 5, 6)             # свободный набор <-> диктант
+CLEAR_CHORD = cell_from_dots(1, 2, 4, 5, 6)      # стереть слово / последнюю цифру кода
+# Код ученика набирается цифрами Брайля без цифрового знака: 1 — точка 1, ... 0 — точки 2, 4, 5
+DIGIT_CHORDS = {cell_from_dots(*map(int, dots)): digit for digit, dots in
+                {"1": "1", "2": "12", "3": "14", "4": "145", "5": "15",
+                 "6": "124", "7": "1245", "8": "125", "9": "24", "0": "245"}.items()}
+
+
+def find_port():
+    """Находит порт матрицы герконов: сначала BRAILLE_PORT, затем известные платы."""
+    if PORT:
+        return PORT
+    ports = list(list_ports.comports())
+    for info in ports:
+        if info.vid in KNOWN_VIDS or "arduino" in (info.description or "").lower():
+            return info.device
+    return ports[0].device if ports else None
+
+
+class ChordDetector:
+    """Собирает аккорд: ячейка выдаётся, когда все точки отпущены.
+
+    Состояние, которое держится меньше debounce_ms, считается дребезгом.
+    Точки, нажатые не одновременно, объединяются в одну ячейку.
+    """
+
+    def __init__(self, debounce_ms=DEBOUNCE_MS):
+        self.debounce_ms = debounce_ms
+        self.raw = 0
+        self.raw_since = 0
+        self.stable = 0
+        self.chord = 0
+
+    def feed(self, mask, now):
+        """Новое состояние точек с устройства; возвращает ячейку или None."""
+        if mask != self.raw:
+            self.raw = mask
+            self.raw_since = now
+        return self.poll(now)
+
+    def deadline(self):
+        """Когда (мс) текущее состояние станет устойчивым; None — ждать нечего."""
+        return self.raw_since + self.debounce_ms if self.raw != self.stable else None
+
+    def poll(self, now):
+        """Проверка по времени, когда новых данных нет (момент отпускания может прийти последним)."""
+        if self.raw != self.stable and now - self.raw_since >= self.debounce_ms:
+            self.stable = self.raw
+            if self.stable:
+                self.chord |= self.stable
+            elif self.chord:
+                cell, self.chord = self.chord, 0
+                return cell
+        return None
+
+
+def chord_event(cell, waiting_for_student_id=False):
+    """Входное событие движка для ячейки с матрицы (None — ячейка ничего не значит)."""
+    if waiting_for_student_id:
+        if cell == SUBMIT_CHORD:
+            return ("id_enter",)
+        if cell == CLEAR_CHORD:
+            return ("id_backspace",)
+        return ("id_char", DIGIT_CHORDS[cell]) if cell in DIGIT_CHORDS else None
+    if cell == SUBMIT_CHORD:
+        return ("submit",)
+    if cell == MODE_CHORD:
+        return ("mode",)
+    if cell == CLEAR_CHORD:
+        return ("clear",)
+    return ("cell", cell)
+
+
+class SerialReader:
+    """Читает устройство в фоновом потоке и складывает готовые ячейки в очередь cells."""
+
+    def __init__(self, port=None, baudrate=BAUDRATE, debounce_ms=DEBOUNCE_MS, on_cell=None):
+        self.port = port or find_port()
+        if self.port is None:
+            raise serial.SerialException("Матрица герконов не найдена")
+        # Таймаут чтения меняется в _run: до конца антидребезга или IDLE_TIMEOUT
+        self.serial = serial.Serial(self.port, baudrate, timeout=IDLE_TIMEOUT)
+        self.detector = ChordDetector(debounce_ms)
+        self.cells = queue.Queue()
+        self.on_cell = on_cell
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if hasattr(self.serial, "cancel_read"):
+            self.serial.cancel_read()
+        self._thread.join(timeout=1)
+        self.serial.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Опроса нет: чтение ждёт байта, а пока состояние точек не устоялось —
+            # не дольше, чем до момента, когда оно устоится (отпускание может прийти последним)
+            deadline = self.detector.deadline()
+            timeout = IDLE_TIMEOUT if deadline is None else max(0.0, deadline - time.monotonic() * 1000) / 1000
+            try:
+                if self.serial.timeout != timeout:
+                    self.serial.timeout = timeout
+                data = self.serial.read(1)
+            except serial.SerialException as e:
+                print(f"Ошибка чтения порта {self.port}: {e}")
+                break
+            now = time.monotonic() * 1000
+            cell = self.detector.feed(data[0] & 0x3F, now) if data else self.detector.poll(now)
+            if cell is not None:
+                # С обработчиком ячейки уходят сразу ему, иначе копятся в очереди
+                if self.on_cell:
+                    self.on_cell(cell)
+                else:
+                    self.cells.put(cell)
+
+
+class FakeDevice:
+    """Поддельная матрица на псевдотерминале (Linux/macOS) для проверки без железа."""
+
+    def __init__(self):
+        import pty
+        self.master, self.slave = pty.openpty()
+        self.port = os.ttyname(self.slave)
+
+    def send(self, mask):
+        os.write(self.master, bytes([mask]))
+
+    def chord(self, cell, hold=0.05):
+        """Нажимает и отпускает точки ячейки, как ученик на устройстве."""
+        self.send(cell)
+        time.sleep(hold)
+        self.send(0)
+        time.sleep(hold)
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def selftest(debounce_ms=DEBOUNCE_MS):
+    """Проверяет чтение и сборку аккордов через FakeDevice; возвращает True, если всё сошлось."""
+    hold = max(debounce_ms * 3, 10) / 1000
+    # (название, действия: маска точек и пауза в секундах, ожидаемая ячейка)
+    cases = [
+        ("аккорд", [(0b000011, hold), (0, hold)], 0b000011),
+        ("точки нажаты по очереди", [(0b000001, hold), (0b001001, hold), (0b001000, hold), (0, hold)], 0b001001),
+        ("отпущены по очереди", [(0b010101, hold), (0b000100, hold), (0, hold)], 0b010101),
+        ("дребезг при нажатии", [(0b000010, 0.001), (0, 0.001), (0b000010, hold), (0, hold)], 0b000010),
+    ]
+    device = FakeDevice()
+    reader = SerialReader(device.port, debounce_ms=debounce_ms).start()
+    ok = True
+    try:
+        for name, steps, expected in cases:
+            for mask, pause in steps[:-1]:
+                device.send(mask)
+                time.sleep(pause)
+            released = time.monotonic()
+            device.send(steps[-1][0])
+            try:
+                cell = reader.cells.get(timeout=1)
+                latency = (time.monotonic() - released) * 1000
+            except queue.Empty:
+                cell, latency = None, None
+            passed = cell == expected
+            ok = ok and passed
+            print(f"{'ok ' if passed else 'ОШИБКА'} {name}: ждали {expected:06b}, получили "
+                  f"{'ничего' if cell is None else format(cell, '06b')}"
+                  + (f", {latency:.1f} мс после отпускания" if latency is not None else ""))
+            time.sleep(hold)
+    finally:
+        reader.stop()
+        device.close()
+    return ok
+
+
+if __name__ == "__main__":
+    # python serial_input.py --selftest | python serial_input.py [--port PORT]  (печатает ячейки)
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Чтение матрицы герконов")
+    parser.add_argument("--port", help="последовательный порт (по умолчанию ищется автоматически)")
+    parser.add_argument("--debounce", type=int, default=DEBOUNCE_MS, metavar="MS")
+    parser.add_argument("--selftest", action="store_true", help="проверить чтение на поддельном устройстве (pty)")
+    args = parser.parse_args()
+
+    if args.selftest:
+        sys.exit(0 if selftest(args.debounce) else 1)
+    reader = SerialReader(args.port, debounce_ms=args.debounce).start()
+    print(f"Матрица герконов: {reader.port}")
+    try:
+        while True:
+            cell = reader.cells.get()
+            print(f"{cell:06b} точки {', '.join(str(i + 1) for i in range(6) if cell & (1 << i))}")
+    except KeyboardInterrupt:
+        reader.stop()
@@ -0,0 +1,384 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+# Журнал сессии (.blog): что нажимал ученик и что ему прозвучало.
+#   MAGIC, u32 длина заголовка, заголовок JSON (дата, seed, режим, программа)
+#   чанки: CHUNK_HEADER (байт сжатых данных, байт несжатых, записей, время первой записи в мс) + zlib
+#   запись: varint приращения времени в мс, байт вида (KINDS), значение по типу вида
+# Заголовки чанков позволяют посчитать события и длительность, не распаковывая данные.
+MAGIC = b"BRLSLOG1"
+LOG_VERSION = 1
+CHUNK_HEADER = struct.Struct("<IIII")
+CHUNK_EVENTS = 4096   # записей в чанке
+CHUNK_SECONDS = 5.0   # чанк отдаётся на запись не реже, чем раз в столько секунд
+SESSIONS_DIR = "sessions"
+LOG_EXT = ".blog"
+
+# Виды записей: (имя, тип значения: None, "byte", "str", "strs" или "json")
+KINDS = [
+    # Входные события движка
+    ("dot", "byte"), ("cell", "byte"), ("letter", None), ("phrase", None), ("mode", None),
+    ("commit", None), ("clear", None), ("submit", None),
+    ("id_char", "str"), ("id_backspace", None), ("id_enter", None),
+    # Что прозвучало и что ответил ученик: (слово, набранное)
+    ("prompt", "byte"), ("word", "str"), ("speak", "str"), ("answer", "strs"),
+    # Состояние ученика перед диктантом: от него зависит выбор слов
+    ("student", "json"),
+]
+KIND_INDEX = {name: i for i, (name, _) in enumerate(KINDS)}
+INPUT_KINDS = {"dot", "cell", "letter", "phrase", "mode", "commit", "clear", "submit",
+               "id_char", "id_backspace", "id_enter"}
+
+
+class SessionLogError(ValueError):
+    pass
+
+
+def new_log_path(directory=SESSIONS_DIR):
+    """Новый файл журнала с датой и временем в имени."""
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, time.strftime("%Y-%m-%d_%H%M%S"))
+    path, number = base + LOG_EXT, 1
+    while os.path.exists(path):
+        number += 1
+        path = f"{base}_{number}{LOG_EXT}"
+    return path
+
+
+def is_session_log(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def output_records(commands):
+    """Записи журнала для команд движка: подсказки, слова, речь и ответы."""
+    for command in commands:
+        if command.kind in ("play", "schedule") and command.arg[0] in ("prompt", "word"):
+            yield command.arg
+        elif command.kind == "speak":
+            yield "speak", command.arg[0]
+        elif command.kind in ("answer", "student"):
+            yield command.kind, command.arg
+
+
+# Кодирование
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_str(out, text):
+    data = text.encode("utf-8")
+    _write_varint(out, len(data))
+    out += data
+
+
+def encode(records):
+    """[(время, вид, значение)] -> байты чанка (до сжатия)."""
+    out = bytearray()
+    previous = records[0][0]
+    for t, kind, value in records:
+        _write_varint(out, t - previous)
+        previous = t
+        out.append(kind)
+        value_type = KINDS[kind][1]
+        if value_type == "byte":
+            out.append(value)
+        elif value_type == "str":
+            _write_str(out, value)
+        elif value_type == "strs":
+            _write_varint(out, len(value))
+            for text in value:
+                _write_str(out, text or "")
+        elif value_type == "json":
+            _write_str(out, json.dumps(value, ensure_ascii=False))
+    return out
+
+
+def decode(data, t):
+    """Байты чанка -> [(время, имя вида, значение)]; t — время первой записи."""
+    records = []
+    pos, end = 0, len(data)
+
+    def varint():
+        nonlocal pos
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def text():
+        nonlocal pos
+        length = varint()
+        pos += length
+        return data[pos - length:pos].decode("utf-8")
+
+    while pos < end:
+        t += varint()
+        name, value_type = KINDS[data[pos]]
+        pos += 1
+        if value_type == "byte":
+            value = data[pos]
+            pos += 1
+        elif value_type == "str":
+            value = text()
+        elif value_type == "strs":
+            value = tuple(text() for _ in range(varint()))
+        elif value_type == "json":
+            value = json.loads(text())
+        else:
+            value = None
+        records.append((t, name, value))
+    return records
+
+
+class SessionLog:
+    """Запись журнала: на нажатие — только добавление в список, сжатие и запись идут в фоновом потоке.
+
+    Поток записи сам забирает чанк, которому больше CHUNK_SECONDS: у простаивающей станции
+    последние нажатия попадают в файл, даже если следующих событий нет, а программа упадёт.
+    """
+
+    def __init__(self, path, meta=None):
+        self.path = path
+        self.file = open(path, "wb")
+        header = json.dumps({"version": LOG_VERSION, "started": time.time(), **(meta or {})},
+                            ensure_ascii=False).encode("utf-8")
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self.started = self.chunk_started = time.monotonic()
+        self.pending = []
+        self.lock = threading.Lock()  # pending и chunk_started меняют оба потока
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add(self, kind, value=None):
+        now = time.monotonic()
+        with self.lock:
+            if not self.pending:
+                self.chunk_started = now  # возраст чанка считается от его первой записи
+            self.pending.append((int((now - self.started) * 1000), KIND_INDEX[kind], value))
+            if len(self.pending) >= CHUNK_EVENTS or now - self.chunk_started > CHUNK_SECONDS:
+                self._flush()
+
+    def record(self, engine_event):
+        """Входное событие движка (интерфейс записи сессии BrailleApp)."""
+        if engine_event[0] in INPUT_KINDS:
+            self.add(engine_event[0], engine_event[1] if len(engine_event) > 1 else None)
+
+    def record_commands(self, commands):
+        for kind, value in output_records(commands):
+            self.add(kind, value)
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        # Под блокировкой: чанки попадают в очередь в том же порядке, в каком набирались
+        if self.pending:
+            self.queue.put(self.pending)
+            self.pending = []
+        self.chunk_started = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def _next_chunk(self):
+        """Следующий чанк из очереди; пока её нет — ждёт, пока текущему чанку не исполнится CHUNK_SECONDS."""
+        while True:
+            timeout = max(0.0, self.chunk_started + CHUNK_SECONDS - time.monotonic()) if self.pending else CHUNK_SECONDS
+            try:
+                return self.queue.get(timeout=timeout)
+            except queue.Empty:
+                with self.lock:
+                    if self.pending and time.monotonic() - self.chunk_started >= CHUNK_SECONDS:
+                        self._flush()
+
+    def _run(self):
+        while (records := self._next_chunk()) is not None:
+            raw = encode(records)
+            data = zlib.compress(raw, 6)
+            self.file.write(CHUNK_HEADER.pack(len(data), len(raw), len(records), records[0][0]) + data)
+            self.file.flush()
+
+
+# Чтение
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise SessionLogError(f"{f.name}: это не журнал сессии")
+    (length,) = struct.unpack("<I", f.read(4))
+    meta = json.loads(f.read(length).decode("utf-8"))
+    if meta.get("version") != LOG_VERSION:
+        raise SessionLogError(f"{f.name}: версия журнала {meta.get('version')} не поддерживается")
+    return meta
+
+
+def _chunk_headers(f):
+    while header := f.read(CHUNK_HEADER.size):
+        if len(header) < CHUNK_HEADER.size:
+            return  # запись оборвалась (программу закрыли аварийно): неполный чанк пропускаем
+        size, raw_size, count, first = CHUNK_HEADER.unpack(header)
+        yield f.tell(), size, raw_size, count, first
+        f.seek(size, os.SEEK_CUR)
+
+
+def scan(path):
+    """Сводка по журналу без распаковки: заголовок, чанки, события, длительность, байты."""
+    with open(path, "rb") as f:
+        meta = _read_header(f)
+        chunks = list(_chunk_headers(f))
+    return {
+        "meta": meta,
+        "chunks": len(chunks),
+        "events": sum(chunk[3] for chunk in chunks),
+        "first_ms": chunks[0][4] if chunks else 0,
+        "last_chunk_ms": chunks[-1][4] if chunks else 0,
+        "raw_bytes": sum(chunk[2] for chunk in chunks),
+        "bytes": os.path.getsize(path),
+    }
+
+
+def read_log(path):
+    """(заголовок, генератор записей (время, вид, значение))."""
+    f = open(path, "rb")
+    try:
+        meta = _read_header(f)
+    except (ValueError, struct.error):
+        f.close()
+        raise
+
+    def records():
+        with f:
+            for offset, size, _, _, first in list(_chunk_headers(f)):
+                f.seek(offset)
+                data = f.read(size)
+                if len(data) < size:
+                    return
+                yield from decode(zlib.decompress(data), first)
+
+    return meta, records()
+
+
+def read_session(path):
+    """Входные события сессии: [(время в мс, событие движка)]; понимает и старый формат JSON lines."""
+    if not is_session_log(path):
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    events.append((record["t"], tuple(record["event"])))
+        return events
+    _, records = read_log(path)
+    return [(t, (kind,) if value is None else (kind, value)) for t, kind, value in records if kind in INPUT_KINDS]
+
+
+def restore_students(records, store):
+    """Возвращает в хранилище состояние учеников на начало сессии.
+
+    Берётся первый снимок каждого ученика: последующие изменения воспроизведение повторит само.
+    """
+    restored = set()
+    for _, kind, value in records:
+        if kind == "student" and value["id"] not in restored:
+            restored.add(value["id"])
+            store.import_data({value["id"]: value["history"]})
+            for word, state in value["word_states"].items():
+                store.save_word_state(value["id"], word, state)
+
+
+def replay_setup(path):
+    """Заголовок журнала и хранилище в памяти с состоянием учеников на начало сессии.
+
+    Воспроизведение пишет ответы только в это хранилище, настоящее не меняется.
+    Для старого формата JSON lines заголовка и снимков нет: хранилище пустое.
+    """
+    from progress_store import SqliteProgressStore
+    store = SqliteProgressStore(":memory:")
+    if not is_session_log(path):
+        return {}, store
+    meta, records = read_log(path)
+    restore_students(records, store)
+    return meta, store
+
+
+def engine_options(meta):
+    """Параметры BrailleEngine, с которыми была записана сессия."""
+    return {"mode": meta.get("mode", "free"), "today": meta.get("today"), "seed": meta.get("seed")}
+
+
+def replay(path):
+    """Прогоняет сессию через движок без пауз и сверяет прозвучавшее с журналом.
+
+    Возвращает {"events", "commands", "mismatches", "first_mismatch"}; расхождения бывают,
+    если изменились движок или программа диктантов.
+    """
+    from braille_engine import BrailleEngine
+    meta, store = replay_setup(path)
+    engine = BrailleEngine(store, **engine_options(meta))
+    _, records = read_log(path)
+    logged, produced = [], []
+    commands = engine.start()
+    produced.extend(output_records(commands))
+    count = len(commands)
+    events = 0
+    for _, kind, value in records:
+        if kind in INPUT_KINDS:
+            commands = engine.handle((kind,) if value is None else (kind, value))
+            produced.extend(output_records(commands))
+            count += len(commands)
+            events += 1
+        else:
+            logged.append((kind, value))
+    store.close()
+    mismatches = [i for i, (a, b) in enumerate(zip(logged, produced)) if a != b]
+    mismatches += list(range(min(len(logged), len(produced)), max(len(logged), len(produced))))
+    first = mismatches[0] if mismatches else None
+    return {
+        "events": events,
+        "commands": count,
+        "mismatches": len(mismatches),
+        "first_mismatch": None if first is None else (
+            first, logged[first] if first < len(logged) else None, produced[first] if first < len(produced) else None),
+    }
+
+
+if __name__ == "__main__":
+    # python session_log.py info|dump ФАЙЛ ...
+    import argparse
+    parser = argparse.ArgumentParser(description="Журналы сессий: сводка и просмотр")
+    parser.add_argument("command", choices=["info", "dump"])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--kinds", nargs="+", choices=[name for name, _ in KINDS],
+                        help="dump: только эти записи (например, answer — ответы ученика)")
+    args = parser.parse_args()
+
+    for path in args.files:
+        if args.command == "info":
+            info = scan(path)
+            meta = info["meta"]
+            print(f"{path}: {meta.get('today')} режим {meta.get('mode')}, {info['events']} записей "
+                  f"в {info['chunks']} чанках, {info['last_chunk_ms'] / 1000:.0f}+ с, "
+                  f"{info['bytes']} байт (без сжатия {info['raw_bytes']})")
+        else:
+            _, records = read_log(path)
+            for t, kind, value in records:
+                if not args.kinds or kind in args.kinds:
+                    print(f"{t / 1000:10.3f} {kind} {'' if value is None else value}")
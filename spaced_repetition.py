@@ -0,0 +1,85 @@
+import datetime
+import heapq
+from collections import namedtuple
+from progress_store import DATE_FORMAT
+
+# Память ученика о слове (SM-2): ease — лёгкость, interval — через сколько дней повторить,
+# reps — правильных ответов подряд, due — день повторения (порядковый номер даты), lapses — ошибок всего
+WordState = namedtuple("WordState", ["ease", "interval", "reps", "due", "lapses"])
+
+START_EASE = 2.5
+MIN_EASE = 1.3
+# Слово выучено, если отвечено верно MASTERED_REPS раз подряд и повторять его ещё рано
+MASTERED_REPS = 2
+
+
+def day_number(date):
+    """Дата в формате хранилища ("08-04-2025") -> номер дня."""
+    return datetime.datetime.strptime(date, DATE_FORMAT).date().toordinal()
+
+
+def review(state, correct, day):
+    """Новое состояние слова после ответа (SM-2: верно — качество 5, ошибка — 1)."""
+    ease, interval, reps, due, lapses = state or (START_EASE, 0, 0, day, 0)
+    if correct:
+        reps += 1
+        interval = 1 if reps == 1 else 6 if reps == 2 else round(interval * ease)
+        ease += 0.1
+    else:
+        # Ошибка: слово повторяется в тот же день, интервалы начинаются заново
+        reps = 0
+        interval = 0
+        lapses += 1
+        ease = max(MIN_EASE, ease - 0.8)
+    return WordState(ease, interval, reps, day + interval, lapses)
+
+
+class Scheduler:
+    """Очередь повторения слов одного ученика.
+
+    Слова лежат в куче по (день повторения, -ошибки), поэтому выбор очередного
+    слова — O(log n). Устаревшие записи кучи пропускаются при извлечении.
+    """
+
+    def __init__(self, student_id, store, today):
+        self.student_id = student_id
+        self.store = store
+        self.day = day_number(today)
+        self.states = {word: WordState(*state) for word, state in store.word_states(student_id).items()}
+        self.heap = [(state.due, -state.lapses, word) for word, state in self.states.items()]
+        heapq.heapify(self.heap)
+
+    def is_mastered(self, word):
+        state = self.states.get(word)
+        return state is not None and state.reps >= MASTERED_REPS and state.due > self.day
+
+    def mistakes(self):
+        """{слово: сколько раз ученик в нём ошибался} — веса для выбора слов."""
+        return {word: state.lapses for word, state in self.states.items() if state.lapses}
+
+    def due_words(self, count, allowed=None, exclude=()):
+        """До count слов, которые пора повторить, начиная с самых просроченных.
+
+        allowed(word) — можно ли дать это слово на текущем этапе.
+        """
+        selected = []
+        skipped = []
+        while self.heap and len(selected) < count and self.heap[0][0] <= self.day:
+            entry = heapq.heappop(self.heap)
+            due, lapses, word = entry
+            state = self.states.get(word)
+            if state is None or (state.due, -state.lapses) != (due, lapses):
+                continue  # запись устарела: на слово уже ответили после неё
+            skipped.append(entry)
+            if word not in exclude and (allowed is None or allowed(word)):
+                selected.append(word)
+        # Слова остаются в куче, пока на них не ответят
+        for entry in skipped:
+            heapq.heappush(self.heap, entry)
+        return selected
+
+    def record(self, word, correct):
+        state = review(self.states.get(word), correct, self.day)
+        self.states[word] = state
+        heapq.heappush(self.heap, (state.due, -state.lapses, word))
+        self.store.save_word_state(self.student_id, word, state)
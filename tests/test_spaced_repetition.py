@@ -0,0 +1,25 @@
+from progress_store import SqliteProgressStore
+from spaced_repetition import Scheduler
+
+TODAY = "08-04-2025"
+
+
+def test_word_missed_twice_is_due_once():
+    store = SqliteProgressStore(":memory:")
+    scheduler = Scheduler("1", store, TODAY)
+    scheduler.record("мама", correct=False)
+    scheduler.record("мама", correct=False)
+    scheduler.record("папа", correct=False)
+
+    assert scheduler.due_words(5) == ["мама", "папа"]
+    # Повторный выбор даёт те же слова: записи остаются в куче до ответа
+    assert scheduler.due_words(5) == ["мама", "папа"]
+
+
+def test_scheduler_restored_from_store_after_two_misses():
+    store = SqliteProgressStore(":memory:")
+    scheduler = Scheduler("1", store, TODAY)
+    scheduler.record("мама", correct=False)
+    scheduler.record("мама", correct=False)
+
+    assert Scheduler("1", store, TODAY).due_words(5) == ["мама"]
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Сколько последних замеров хранить; старые вытесняются
+TRACE_CAPACITY = 100000
+
+
+class _NullSpan:
+    """Замер, который ничего не делает: используется, когда трассировка выключена."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Tracer:
+    """Кольцевой буфер замеров времени: (имя, начало нс, длительность нс, поток).
+
+    Этапы пути от нажатия до звука и кадра:
+      input.received -> engine.handle -> asset.load -> audio.play -> frame.present,
+    а сквозные задержки записываются как latency.input_to_audio и latency.input_to_frame.
+    """
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.enabled = False
+        self.records = deque(maxlen=capacity)
+        self.input_started = None  # начало обработки последнего ещё не показанного ввода
+        self.input_heard = False
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def now(self):
+        return time.perf_counter_ns()
+
+    def add(self, name, start, duration=0):
+        self.records.append((name, start, duration, threading.get_ident()))
+
+    def span(self, name):
+        """with tracer.span("имя"): ... — замер участка кода."""
+        return _Span(self, name) if self.enabled else NULL_SPAN
+
+    def mark(self, name):
+        """Мгновенное событие."""
+        if self.enabled:
+            self.add(name, time.perf_counter_ns())
+
+    def input_received(self, posted=None):
+        """Начало обработки ввода; posted — когда событие положили в очередь (из другого потока)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if posted is not None:
+            self.add("input.queue", posted, now - posted)
+        self.input_started = posted if posted is not None else now
+        self.input_heard = False
+        self.add("input.received", now)
+
+    def audio_started(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self.add("audio.play", now)
+        if self.input_started is not None and not self.input_heard:
+            self.add("latency.input_to_audio", self.input_started, now - self.input_started)
+            self.input_heard = True
+
+    def frame_presented(self, start):
+        now = time.perf_counter_ns()
+        self.add("frame.present", start, now - start)
+        if self.input_started is not None:
+            self.add("latency.input_to_frame", self.input_started, now - self.input_started)
+            self.input_started = None
+
+    def summary(self):
+        """Перцентили длительностей по именам (мс); мгновенные события только считаются."""
+        durations = {}
+        for name, _, duration, _ in list(self.records):
+            durations.setdefault(name, []).append(duration)
+        result = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50": percentile(values, 50) / 1e6,
+                "p90": percentile(values, 90) / 1e6,
+                "p99": percentile(values, 99) / 1e6,
+                "max": values[-1] / 1e6,
+            }
+        return result
+
+    def print_summary(self):
+        print(f"{'этап':<28}{'число':>8}{'p50 мс':>10}{'p90 мс':>10}{'p99 мс':>10}{'max мс':>10}")
+        for name, stats in self.summary().items():
+            print(f"{name:<28}{stats['count']:>8}{stats['p50']:>10.3f}{stats['p90']:>10.3f}"
+                  f"{stats['p99']:>10.3f}{stats['max']:>10.3f}")
+
+    def export_chrome(self, path):
+        """Сохраняет замеры в формате Chrome trace (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = []
+        for name, start, duration, tid in list(self.records):
+            event = {"name": name, "ts": start / 1000, "pid": pid, "tid": tid}
+            if duration:
+                event.update(ph="X", dur=duration / 1000)
+            else:
+                event.update(ph="i", s="t")
+            events.append(event)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def percentile(sorted_values, p):
+    """Перцентиль по уже отсортированному списку (ближайший ранг)."""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# Общий трассировщик процесса; выключен, пока не передан флаг --trace
+tracer = Tracer()
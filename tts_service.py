@@ -0,0 +1,138 @@
+import hashlib
+import os
+import queue
+import sys
+import threading
+import pygame
+import pyttsx3
+from asset_cache import load_sound, resource_path
+from audio_manager import get_audio
+
+# Папка, куда синтезированные фразы сохраняются для повторного воспроизведения
+TTS_CACHE_DIR = 'tts_cache'
+DEFAULT_RATE = 150
+VOICE = "russian"
+# Событие, которое будит главный цикл, когда фраза синтезирована
+TTS_READY = pygame.event.custom_type()
+
+
+class TTSService:
+    """Синтез речи в фоновом потоке с кэшем на диске и в памяти.
+
+    Фраза синтезируется в файл один раз, а дальше проигрывается через микшер.
+    Главный цикл вызывает update(), чтобы запустить готовые фразы.
+    Если синтезатор не запустился, available становится False и speak() ничего не делает:
+    вызывающий код читает слово сам (например, по буквам).
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR):
+        self.cache_dir = resource_path(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._requests = queue.Queue()
+        self._ready = queue.Queue()
+        self._generation = 0
+        self._channel = None
+        self.available = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def cache_path(self, phrase, rate=DEFAULT_RATE):
+        digest = hashlib.sha1(f"{VOICE}|{rate}|{phrase}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    def speak(self, phrase, rate=DEFAULT_RATE):
+        """Произносит фразу: из кэша сразу, иначе после синтеза в фоне."""
+        phrase = phrase.strip()
+        if not phrase:
+            return
+        path = self.cache_path(phrase, rate)
+        if os.path.exists(path):
+            self._play(path)
+        elif self.available:
+            self._requests.put((self._generation, phrase, rate, path))
+
+    def prepare(self, phrase, rate=DEFAULT_RATE):
+        """Синтезирует фразу заранее, не проигрывая её."""
+        path = self.cache_path(phrase, rate)
+        if self.available and not os.path.exists(path):
+            self._requests.put((None, phrase, rate, path))
+
+    def cancel(self):
+        """Отменяет ожидающие фразы и останавливает текущую."""
+        self._generation += 1
+        while True:
+            try:
+                self._requests.get_nowait()
+            except queue.Empty:
+                break
+        if self._channel is not None:
+            self._channel.stop()
+            self._channel = None
+
+    def update(self):
+        while True:
+            try:
+                generation, path = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            # Фразы, отменённые до окончания синтеза, остаются в кэше, но не звучат
+            if generation == self._generation:
+                self._play(path)
+
+    def _play(self, path):
+        self._channel = get_audio().play(load_sound(path), "speech")
+
+    def _start_engine(self):
+        """Движок создаётся в рабочем потоке и используется только в нём; None — синтезатора нет."""
+        if sys.platform == "win32":
+            # SAPI5 работает через COM, а COM нужно инициализировать в каждом потоке
+            import pythoncom
+            pythoncom.CoInitialize()
+        engine = pyttsx3.init()
+        engine.setProperty("voice", VOICE)
+        return engine
+
+    def _run(self):
+        try:
+            engine = self._start_engine()
+        except Exception as e:  # у каждой платформы свои ошибки: ImportError, RuntimeError, COMError...
+            print(f"Синтезатор речи недоступен: {e!r}")
+            self.available = False
+            # Фразы, поставленные до этого момента, уже не будут синтезированы
+            while True:
+                try:
+                    self._requests.get_nowait()
+                except queue.Empty:
+                    return
+        while True:
+            generation, phrase, rate, path = self._requests.get()
+            engine.setProperty("rate", rate)
+            tmp_path = path + '.tmp.wav'
+            try:
+                engine.save_to_file(phrase, tmp_path)
+                engine.runAndWait()
+                os.replace(tmp_path, path)
+            except (OSError, RuntimeError) as e:
+                print(f"Ошибка синтеза речи для '{phrase}': {e}")
+                if generation is not None:
+                    # Не удалось записать файл: произносим напрямую, но всё равно вне главного потока
+                    engine.say(phrase)
+                    engine.runAndWait()
+                continue
+            if generation is not None:
+                self._ready.put((generation, path))
+                try:
+                    pygame.event.post(pygame.event.Event(TTS_READY))
+                except pygame.error:
+                    pass  # окно ещё не создано: фразу заберёт следующий update()
+
+
+_service = None
+
+
+def get_tts():
+    """Возвращает общий для всего приложения сервис синтеза речи."""
+    global _service
+    if _service is None:
+        _service = TTSService()
+    return _service
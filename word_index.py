@@ -0,0 +1,183 @@
+from collections import deque
+from functools import lru_cache
+from braille_cell import SYMBOL_TO_CELL, CELL_TO_SYMBOL, confusions
+import curriculum_package
+
+# Цена правок в нечётком поиске: лишняя или пропущенная буква стоит GAP_COST,
+# замена буквы — DOT_COST за каждую точку, которой буквы различаются (не больше GAP_COST).
+# Так "пропущена одна точка" почти не отличается от правильного слова, а чужая буква — отличается.
+GAP_COST = 1.0
+DOT_COST = 0.35
+MAX_COST = 1.0      # по умолчанию: одна лишняя/пропущенная буква или ошибки в двух точках
+COMPLETIONS = 3     # сколько вариантов предлагать
+
+# Виды ошибок для check_word
+ERROR_KINDS = {
+    "swap": "переставлены соседние буквы",
+    "dot": "ошибка в точках",
+    "letter": "набрана другая буква",
+    "missing": "пропущена буква",
+    "extra": "лишняя буква",
+    "mixed": "несколько ошибок",
+}
+
+
+@lru_cache(maxsize=None)
+def substitution_cost(a, b):
+    if a == b:
+        return 0.0
+    cell_a, cell_b = SYMBOL_TO_CELL.get(a), SYMBOL_TO_CELL.get(b)
+    if cell_a is None or cell_b is None:
+        return GAP_COST
+    return min(GAP_COST, bin(cell_a ^ cell_b).count("1") * DOT_COST)
+
+
+class Node:
+    __slots__ = ("children", "word")
+
+    def __init__(self):
+        self.children = {}
+        self.word = None  # слово, которое заканчивается в этом узле
+
+
+class WordIndex:
+    """Префиксное дерево слов программы.
+
+    Набор идёт по буквам, поэтому движок хранит текущий узел и спускается на
+    один шаг при каждой новой букве (step), а не ищет слово заново.
+    """
+
+    def __init__(self, words=()):
+        self.load(words)
+
+    def load(self, words):
+        self.root = Node()
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        node = self.root
+        for char in word.lower():
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = Node()
+            node = child
+        if node.word is None:
+            node.word = word.lower()
+            self.size += 1
+
+    def find(self, prefix, node=None):
+        """Узел для префикса или None, если таких слов нет."""
+        node = node or self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def __contains__(self, word):
+        node = self.find(word)
+        return node is not None and node.word is not None
+
+    @staticmethod
+    def step(node, char):
+        """Следующий узел после буквы char (None — слов с таким началом нет)."""
+        return node.children.get(char.lower()) if node is not None else None
+
+    @staticmethod
+    def completions(node, limit=COMPLETIONS):
+        """Слова, начинающиеся с префикса узла: сначала самые короткие."""
+        found = []
+        queue = deque([node])
+        while queue and len(found) < limit:
+            node = queue.popleft()
+            if node.word is not None:
+                found.append(node.word)
+            queue.extend(node.children.values())
+        return found
+
+    def fuzzy(self, word, max_cost=MAX_COST, limit=COMPLETIONS, prefix=False):
+        """Похожие слова: [(слово, цена)] по возрастанию цены.
+
+        Расстояние Левенштейна считается по строке на узел дерева, поэтому общие
+        префиксы считаются один раз, а ветви дороже max_cost отсекаются целиком.
+        prefix=True — word считается началом слова, возвращаются его продолжения.
+        """
+        word = word.lower()
+        first_row = [j * GAP_COST for j in range(len(word) + 1)]
+        matches = []  # (цена, порядок, узел)
+
+        def visit(node, char, previous):
+            row = [previous[0] + GAP_COST]
+            for j in range(1, len(word) + 1):
+                row.append(min(row[j - 1] + GAP_COST, previous[j] + GAP_COST,
+                               previous[j - 1] + substitution_cost(word[j - 1], char)))
+            if row[-1] <= max_cost + 1e-9 and (prefix or node.word is not None):
+                matches.append((row[-1], len(matches), node))
+            if min(row) <= max_cost + 1e-9:
+                for next_char, child in node.children.items():
+                    visit(child, next_char, row)
+
+        for char, child in self.root.children.items():
+            visit(child, char, first_row)
+        matches.sort(key=lambda match: match[:2])
+
+        found = {}
+        for cost, _, node in matches:
+            for candidate in (self.completions(node, limit) if prefix else [node.word]):
+                found.setdefault(candidate, cost)
+            if len(found) >= limit:
+                break
+        return list(found.items())[:limit]
+
+
+def classify(expected, typed):
+    """Вид ошибки (ключ ERROR_KINDS) или None, если слово набрано верно."""
+    expected, typed = expected.lower(), (typed or "").lower()
+    if expected == typed:
+        return None
+    diff = [i for i, (a, b) in enumerate(zip(expected, typed)) if a != b]
+    if (len(expected) == len(typed) and len(diff) == 2 and diff[1] == diff[0] + 1
+            and expected[diff[0]] == typed[diff[1]] and expected[diff[1]] == typed[diff[0]]):
+        return "swap"
+    kinds = set()
+    for cell, typed_cell in confusions(expected, typed):
+        if not typed_cell:
+            kinds.add("missing")
+        elif not cell:
+            kinds.add("extra")
+        elif bin(cell ^ typed_cell).count("1") <= 2:
+            kinds.add("dot")
+        else:
+            kinds.add("letter")
+    return kinds.pop() if len(kinds) == 1 else "mixed"
+
+
+def describe(expected, typed):
+    """Короткое пояснение ошибки для экрана."""
+    kind = classify(expected, typed)
+    if kind is None:
+        return None
+    if kind == "dot":
+        details = []
+        for cell, typed_cell in confusions(expected, typed):
+            missing = [i + 1 for i in range(8) if cell & ~typed_cell & (1 << i)]
+            extra = [i + 1 for i in range(8) if typed_cell & ~cell & (1 << i)]
+            text = CELL_TO_SYMBOL[cell]
+            if missing:
+                text += ": нет точки " + ", ".join(map(str, missing))
+            if extra:
+                text += (", " if missing else ": ") + "лишняя точка " + ", ".join(map(str, extra))
+            details.append(text)
+        return f"{ERROR_KINDS[kind]} ({'; '.join(details)})"
+    return ERROR_KINDS[kind]
+
+
+def package_words(package):
+    return [word for words in package.dictations.values() for word in words]
+
+
+word_index = WordIndex(package_words(curriculum_package.get_active()))
+# Как и индекс программы, дерево одно на процесс и обновляется на месте при смене программы
+curriculum_package.add_listener(lambda package: word_index.load(package_words(package)))
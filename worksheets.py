@@ -0,0 +1,352 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pygame
+from braille_cell import LETTER_TO_CELL, from_unicode
+from braille_translate import DEFAULT_TABLE, load_table, read_table
+import curriculum_package
+
+# Листы для печати и для брайлевского принтера:
+#   .brf  — Braille ASCII (North American), 40 клеток x 25 строк на странице, страницы через \f
+#   .txt  — то же символами Брайля Unicode
+#   .png  — страницы с картинками букв из программы (images/буква_*.png), по файлу на страницу
+#   .pdf  — те же страницы одним файлом
+# Листы собираются в нескольких процессах; лист, содержимое которого не изменилось
+# (по хешу в MANIFEST_FILE), не пересобирается.
+OUTPUT_DIR = "worksheets"
+MANIFEST_FILE = ".worksheets.json"
+FORMATS = ["brf", "txt", "png", "pdf"]
+SHEET_VERSION = 1  # менять при изменении вёрстки, чтобы кэш пересобрался
+
+BRF_COLUMNS, BRF_LINES = 40, 25
+# Braille ASCII: символ для каждой шеститочечной ячейки (индекс — маска точек)
+BRAILLE_ASCII = " A1B'K2L@CIF/MSP\"E3H9O6R^DJG>NTQ,*5<-U8V.%[$+X!&;:4\\0Z7(_?W]#Y)="
+
+# Страница PNG/PDF: A4 при PAGE_DPI точек на дюйм
+PAGE_DPI = 100
+PAGE_SIZE = (827, 1169)
+MARGIN = 50
+TITLE_SIZE = 32
+LABEL_SIZE = 24
+LABEL_WIDTH = 220
+ROW_HEIGHT = 70   # высота картинки буквы в строке
+ROW_GAP = 20
+GLYPH_GAP = 6
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GRAY = (200, 200, 200)
+
+# Лист: name — имя файлов, title — заголовок, words — строки листа
+Sheet = namedtuple("Sheet", ["name", "title", "words"])
+
+
+def file_name(text):
+    return re.sub(r"[^\w-]+", "_", text).strip("_") or "_"
+
+
+def dictation_sheets(package):
+    """По листу на каждый этап программы."""
+    return [Sheet(f"dictation_{i + 1:02d}_{file_name(stage)}", f"Диктант: {stage}", list(words))
+            for i, (stage, words) in enumerate(package.dictations.items())]
+
+
+def history_mistakes(history):
+    """Что ученик набирал с ошибками (история в формате students_db.json): {текст: сколько раз}."""
+    counts = Counter()
+    for dictations in history.values():
+        for entry in dictations.values():
+            counts.update(text.lower() for text in entry.get("mistakes", []) if text)
+    return counts
+
+
+def student_sheets(store, limit=20):
+    """Листы с ошибками учеников: сначала самые трудные слова по памяти повторений,
+    затем ошибки из истории диктантов (у учеников из students_db.json есть только она)."""
+    sheets = []
+    for student_id in store.student_ids():
+        states = store.word_states(student_id)
+        # Состояние: (ease, interval, reps, due, lapses)
+        words = sorted((word for word, state in states.items() if state[4] > 0),
+                       key=lambda word: (-states[word][4], states[word][0]))
+        mistakes = history_mistakes(store.student_history(student_id))
+        words += [text for text, _ in mistakes.most_common() if text not in states]
+        words = words[:limit]
+        if words:
+            sheets.append(Sheet(f"student_{file_name(student_id)}", f"Ученик {student_id}: повторение", words))
+    return sheets
+
+
+# Текстовые форматы
+
+def brf(cells):
+    return "".join(BRAILLE_ASCII[from_unicode(cell) & 0x3F] if from_unicode(cell) is not None else cell
+                   for cell in cells)
+
+
+def braille_pages(sheet, translator):
+    """Страницы листа в Брайле Unicode: [[строка, ...], ...]; длинные строки переносятся."""
+    lines = []
+    for text in [sheet.title, ""] + sheet.words:
+        cells = translator.forward(text)
+        lines.extend([cells[i:i + BRF_COLUMNS] for i in range(0, len(cells), BRF_COLUMNS)] or [""])
+    return [lines[i:i + BRF_LINES] for i in range(0, len(lines), BRF_LINES)]
+
+
+def write_text(path, pages, convert=str):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for number, page in enumerate(pages):
+            if number:
+                f.write("\f")
+            f.write("\n".join(convert(line) for line in page) + "\n")
+
+
+# Страницы с картинками
+
+class PdfWriter:
+    """Минимальный PDF: по картинке на страницу, страницы пишутся по мере готовности."""
+
+    def __init__(self, path, dpi=PAGE_DPI):
+        self.f = open(path, "wb")
+        self.dpi = dpi
+        self.offsets = {}
+        self.pages = []
+        self.next_id = 3  # 1 — каталог, 2 — список страниц (пишутся в конце)
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _object(self, number, body, stream=None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode("ascii") + body)
+        if stream is not None:
+            self.f.write(b"\nstream\n" + stream + b"\nendstream")
+        self.f.write(b"\nendobj\n")
+
+    def add_page(self, surface):
+        width, height = surface.get_size()
+        points = (width * 72 / self.dpi, height * 72 / self.dpi)
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+        pixels = zlib.compress(pygame.image.tobytes(surface, "RGB"), 6)
+        self._object(image_id, f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                               f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode "
+                               f"/Length {len(pixels)} >>".encode("ascii"), pixels)
+        content = f"q {points[0]:.2f} 0 0 {points[1]:.2f} 0 0 cm /Im0 Do Q".encode("ascii")
+        self._object(content_id, f"<< /Length {len(content)} >>".encode("ascii"), content)
+        self._object(page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {points[0]:.2f} {points[1]:.2f}] "
+                              f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> "
+                              f"/Contents {content_id} 0 R >>".encode("ascii"))
+        self.pages.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page} 0 R" for page in self.pages)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode("ascii"))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.f.tell()
+        count = max(self.offsets) + 1
+        self.f.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode("ascii"))
+        for number in range(1, count):
+            self.f.write(f"{self.offsets[number]:010d} 00000 n \n".encode("ascii"))
+        self.f.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+        self.f.close()
+
+
+class PageRenderer:
+    """Вёрстка страниц из картинок букв; картинки загружаются один раз на процесс."""
+
+    def __init__(self, glyph_paths, translator):
+        pygame.font.init()
+        self.glyph_paths = glyph_paths
+        self.translator = translator
+        self.glyphs = {}
+        self.title_font = pygame.font.SysFont("arial", TITLE_SIZE)
+        self.label_font = pygame.font.SysFont("arial", LABEL_SIZE)
+
+    def glyph(self, cell):
+        if cell not in self.glyphs:
+            path = self.glyph_paths.get(cell)
+            if path:
+                image = pygame.image.load(path)
+                width, height = image.get_size()
+                image = pygame.transform.smoothscale(image, (max(1, width * ROW_HEIGHT // height), ROW_HEIGHT))
+            else:
+                image = self.draw_cell(cell)  # цифры, знаки: картинки нет, рисуем точки
+            self.glyphs[cell] = image
+        return self.glyphs[cell]
+
+    @staticmethod
+    def draw_cell(cell):
+        radius = ROW_HEIGHT // 10
+        surface = pygame.Surface((ROW_HEIGHT * 2 // 3, ROW_HEIGHT))
+        surface.fill(WHITE)
+        for dot in range(6):
+            center = (ROW_HEIGHT // 5 + (dot // 3) * ROW_HEIGHT // 3, ROW_HEIGHT // 6 + (dot % 3) * ROW_HEIGHT // 3)
+            if cell & (1 << dot):
+                pygame.draw.circle(surface, BLACK, center, radius)
+            else:
+                pygame.draw.circle(surface, GRAY, center, radius, 1)
+        return surface
+
+    def word_rows(self, word):
+        """Картинки слова, разбитые на строки по ширине страницы."""
+        rows, row, x = [], [], 0
+        width = PAGE_SIZE[0] - 2 * MARGIN - LABEL_WIDTH
+        for cell in self.translator.forward(word):
+            image = self.glyph(from_unicode(cell) or 0)
+            if row and x + image.get_width() > width:
+                rows.append(row)
+                row, x = [], 0
+            row.append(image)
+            x += image.get_width() + GLYPH_GAP
+        return rows + [row]
+
+    def pages(self, sheet):
+        """Страницы листа по одной: в памяти только текущая."""
+        page, y = None, 0
+        for word in sheet.words:
+            rows = self.word_rows(word)
+            height = len(rows) * (ROW_HEIGHT + ROW_GAP)
+            if page is None or y + height > PAGE_SIZE[1] - MARGIN:
+                if page is not None:
+                    yield page
+                page, y = self.new_page(sheet.title)
+            page.blit(self.label_font.render(word, True, BLACK), (MARGIN, y + ROW_HEIGHT // 3))
+            for row in rows:
+                x = MARGIN + LABEL_WIDTH
+                for image in row:
+                    page.blit(image, (x, y))
+                    x += image.get_width() + GLYPH_GAP
+                y += ROW_HEIGHT + ROW_GAP
+        if page is not None:
+            yield page
+
+    def new_page(self, title):
+        page = pygame.Surface(PAGE_SIZE)
+        page.fill(WHITE)
+        page.blit(self.title_font.render(title, True, BLACK), (MARGIN, MARGIN))
+        return page, MARGIN + TITLE_SIZE * 2
+
+
+# Сборка в процессах
+
+_renderer = None
+
+
+def _init_worker(glyph_paths, table):
+    global _renderer
+    _renderer = PageRenderer(glyph_paths, load_table(table))
+
+
+def build_sheet(sheet, out_dir, formats):
+    """Собирает один лист во всех форматах (в процессе пула); возвращает (имя, страниц PNG/PDF)."""
+    base = os.path.join(out_dir, sheet.name)
+    if "brf" in formats or "txt" in formats:
+        pages = braille_pages(sheet, _renderer.translator)
+        if "brf" in formats:
+            write_text(base + ".brf", pages, brf)
+        if "txt" in formats:
+            write_text(base + ".txt", pages)
+    count = 0
+    if "png" in formats or "pdf" in formats:
+        pdf = PdfWriter(base + ".pdf") if "pdf" in formats else None
+        for count, page in enumerate(_renderer.pages(sheet), 1):
+            if "png" in formats:
+                pygame.image.save(page, f"{base}-{count:02d}.png")
+            if pdf:
+                pdf.add_page(page)
+        if pdf:
+            pdf.close()
+    return sheet.name, count
+
+
+def glyph_paths_for(package):
+    """Ячейка -> путь к картинке буквы из программы."""
+    paths = {}
+    for letter, info in package.letters.items():
+        if info["image"]:
+            paths[LETTER_TO_CELL.get(letter, 0)] = curriculum_package.resource_path(info["image"])
+    return paths
+
+
+def sheet_hash(sheet, formats, table_digest, assets_digest):
+    data = json.dumps([SHEET_VERSION, sheet, sorted(formats), table_digest, assets_digest], ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def table_digest(table):
+    """Отпечаток таблицы перевода вместе с подключёнными (include): правка таблицы пересобирает листы."""
+    data = json.dumps(read_table(table), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def assets_digest(glyph_paths):
+    """Отпечаток картинок букв: при их замене все листы пересобираются."""
+    stats = sorted((cell, os.path.getsize(path), os.path.getmtime(path)) for cell, path in glyph_paths.items())
+    return hashlib.sha256(repr(stats).encode("utf-8")).hexdigest()
+
+
+def outputs_exist(base, formats):
+    return all(os.path.exists(f"{base}.{ext}") for ext in formats if ext != "png") and \
+        ("png" not in formats or os.path.exists(f"{base}-01.png"))
+
+
+def build_all(sheets, out_dir=OUTPUT_DIR, formats=FORMATS, workers=None, package=None, table=DEFAULT_TABLE):
+    """Собирает изменившиеся листы; возвращает (собрано, пропущено)."""
+    package = package or curriculum_package.get_active()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    glyph_paths = glyph_paths_for(package)
+    digest = assets_digest(glyph_paths)
+    table_hash = table_digest(table)
+    hashes = {sheet.name: sheet_hash(sheet, formats, table_hash, digest) for sheet in sheets}
+    todo = [sheet for sheet in sheets
+            if manifest.get(sheet.name) != hashes[sheet.name]
+            or not outputs_exist(os.path.join(out_dir, sheet.name), formats)]
+
+    if todo:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(glyph_paths, table)) as pool:
+            futures = [pool.submit(build_sheet, sheet, out_dir, formats) for sheet in todo]
+            for future in as_completed(futures):
+                name, _ = future.result()
+                manifest[name] = hashes[name]
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+    return len(todo), len(sheets) - len(todo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Листы для печати и брайлевского принтера")
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию — по числу ядер)")
+    parser.add_argument("--curriculum", metavar="NAME", help="программа диктантов из папки curricula/")
+    parser.add_argument("--table", default=DEFAULT_TABLE, help="таблица перевода из braille_tables/")
+    parser.add_argument("--only", choices=["dictations", "students"], help="только диктанты или только ученики")
+    args = parser.parse_args()
+
+    package = curriculum_package.load_package(args.curriculum) if args.curriculum else curriculum_package.get_active()
+    sheets = []
+    if args.only != "students":
+        sheets += dictation_sheets(package)
+    if args.only != "dictations":
+        from progress_store import open_store
+        store = open_store()
+        sheets += student_sheets(store)
+        store.close()
+
+    started = time.perf_counter()
+    built, skipped = build_all(sheets, args.out, args.formats, args.workers, package, args.table)
+    print(f"Листов: {len(sheets)}, собрано {built}, без изменений {skipped} "
+          f"за {time.perf_counter() - started:.2f} с -> {args.out}")